@@ -0,0 +1,181 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Micro-benchmarks for ezoutlet client overhead, against ezoutlet.simulator.
+
+Run from the repository root:
+
+    python -m benchmarks.run                      # print results
+    python -m benchmarks.run --save base.json     # record a baseline
+    python -m benchmarks.run --baseline base.json # fail on regressions
+
+Every result is a time in seconds, so lower is always better.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+
+from concurrent import futures
+
+from ezoutlet import ez_outlet
+from ezoutlet import fleet
+from ezoutlet import outlet_pool
+from ezoutlet import simulator
+
+EXIT_CODE_OK = 0
+EXIT_CODE_REGRESSION = 1
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_CLI_RUNS = 5
+DEFAULT_FLEET_SIZE = 64
+DEFAULT_CONCURRENCY_LEVELS = '1,8,32'
+DEFAULT_FLEET_LATENCY = 0.02
+DEFAULT_TOLERANCE = 0.25
+
+
+def bench_reset_pooled(iterations):
+    """Per-reset client overhead with a kept-alive connection."""
+    with simulator.SimulatedOutlet(relay_cycle_time=0) as server:
+        with ez_outlet.EzOutlet(hostname=server.hostname) as outlet:
+            outlet.reset(post_reset_delay=0, ez_outlet_reset_interval=0)  # warm up the connection
+            return _time_per_call(lambda: outlet.reset(post_reset_delay=0, ez_outlet_reset_interval=0), iterations)
+
+
+def bench_reset_fresh_connection(iterations):
+    """Per-reset time when every reset opens a new session and connection."""
+    with simulator.SimulatedOutlet(relay_cycle_time=0) as server:
+        def reset():
+            with ez_outlet.EzOutlet(hostname=server.hostname) as outlet:
+                outlet.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        return _time_per_call(reset, iterations)
+
+
+def bench_cli_cold_start(runs, args=('version',)):
+    """Median wall-clock time of `python -m ezoutlet <args>`."""
+    return _median_run_time([sys.executable, '-m', 'ezoutlet'] + list(args), runs)
+
+
+def bench_startup_overhead(runs):
+    """Median time `python -m ezoutlet version` adds over a bare interpreter start."""
+    bare = _median_run_time([sys.executable, '-c', 'pass'], runs)
+    return max(bench_cli_cold_start(runs) - bare, 0)
+
+
+def bench_fleet(fleet_size, concurrency, latency):
+    """Time per outlet for a fleet reset, with no on/off wait."""
+    with simulator.SimulatorFarm(count=fleet_size, relay_cycle_time=0, latency=latency) as farm:
+        with fleet.EzOutletFleet(hostnames=farm.hostnames, max_workers=concurrency) as ez_fleet:
+            start = time.time()
+            ez_fleet.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+            return (time.time() - start) / fleet_size
+
+
+def bench_shared_threads(fleet_size, threads, latency):
+    """Time per reset for worker threads sharing one EzOutletPool, each reset going to the next outlet."""
+    with simulator.SimulatorFarm(count=fleet_size, relay_cycle_time=0, latency=latency) as farm:
+        hostnames = farm.hostnames
+        with outlet_pool.EzOutletPool() as pool:
+            def reset(i):
+                pool.reset(hostnames[i % fleet_size], post_reset_delay=0, ez_outlet_reset_interval=0)
+
+            start = time.time()
+            with futures.ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(reset, range(fleet_size)))
+            return (time.time() - start) / fleet_size
+
+
+def run_all(iterations, cli_runs, fleet_size, concurrency_levels, fleet_latency):
+    """Returns: dict mapping benchmark name to seconds."""
+    results = {}
+    pooled = results['reset_pooled'] = bench_reset_pooled(iterations)
+    fresh = results['reset_fresh_connection'] = bench_reset_fresh_connection(iterations)
+    results['connection_setup'] = max(fresh - pooled, 0)
+    results['cli_cold_start'] = bench_cli_cold_start(cli_runs)
+    results['cli_startup_overhead'] = bench_startup_overhead(cli_runs)
+    for concurrency in concurrency_levels:
+        results['fleet_per_outlet_c{0}'.format(concurrency)] = bench_fleet(fleet_size, concurrency, fleet_latency)
+        results['shared_per_reset_t{0}'.format(concurrency)] = bench_shared_threads(fleet_size, concurrency,
+                                                                                    fleet_latency)
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """Returns: List of (name, baseline, result) for results slower than baseline * (1 + tolerance)."""
+    return [(name, baseline[name], result)
+            for name, result in sorted(results.items())
+            if name in baseline and result > baseline[name] * (1 + tolerance)]
+
+
+def _median_run_time(command, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.time()
+        subprocess.check_call(command, stdout=subprocess.PIPE)
+        timings.append(time.time() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def _time_per_call(fn, iterations):
+    start = time.time()
+    for _ in range(iterations):
+        fn()
+    return (time.time() - start) / iterations
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description='Benchmark ezoutlet client overhead against local fake outlets.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help='Resets per single-outlet benchmark.')
+    parser.add_argument('--cli-runs', type=int, default=DEFAULT_CLI_RUNS,
+                        help='Interpreter launches for the CLI cold-start benchmark.')
+    parser.add_argument('--fleet-size', type=int, default=DEFAULT_FLEET_SIZE,
+                        help='Fake outlets in the fleet benchmarks.')
+    parser.add_argument('--concurrency', default=DEFAULT_CONCURRENCY_LEVELS,
+                        help='Comma-separated fleet concurrency levels, also used as thread counts.')
+    parser.add_argument('--fleet-latency', type=float, default=DEFAULT_FLEET_LATENCY,
+                        help='Response latency in seconds of each fake outlet in the fleet benchmarks.')
+    parser.add_argument('--save', metavar='PATH', help='Write results as JSON.')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare against JSON results from --save.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown versus baseline, as a fraction.')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = _parse_args(argv)
+    results = run_all(iterations=args.iterations,
+                      cli_runs=args.cli_runs,
+                      fleet_size=args.fleet_size,
+                      concurrency_levels=[int(c) for c in args.concurrency.split(',')],
+                      fleet_latency=args.fleet_latency)
+
+    for name, seconds in sorted(results.items()):
+        print('{0:<32} {1:10.3f} ms'.format(name, seconds * 1000))
+
+    if args.save:
+        with io.open(args.save, 'wb') as f:
+            f.write(json.dumps(results, indent=2, sort_keys=True).encode('utf-8'))
+
+    if args.baseline:
+        with io.open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print('REGRESSION {0}: {1:.3f} ms -> {2:.3f} ms'.format(name, before * 1000, after * 1000),
+                  file=sys.stderr)
+        if regressions:
+            return EXIT_CODE_REGRESSION
+    return EXIT_CODE_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
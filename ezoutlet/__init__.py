@@ -6,17 +6,50 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import importlib
+import sys
+
 __version__ = '1.0'
 
 from . import constants
 from . import error_handling
 from . import exceptions
-from . import ez_outlet
 from . import parser
 from .commands import parse_command
+from .exceptions import CircuitOpenError, EzOutletError, EzOutletUsageError
+
+# Public names from modules that import requests. They are loaded on first
+# access, so that e.g. `python -m ezoutlet version` never imports requests.
+_LAZY_ATTRIBUTES = {
+    'EzOutlet': 'ez_outlet',
+    'EzOutletFleet': 'fleet',
+    'EzOutletPool': 'outlet_pool',
+    'ProcessFleet': 'process_fleet',
+    'reset_many': 'fleet',
+    'ResetHandle': 'reset_handle',
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES) + ['CircuitOpenError', 'EzOutletError', 'EzOutletUsageError']
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module('.' + _LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    if not name.startswith('_'):
+        # Submodules such as ezoutlet.ez_outlet, which are no longer imported with the package.
+        try:
+            return importlib.import_module('.' + name, __name__)
+        except ImportError as e:
+            if e.name != '{0}.{1}'.format(__name__, name):
+                raise
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
 
-__all__ = [ez_outlet.EzOutlet,
-           exceptions.EzOutletError, exceptions.EzOutletUsageError]
+if sys.version_info < (3, 7):
+    # No module-level __getattr__ (PEP 562); import eagerly instead.
+    for _name in _LAZY_ATTRIBUTES:
+        globals()[_name] = __getattr__(_name)
 
 
 def main(argv):
@@ -33,6 +66,6 @@ def main(argv):
 
 
 def _parse_args_and_run(argv):
-    parsed_args = parser.static_parser.parse_args(argv)
+    parsed_args = parser.get_parser().parse_args(argv)
     cmd = parse_command.parse_command(parsed_args.subcommand, parsed_args)
     return cmd.run()
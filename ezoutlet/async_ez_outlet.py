@@ -0,0 +1,229 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""asyncio variant of EzOutlet. Requires Python 3.5+.
+
+The HTTP exchange with an ezOutlet is a single short GET, so this module
+speaks HTTP/1.0 directly over asyncio streams instead of depending on a
+third-party asynchronous HTTP client.
+"""
+
+import asyncio
+import time
+import urllib.parse as urlparse
+
+from . import constants
+from . import exceptions
+from . import ez_outlet
+from . import fleet
+from . import instrumentation
+
+HTTP_REQUEST_FORMAT = 'GET {path} HTTP/1.0\r\nHost: {host}\r\nConnection: close\r\n\r\n'
+HTTP_DEFAULT_PORT = 80
+HTTP_HEADER_TERMINATOR = b'\r\n\r\n'
+
+
+class AsyncEzOutlet(object):
+    """asyncio counterpart of EzOutlet's reset.
+
+    Response validation and error messages are the same as EzOutlet's, and
+    a status other than 2xx raises EzOutletError with HTTP_STATUS_MSG. Only
+    reset() and post_fail() are offered, and they must be awaited. No threads
+    are used, so many thousands of resets can share one event loop.
+
+    EzOutlet's other options (sessions, retries, circuit breakers, rate
+    limiting, name caching, interval learning, coordination) are not
+    supported; use EzOutlet, e.g. through run_in_executor, where they are
+    needed.
+    """
+    DEFAULT_EZ_OUTLET_RESET_INTERVAL = ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL
+    DEFAULT_TIMEOUT = ez_outlet.EzOutlet.DEFAULT_TIMEOUT
+    DEFAULT_WAIT_TIME = ez_outlet.EzOutlet.DEFAULT_WAIT_TIME
+    RESET_URL_PATH = ez_outlet.EzOutlet.RESET_URL_PATH
+    EXPECTED_RESPONSE_CONTENTS = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+    NO_RESPONSE_MSG = ez_outlet.EzOutlet.NO_RESPONSE_MSG
+    CONNECTION_ERROR_MSG = ez_outlet.EzOutlet.CONNECTION_ERROR_MSG
+    UNEXPECTED_RESPONSE_MSG = ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG
+    HTTP_STATUS_MSG = "Unexpected HTTP status from EzOutlet: {0!r}"
+
+    def __init__(self, hostname, timeout=DEFAULT_TIMEOUT, observers=()):
+        """
+        Args:
+            hostname: Hostname or IP address of device.
+            timeout: Time in seconds to wait for the EzOutlet to respond.
+            observers: Callables given a ResetTiming after every reset. See
+                EzOutlet.
+        """
+        self._hostname = hostname
+        self._timeout = timeout
+        self._observers = list(observers)
+
+    @property
+    def hostname(self):
+        return self._hostname
+
+    @property
+    def url(self):
+        return ez_outlet._get_url(self._hostname, self.RESET_URL_PATH)
+
+    async def reset(self, post_reset_delay=DEFAULT_WAIT_TIME,
+                    ez_outlet_reset_interval=DEFAULT_EZ_OUTLET_RESET_INTERVAL):
+        """Send reset request to ezOutlet, check response, wait for reset.
+
+        See EzOutlet.reset.
+
+        Returns: HTTP response contents.
+
+        Raises:
+            EzOutletError: If the reset fails due to:
+                - no response in self._timeout seconds,
+                - a status other than 2xx or
+                - unexpected response contents (see
+                  EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        """
+        with instrumentation.ResetTiming(self._hostname, observers=self._observers) as timing:
+            response = await self._send_reset(timing=timing)
+
+            start = instrumentation.clock()
+            await self._wait_for_reset(post_reset_delay + ez_outlet_reset_interval)
+            timing.wait_time = instrumentation.clock() - start
+
+            return response
+
+    async def post_fail(self, *args, **kwargs):
+        """Reset the device, with default arguments. See EzOutlet.post_fail; here it must be awaited.
+
+        Returns: HTTP response contents.
+        """
+        return await self.reset()
+
+    async def _send_reset(self, timing=None):
+        """Send reset request and check response, without waiting.
+
+        Args:
+            timing: ResetTiming to record request and validation times in;
+                or None.
+
+        Returns: HTTP response contents.
+        """
+        if timing is None:
+            timing = instrumentation.ResetTiming(self._hostname)
+        start = instrumentation.clock()
+        try:
+            response = await self._http_get(self.url)
+        finally:
+            timing.add_attempt(instrumentation.clock() - start)
+
+        start = instrumentation.clock()
+        try:
+            self._check_response_raise_if_unexpected(response)
+        finally:
+            timing.validation_time = instrumentation.clock() - start
+
+        return response
+
+    async def _http_get(self, url):
+        """HTTP GET and return response.
+
+        Args:
+            url: Target to GET.
+
+        Returns: Response contents.
+
+        Raises:
+            EzOutletError: If the reset fails due to:
+                - no response in self._timeout seconds
+                - connection failure
+                - a status other than 2xx
+        """
+        try:
+            status_line, response = await asyncio.wait_for(_fetch(url), timeout=self._timeout)
+        except asyncio.TimeoutError as e:
+            raise exceptions.EzOutletError(self.NO_RESPONSE_MSG.format(self._timeout)) from e
+        except OSError as e:
+            raise exceptions.EzOutletError(self.CONNECTION_ERROR_MSG.format(e)) from e
+        if not _is_success(status_line):
+            raise exceptions.EzOutletError(self.HTTP_STATUS_MSG.format(status_line))
+        return response
+
+    def _check_response_raise_if_unexpected(self, response):
+        """Raise EzOutletError if response is unexpected. See EzOutlet."""
+        if response != self.EXPECTED_RESPONSE_CONTENTS:
+            raise exceptions.EzOutletError(self.UNEXPECTED_RESPONSE_MSG.format(response))
+
+    @staticmethod
+    async def _wait_for_reset(total_delay):
+        """Sleep for total_delay seconds without blocking the event loop.
+
+        Returns: None
+        """
+        await asyncio.sleep(total_delay)
+
+
+async def reset_many(hostnames,
+                     post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+                     ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                     timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT,
+                     max_concurrency=constants.DEFAULT_FLEET_MAX_WORKERS):
+    """Reset several ezOutlets concurrently on the running event loop.
+
+    asyncio counterpart of fleet.reset_many: requests are sent concurrently,
+    then a single wait covers every outlet.
+
+    Every request in flight holds a socket, so at most max_concurrency are
+    sent at once, by default as many as EzOutletFleet's worker threads. None
+    removes the limit, which for large fleets can exhaust the process's file
+    descriptors.
+
+    Returns: dict mapping each hostname to its HTTP response contents, or to
+        the exception raised while resetting it.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    last_response_time = None
+
+    async def send_reset(hostname):
+        nonlocal last_response_time
+        outlet = AsyncEzOutlet(hostname=hostname, timeout=timeout)
+        if semaphore is None:
+            response = await outlet._send_reset()
+        else:
+            async with semaphore:
+                response = await outlet._send_reset()
+        last_response_time = time.time()
+        return response
+
+    hostnames = fleet.unique_hostnames(hostnames)
+    responses = await asyncio.gather(*(send_reset(h) for h in hostnames), return_exceptions=True)
+
+    if last_response_time is not None:
+        remaining = last_response_time + post_reset_delay + ez_outlet_reset_interval - time.time()
+        await AsyncEzOutlet._wait_for_reset(max(remaining, 0))
+
+    return dict(zip(hostnames, responses))
+
+
+async def _fetch(url):
+    """GET url over a fresh connection.
+
+    Returns: The response's status line and decoded body.
+    """
+    parts = urlparse.urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or HTTP_DEFAULT_PORT)
+    try:
+        writer.write(HTTP_REQUEST_FORMAT.format(path=parts.path or '/', host=parts.netloc).encode('ascii'))
+        raw = await reader.read()
+    finally:
+        writer.close()
+        # wait_closed() is new in Python 3.7.
+        if hasattr(writer, 'wait_closed'):
+            await writer.wait_closed()
+    head, _, body = raw.partition(HTTP_HEADER_TERMINATOR)
+    status_line = head.split(b'\r\n', 1)[0].decode('latin-1')
+    return status_line, body.decode('utf-8', 'replace')
+
+
+def _is_success(status_line):
+    """Return True if status_line, e.g. 'HTTP/1.0 200 OK', reports a 2xx status."""
+    fields = status_line.split(None, 2)
+    return (len(fields) >= 2 and fields[0].startswith('HTTP/') and
+            len(fields[1]) == 3 and fields[1].isdigit() and fields[1].startswith('2'))
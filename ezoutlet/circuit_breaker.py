@@ -0,0 +1,165 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Circuit breakers: fail fast on outlets which have stopped responding.
+
+Each host has a breaker, which starts closed. After failure_threshold
+consecutive failed requests it opens, and requests fail immediately with
+CircuitOpenError instead of waiting for a timeout. Once cool_down seconds
+have passed it is half-open: one request is let through as a probe,
+closing the breaker if it succeeds and re-opening it if it fails.
+
+Breakers are kept in a CircuitBreakerRegistry; share one registry between
+EzOutlets so they all see the same state for a host.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from . import constants
+from . import exceptions
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+CIRCUIT_OPEN_MSG = "Circuit open for {0} after {1} consecutive failures; next attempt allowed in {2:.1f} seconds."
+
+
+class CircuitBreaker(object):
+    """Thread-safe circuit breaker for one host."""
+
+    def __init__(self, hostname, failure_threshold=constants.DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                 cool_down=constants.DEFAULT_CIRCUIT_COOL_DOWN):
+        """
+        Args:
+            hostname: Hostname or IP address of the ezOutlet.
+            failure_threshold: Number of consecutive failures which opens the
+                breaker.
+            cool_down: Time in seconds the breaker stays open before letting
+                a probe request through.
+        """
+        self._hostname = hostname
+        self._failure_threshold = failure_threshold
+        self._cool_down = cool_down
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def hostname(self):
+        return self._hostname
+
+    @property
+    def failures(self):
+        """Number of consecutive failures."""
+        return self._failures
+
+    @property
+    def state(self):
+        """CLOSED, OPEN or HALF_OPEN."""
+        with self._lock:
+            return self._state()
+
+    def before_request(self):
+        """Check a request may be sent, and if half-open, claim the probe.
+
+        Returns: None
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with its
+                probe already in flight.
+        """
+        with self._lock:
+            state = self._state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            remaining = max(self._opened_at + self._cool_down - time.time(), 0)
+            raise exceptions.CircuitOpenError(CIRCUIT_OPEN_MSG.format(self._hostname, self._failures, remaining))
+
+    def record_success(self):
+        """Close the breaker.
+
+        Returns: None
+        """
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """Count a failure, opening the breaker at failure_threshold or on a failed probe.
+
+        Returns: None
+        """
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self._failure_threshold:
+                self._opened_at = time.time()
+            self._probing = False
+
+    def _state(self):
+        if self._opened_at is None:
+            return CLOSED
+        if time.time() < self._opened_at + self._cool_down:
+            return OPEN
+        return HALF_OPEN
+
+
+class CircuitBreakerRegistry(object):
+    """Circuit breakers for many hosts, created on first use."""
+
+    def __init__(self, failure_threshold=constants.DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+                 cool_down=constants.DEFAULT_CIRCUIT_COOL_DOWN):
+        """
+        Args:
+            failure_threshold: See CircuitBreaker.
+            cool_down: See CircuitBreaker.
+        """
+        self._failure_threshold = failure_threshold
+        self._cool_down = cool_down
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def get(self, hostname):
+        """Returns: The CircuitBreaker for hostname."""
+        with self._lock:
+            breaker = self._breakers.get(hostname)
+            if breaker is None:
+                breaker = self._breakers[hostname] = CircuitBreaker(hostname,
+                                                                    failure_threshold=self._failure_threshold,
+                                                                    cool_down=self._cool_down)
+            return breaker
+
+    def states(self):
+        """Returns: dict mapping each hostname seen so far to its breaker's state."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return dict((b.hostname, b.state) for b in breakers)
+
+    def reset(self, hostname=None):
+        """Close the breaker for hostname, or every breaker.
+
+        Returns: None
+        """
+        with self._lock:
+            breakers = list(self._breakers.values()) if hostname is None else [self._breakers.get(hostname)]
+        for breaker in breakers:
+            if breaker is not None:
+                breaker.record_success()
+
+
+_default_registry = CircuitBreakerRegistry()
+
+
+def default_registry():
+    """Returns: A CircuitBreakerRegistry shared by the whole process."""
+    return _default_registry
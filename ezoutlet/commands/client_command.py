@@ -0,0 +1,60 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+
+from .. import constants
+from .. import daemon_client
+from .. import exceptions
+from .. import summary
+from . import targets
+from .icommand import ICommand
+
+
+class ClientCommand(ICommand):
+    """Forwards a request to the daemon.
+
+    Deliberately imports nothing heavy (no requests): the point of the
+    daemon is that clients start fast.
+    """
+
+    def __init__(self, parsed_args):
+        self._args = parsed_args
+        self._check_args()
+
+    def _check_args(self):
+        if self._args.action in ('reset', 'status') and not self._args.target:
+            raise exceptions.EzOutletUsageError(constants.TARGET_MISSING_ERROR_MESSAGE)
+        if self._args.reset_time < 0:
+            raise exceptions.EzOutletUsageError(constants.RESET_TIME_NEGATIVE_ERROR_MESSAGE)
+        if self._args.parallel < 1:
+            raise exceptions.EzOutletUsageError(constants.PARALLEL_NOT_POSITIVE_ERROR_MESSAGE)
+        if self._args.timeout <= 0:
+            raise exceptions.EzOutletUsageError(
+                constants.TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE.format(constants.STATUS_TIMEOUT_ARG_LONG))
+
+    def run(self):
+        client = daemon_client.DaemonClient(
+            address=daemon_client.get_address(socket_path=self._args.socket, port=self._args.port))
+        if self._args.action == 'ping':
+            print(json.dumps(client.ping(), sort_keys=True))
+            return constants.EXIT_CODE_OK
+        if self._args.action == 'circuits':
+            print(json.dumps(client.circuits(), sort_keys=True))
+            return constants.EXIT_CODE_OK
+        if self._args.action == 'metrics':
+            print(client.metrics(), end='')
+            return constants.EXIT_CODE_OK
+        hosts = [outlet.host for outlet in targets.resolve(self._args.target, self._args.inventory)]
+        if self._args.action == 'status':
+            return summary.print_statuses(client.status(targets=hosts,
+                                                        timeout=self._args.timeout,
+                                                        max_workers=self._args.parallel))
+        return summary.print_summaries(client.reset(targets=hosts,
+                                                    post_reset_delay=self._args.reset_time,
+                                                    max_workers=self._args.parallel))
@@ -6,17 +6,30 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from .no_command import NoCommand
-from .reset_command import ResetCommand
-from .version_command import VersionCommand
-
 
 def parse_command(subcommand, parsed_args):
+    # Commands are imported as needed: some pull in heavy dependencies
+    # (e.g. requests) which other commands have no use for.
     if subcommand == 'reset':
+        from .reset_command import ResetCommand
         return ResetCommand(parsed_args=parsed_args)
+    elif subcommand == 'status':
+        from .status_command import StatusCommand
+        return StatusCommand(parsed_args=parsed_args)
+    elif subcommand == 'power':
+        from .power_command import PowerCommand
+        return PowerCommand(parsed_args=parsed_args)
+    elif subcommand == 'serve':
+        from .serve_command import ServeCommand
+        return ServeCommand(parsed_args=parsed_args)
+    elif subcommand == 'client':
+        from .client_command import ClientCommand
+        return ClientCommand(parsed_args=parsed_args)
     elif subcommand == 'version':
+        from .version_command import VersionCommand
         return VersionCommand(parsed_args=parsed_args)
     else:
         # Note: In Python 2, argparse will raise a SystemException when no
         # command is given, so this bit is for Python 3.
+        from .no_command import NoCommand
         return NoCommand(parsed_args=parsed_args)
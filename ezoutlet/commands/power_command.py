@@ -0,0 +1,47 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from .. import constants
+from .. import exceptions
+from .. import fleet
+from .. import summary
+from . import targets
+from .icommand import ICommand
+
+
+class PowerCommand(ICommand):
+    """Switches outlets on, off, or off and on, and prints one JSON summary line per target."""
+
+    def __init__(self, parsed_args):
+        self._args = parsed_args
+        self._check_args()
+        self._targets = targets.read_hosts(self._args)
+
+    def _check_args(self):
+        if self._args.parallel < 1:
+            raise exceptions.EzOutletUsageError(constants.PARALLEL_NOT_POSITIVE_ERROR_MESSAGE)
+        if self._args.max_on is not None and self._args.max_on < 1:
+            raise exceptions.EzOutletUsageError(constants.MAX_ON_NOT_POSITIVE_ERROR_MESSAGE)
+        if self._args.stagger < 0:
+            raise exceptions.EzOutletUsageError(constants.STAGGER_NEGATIVE_ERROR_MESSAGE)
+        if self._args.off_time < 0:
+            raise exceptions.EzOutletUsageError(constants.OFF_TIME_NEGATIVE_ERROR_MESSAGE)
+        if self._args.action == 'off' and (self._args.max_on is not None or self._args.stagger != 0):
+            raise exceptions.EzOutletUsageError(constants.POWER_OFF_OPTIONS_ERROR_MESSAGE)
+
+    def run(self):
+        with fleet.EzOutletFleet(hostnames=self._targets, max_workers=self._args.parallel) as ez_fleet:
+            if self._args.action == 'on':
+                results = ez_fleet.turn_on(max_simultaneous_on=self._args.max_on, stagger=self._args.stagger)
+            elif self._args.action == 'off':
+                results = ez_fleet.turn_off()
+            else:
+                results = ez_fleet.cycle(off_duration=self._args.off_time, max_simultaneous_on=self._args.max_on,
+                                         stagger=self._args.stagger)
+
+        return summary.print_summaries(summary.summarize(target, results[target]) for target in self._targets)
@@ -6,9 +6,21 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import sys
+
 from .. import exceptions
 from .. import constants
+from .. import coordination
 from .. import ez_outlet
+from .. import fleet
+from .. import interval_history
+from .. import inventory
+from .. import process_fleet
+from .. import rate_limit
+from .. import readiness
+from .. import retry
+from .. import summary
+from . import targets
 from .icommand import ICommand
 
 
@@ -16,12 +28,226 @@ class ResetCommand(ICommand):
     def __init__(self, parsed_args):
         self._args = parsed_args
         self._check_args()
+        self._outlets = targets.read_outlets(self._args)
+        self._targets = [outlet.host for outlet in self._outlets]
+        self._readiness_probe = self._make_readiness_probe()
+        self._outlet_options = self._make_outlet_options()
 
     def _check_args(self):
-        if self._args.reset_time < 0:
+        if self._args.reset_time is not None and self._args.reset_time < 0:
             raise exceptions.EzOutletUsageError(constants.RESET_TIME_NEGATIVE_ERROR_MESSAGE)
+        if self._args.parallel < 1:
+            raise exceptions.EzOutletUsageError(constants.PARALLEL_NOT_POSITIVE_ERROR_MESSAGE)
+        if self._args.retries < 0:
+            raise exceptions.EzOutletUsageError(constants.RETRIES_NEGATIVE_ERROR_MESSAGE)
+        if self._args.processes is not None:
+            self._check_processes_args()
+        if self._args.retry_backoff < 0:
+            raise exceptions.EzOutletUsageError(constants.RETRY_BACKOFF_NEGATIVE_ERROR_MESSAGE)
+        for arg, value in ((constants.RATE_ARG_LONG, self._args.rate),
+                           (constants.SUBNET_RATE_ARG_LONG, self._args.subnet_rate)):
+            if value is not None and value <= 0:
+                raise exceptions.EzOutletUsageError(constants.RATE_NOT_POSITIVE_ERROR_MESSAGE.format(arg))
+        if self._args.burst < 1:
+            raise exceptions.EzOutletUsageError(constants.BURST_NOT_POSITIVE_ERROR_MESSAGE)
+        if self._args.stagger < 0:
+            raise exceptions.EzOutletUsageError(constants.STAGGER_NEGATIVE_ERROR_MESSAGE)
+        self._group_rates = [_parse_group_rate(group_rate) for group_rate in self._args.group_rate]
+        for arg, value in ((constants.CONNECT_TIMEOUT_ARG_LONG, self._args.connect_timeout),
+                           (constants.READ_TIMEOUT_ARG_LONG, self._args.read_timeout),
+                           (constants.DEADLINE_ARG_LONG, self._args.deadline)):
+            if value is not None and value <= 0:
+                raise exceptions.EzOutletUsageError(constants.TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE.format(arg))
+
+    def _check_processes_args(self):
+        """Options whose state cannot be shared with worker processes are not allowed with --processes."""
+        if self._args.processes < 0:
+            raise exceptions.EzOutletUsageError(constants.PROCESSES_NEGATIVE_ERROR_MESSAGE)
+        for arg, value in ((constants.LOCK_DIR_ARG_LONG, self._args.lock_dir),
+                           (constants.LEARN_INTERVALS_ARG_LONG, self._args.learn_intervals),
+                           (constants.INTERVAL_HISTORY_ARG_LONG, self._args.interval_history),
+                           (constants.READY_TCP_ARG_LONG, self._args.ready_tcp),
+                           (constants.READY_HTTP_ARG_LONG, self._args.ready_http),
+                           (constants.RATE_ARG_LONG, self._args.rate),
+                           (constants.STAGGER_ARG_LONG, self._args.stagger),
+                           (constants.SUBNET_RATE_ARG_LONG, self._args.subnet_rate),
+                           (constants.GROUP_RATE_ARG_LONG, self._args.group_rate)):
+            if value:
+                raise exceptions.EzOutletUsageError(constants.PROCESSES_NOT_ALLOWED_ERROR_MESSAGE.format(arg))
+
+    def _make_readiness_probe(self):
+        if self._args.ready_tcp is None and self._args.ready_http is None:
+            return None
+        if self._is_fleet():
+            raise exceptions.EzOutletUsageError(constants.READY_PROBE_SINGLE_TARGET_ERROR_MESSAGE)
+        if self._post_reset_delay(self._outlets[0]) <= 0:
+            raise exceptions.EzOutletUsageError(constants.READY_PROBE_NEEDS_RESET_TIME_ERROR_MESSAGE)
+        return _make_probe(ready_tcp=self._args.ready_tcp, ready_http=self._args.ready_http)
+
+    def _post_reset_delay(self, outlet):
+        """Returns: --reset-time if given, else the outlet's post_reset_delay from the inventory, else 0."""
+        if self._args.reset_time is not None:
+            return self._args.reset_time
+        return outlet.options.get('post_reset_delay', 0)
+
+    def _make_outlet_options(self):
+        """Returns: Keyword arguments shared by EzOutlet and EzOutletFleet."""
+        options = {}
+        if self._args.interval_history is not None:
+            options['interval_history'] = interval_history.IntervalHistory(path=self._args.interval_history)
+        elif self._args.learn_intervals:
+            options['interval_history'] = interval_history.IntervalHistory()
+        if self._args.lock_dir is not None:
+            options['coordinator'] = coordination.FileResetCoordinator(self._args.lock_dir)
+        if self._args.retries > 0:
+            options['retry_policy'] = retry.RetryPolicy(max_attempts=self._args.retries + 1,
+                                                        backoff=self._args.retry_backoff,
+                                                        budget=retry.RetryBudget(),
+                                                        on_retry=self._report_retry)
+        if self._args.connect_timeout is not None:
+            options['connect_timeout'] = self._args.connect_timeout
+        if self._args.read_timeout is not None:
+            options['read_timeout'] = self._args.read_timeout
+        rate_limiter = self._make_rate_limiter()
+        if rate_limiter is not None:
+            options['rate_limiter'] = rate_limiter
+        return options
+
+    def _make_rate_limiter(self):
+        """Returns: RateLimiter for the rate limiting options given, or None."""
+        if self._args.rate is None and not self._args.stagger and self._args.subnet_rate is None \
+                and not self._group_rates:
+            return None
+        limiter = rate_limit.RateLimiter(rate=self._args.rate, burst=self._args.burst, stagger=self._args.stagger,
+                                         subnet_rate=self._args.subnet_rate, subnet_burst=self._args.burst)
+        for group, rate in self._group_rates:
+            hosts = [outlet.host for outlet in targets.resolve([group], self._args.inventory)]
+            limiter.add_group(hosts, rate=rate, burst=self._args.burst)
+        return limiter
+
+    def _make_reset_options(self):
+        """Returns: Keyword arguments for EzOutlet.reset and EzOutletFleet.reset, besides per-outlet ones."""
+        options = {'post_reset_delay': self._args.reset_time or 0}
+        if self._args.deadline is not None:
+            options['deadline'] = self._args.deadline
+        return options
+
+    def _report_retry(self, hostname, attempt, delay, exception):
+        print(constants.RETRY_MESSAGE.format(constants.PROGRAM_NAME, hostname, attempt, self._args.retries + 1,
+                                             exception, delay),
+              file=sys.stderr)
+
+    def _is_fleet(self):
+        return (len(self._targets) > 1 or self._args.targets_file is not None or
+                any(target.startswith(inventory.GROUP_PREFIX) for target in self._args.target))
+
+    def _own_outlet_options(self, outlet):
+        """Returns: outlet's EzOutlet options from the inventory, except those given on the command line."""
+        return dict((key, value) for key, value in outlet.outlet_options().items()
+                    if key not in self._outlet_options)
+
+    def _own_reset_options(self, outlet):
+        """Returns: outlet's reset options from the inventory, except those given on the command line."""
+        options = outlet.reset_options()
+        if self._args.reset_time is not None:
+            options.pop('post_reset_delay', None)
+        return options
+
+    def _own_readiness_probe(self, outlet):
+        """Returns: The readiness probe from the command line, else from the inventory, else None."""
+        if self._readiness_probe is not None:
+            return self._readiness_probe
+        return _make_probe(ready_tcp=outlet.options.get('ready_tcp'), ready_http=outlet.options.get('ready_http'))
 
     def run(self):
-        ez = ez_outlet.EzOutlet(hostname=self._args.target)
-        ez.reset(post_reset_delay=self._args.reset_time)
+        if self._is_fleet():
+            return self._run_fleet()
+        outlet = self._outlets[0]
+        outlet_options = dict(self._own_outlet_options(outlet), **self._outlet_options)
+        reset_options = dict(self._make_reset_options(), **self._own_reset_options(outlet))
+        readiness_probe = self._own_readiness_probe(outlet)
+        if readiness_probe is not None:
+            reset_options['readiness_probe'] = readiness_probe
+        with ez_outlet.EzOutlet(hostname=outlet.host, **outlet_options) as ez:
+            ez.reset(**reset_options)
         return constants.EXIT_CODE_OK
+
+    def _run_fleet(self):
+        fleet_options = dict(self._outlet_options)
+        outlet_options = self._per_outlet(self._own_outlet_options)
+        if outlet_options:
+            fleet_options['outlet_options'] = outlet_options
+        reset_options = self._make_reset_options()
+        own_reset_options = self._per_outlet(self._own_reset_options)
+        if own_reset_options:
+            reset_options['reset_options'] = own_reset_options
+        readiness_probes = self._per_outlet(self._own_readiness_probe)
+        if readiness_probes:
+            reset_options['readiness_probes'] = readiness_probes
+        if self._args.processes is not None:
+            if 'readiness_probes' in reset_options:
+                raise exceptions.EzOutletUsageError(
+                    constants.PROCESSES_NOT_ALLOWED_ERROR_MESSAGE.format(constants.INVENTORY_READY_PROBES))
+            return self._reset_and_print(self._make_process_fleet(outlet_options), reset_options)
+        with fleet.EzOutletFleet(hostnames=self._targets, max_workers=self._args.parallel,
+                                 **fleet_options) as ez_fleet:
+            return self._reset_and_print(ez_fleet, reset_options)
+
+    def _reset_and_print(self, ez_fleet, reset_options):
+        """Reset ez_fleet and print a summary line per target: in target order, or as each finishes with --stream.
+
+        Returns: See summary.print_summaries.
+        """
+        if self._args.stream:
+            return summary.print_summaries((summary.summarize(target, result)
+                                            for target, result in ez_fleet.iter_reset(**reset_options)), flush=True)
+        results = ez_fleet.reset(**reset_options)
+        return summary.print_summaries(summary.summarize(target, results[target]) for target in self._targets)
+
+    def _make_process_fleet(self, outlet_options):
+        """Returns: ProcessFleet for the targets."""
+        return process_fleet.ProcessFleet(hostnames=self._targets,
+                                          processes=self._args.processes or None,
+                                          max_workers=self._args.parallel,
+                                          connect_timeout=self._args.connect_timeout,
+                                          read_timeout=self._args.read_timeout,
+                                          retries=self._args.retries,
+                                          retry_backoff=self._args.retry_backoff,
+                                          outlet_options=outlet_options or None)
+
+    def _per_outlet(self, options_for):
+        """Returns: dict mapping each host to options_for(outlet), leaving out empty results."""
+        per_outlet = {}
+        for outlet in self._outlets:
+            options = options_for(outlet)
+            if options:
+                per_outlet[outlet.host] = options
+        return per_outlet
+
+
+def _make_probe(ready_tcp=None, ready_http=None):
+    """Returns: A readiness probe for a --ready-tcp HOST:PORT or --ready-http URL, or None if neither is given.
+
+    Raises:
+        EzOutletUsageError: If ready_tcp is not HOST:PORT.
+    """
+    if ready_http is not None:
+        return readiness.HttpProbe(ready_http)
+    if ready_tcp is None:
+        return None
+    host, _, port = ready_tcp.rpartition(':')
+    if not host or not port.isdigit():
+        raise exceptions.EzOutletUsageError(constants.READY_TCP_FORMAT_ERROR_MESSAGE)
+    return readiness.TcpProbe(host.strip('[]'), int(port))
+
+
+def _parse_group_rate(group_rate):
+    """Returns: Tuple of the target and requests per second from a --group-rate value."""
+    group, _, rate = group_rate.rpartition('=')
+    try:
+        rate = float(rate)
+    except ValueError:
+        rate = None
+    if not group or rate is None or rate <= 0:
+        raise exceptions.EzOutletUsageError(constants.GROUP_RATE_FORMAT_ERROR_MESSAGE)
+    return group, rate
@@ -0,0 +1,70 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import signal
+import sys
+
+from .. import constants
+from .. import coordination
+from .. import daemon
+from .. import daemon_client
+from .. import dns_cache
+from .. import exceptions
+from .. import interval_history
+from .. import inventory
+from .icommand import ICommand
+
+
+class ServeCommand(ICommand):
+    def __init__(self, parsed_args):
+        self._args = parsed_args
+        self._check_args()
+
+    def _check_args(self):
+        # socket/port are checked when the daemon binds
+        if self._args.dns_ttl < 0:
+            raise exceptions.EzOutletUsageError(constants.DNS_TTL_NEGATIVE_ERROR_MESSAGE)
+
+    def _make_interval_history(self):
+        if self._args.interval_history is not None:
+            return interval_history.IntervalHistory(path=self._args.interval_history)
+        elif self._args.learn_intervals:
+            return interval_history.IntervalHistory()
+        return None
+
+    def run(self):
+        address = daemon_client.get_address(socket_path=self._args.socket, port=self._args.port)
+        options = {'interval_history': self._make_interval_history(),
+                   'resolver': dns_cache.CachingResolver(ttl=self._args.dns_ttl)}
+        if self._args.lock_dir is not None:
+            options['coordinator'] = coordination.FileResetCoordinator(self._args.lock_dir)
+        inventory_path = self._args.inventory or os.environ.get(constants.INVENTORY_ENV_VAR)
+        hosts = [] if not inventory_path else [o.host for o in inventory.load(inventory_path).all_outlets()]
+        with daemon.EzOutletDaemon(address=address, **options) as ez_daemon:
+            self._prefetch(ez_daemon, hosts)
+            print(ez_daemon.address)
+            sys.stdout.flush()
+            # Leave through the context manager, so the socket file is removed.
+            signal.signal(signal.SIGTERM, _exit_on_signal)
+            try:
+                ez_daemon.serve_forever()
+            except KeyboardInterrupt:
+                pass
+        return constants.EXIT_CODE_OK
+
+    @staticmethod
+    def _prefetch(ez_daemon, hosts):
+        for host, address in sorted(ez_daemon.prefetch(hosts).items()):
+            if isinstance(address, Exception):
+                print(constants.DNS_PREFETCH_FAILED_MESSAGE.format(constants.PROGRAM_NAME, host, address),
+                      file=sys.stderr)
+
+
+def _exit_on_signal(signum, frame):
+    raise KeyboardInterrupt()
@@ -0,0 +1,36 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from .. import constants
+from .. import exceptions
+from .. import fleet
+from .. import summary
+from . import targets
+from .icommand import ICommand
+
+
+class StatusCommand(ICommand):
+    """Queries outlets concurrently and prints one JSON line per target."""
+
+    def __init__(self, parsed_args):
+        self._args = parsed_args
+        self._check_args()
+        self._targets = targets.read_hosts(self._args)
+
+    def _check_args(self):
+        if self._args.parallel < 1:
+            raise exceptions.EzOutletUsageError(constants.PARALLEL_NOT_POSITIVE_ERROR_MESSAGE)
+        if self._args.timeout <= 0:
+            raise exceptions.EzOutletUsageError(
+                constants.TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE.format(constants.STATUS_TIMEOUT_ARG_LONG))
+
+    def run(self):
+        with fleet.EzOutletFleet(hostnames=self._targets, max_workers=self._args.parallel) as ez_fleet:
+            statuses = ez_fleet.status(timeout=self._args.timeout)
+
+        return summary.print_statuses(statuses[target].as_dict() for target in self._targets)
@@ -0,0 +1,91 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import sys
+
+from .. import constants
+from .. import exceptions
+from .. import inventory
+
+
+def read_targets(parsed_args):
+    """Targets from the command line and --targets-file, without duplicates.
+
+    Returns: List of targets, in the order given.
+
+    Raises:
+        EzOutletUsageError: If there are no targets.
+    """
+    targets = _unique(parsed_args.target + _read_targets_file(parsed_args.targets_file))
+    if not targets:
+        raise exceptions.EzOutletUsageError(constants.TARGET_MISSING_ERROR_MESSAGE)
+    return targets
+
+
+def read_outlets(parsed_args):
+    """Targets (see read_targets) resolved through the --inventory, if any.
+
+    Returns: List of inventory.OutletConfig, one per host.
+
+    Raises:
+        EzOutletUsageError: If there are no targets, or a group is given
+            without an inventory.
+        EzOutletError: If the inventory is invalid or a group is unknown.
+    """
+    return resolve(read_targets(parsed_args), parsed_args.inventory)
+
+
+def read_hosts(parsed_args):
+    """Returns: Hosts of read_outlets(parsed_args)."""
+    return [outlet.host for outlet in read_outlets(parsed_args)]
+
+
+def resolve(targets, inventory_path=None):
+    """Resolve targets through the inventory at inventory_path, or at
+    $EZOUTLET_INVENTORY if inventory_path is None.
+
+    Returns: List of inventory.OutletConfig, one per host.
+
+    Raises:
+        EzOutletUsageError: If a group is given without an inventory.
+        EzOutletError: If the inventory is invalid or a group is unknown.
+    """
+    path = inventory_path or os.environ.get(constants.INVENTORY_ENV_VAR)
+    if path:
+        return inventory.load(path).resolve(targets)
+    for target in targets:
+        if target.startswith(inventory.GROUP_PREFIX):
+            raise exceptions.EzOutletUsageError(constants.NO_INVENTORY_GROUP_ERROR_MESSAGE.format(
+                target, constants.INVENTORY_ARG_LONG, constants.INVENTORY_ENV_VAR))
+    return inventory.Inventory().resolve(targets)
+
+
+def _read_targets_file(targets_file):
+    if targets_file is None:
+        return []
+    elif targets_file == constants.STDIN_FILENAME:
+        return _parse_targets(sys.stdin)
+    else:
+        with io.open(targets_file, encoding='utf-8') as f:
+            return _parse_targets(f)
+
+
+def _parse_targets(lines):
+    targets = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            targets.append(line)
+    return targets
+
+
+def _unique(targets):
+    seen = set()
+    return [t for t in targets if not (t in seen or seen.add(t))]
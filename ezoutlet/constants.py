@@ -16,6 +16,43 @@ VERSION_FORMAT_STRING = package_name + ' {0}'
 VERSION_STRING = VERSION_FORMAT_STRING.format(__version__)
 
 DEFAULT_EZ_OUTLET_RESET_INTERVAL = 3.05
+DEFAULT_FLEET_MAX_WORKERS = 32
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_PROBE_TIMEOUT = 1
+DEFAULT_PROBE_INTERVAL = 0.25
+DEFAULT_PROBE_MAX_INTERVAL = 5
+DEFAULT_PROBE_BACKOFF = 2
+DEFAULT_INTERVAL_HISTORY_PATH = os.path.join('~', '.ezoutlet', 'reset_intervals.json')
+DEFAULT_TIMEOUT = 10
+DEFAULT_STATUS_TIMEOUT = 2
+DEFAULT_STATUS_MAX_WORKERS = 64
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_RETRY_MAX_BACKOFF = 10
+DEFAULT_RETRY_MULTIPLIER = 2
+DEFAULT_RETRY_JITTER = 0.5
+DEFAULT_RETRY_BUDGET = 20
+DEFAULT_RETRY_BUDGET_RATE = 2
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 3
+DEFAULT_CIRCUIT_COOL_DOWN = 30
+DEFAULT_DNS_TTL = 300
+DEFAULT_DNS_PREFETCH_WORKERS = 32
+DEFAULT_SUBNET_PREFIX = 24
+DEFAULT_INVENTORY_CACHE_DIR = os.path.join('~', '.ezoutlet', 'cache')
+INVENTORY_ENV_VAR = 'EZOUTLET_INVENTORY'
+DEFAULT_DAEMON_SOCKET_PATH = os.path.join('~', '.ezoutlet', 'daemon.sock')
+# Any local user can connect to a TCP port, so a daemon on one only accepts requests carrying the token it
+# writes here, readable only by its owner. {0} is the port.
+DAEMON_TOKEN_PATH = os.path.join('~', '.ezoutlet', 'daemon-{0}.token')
+DEFAULT_DAEMON_POOL_CONNECTIONS = 256
+DEFAULT_DAEMON_POOL_MAXSIZE = 4
+DEFAULT_SHARED_POOL_CONNECTIONS = 256
+DEFAULT_SHARED_POOL_MAXSIZE = 4
+DEFAULT_MIN_HOSTS_PER_PROCESS = 256
+DEFAULT_FD_RESERVE = 64
+# Assumed when the platform does not report a file descriptor limit.
+DEFAULT_FD_LIMIT = 1024
+DAEMON_HOST = '127.0.0.1'
 EXIT_CODE_OK = 0
 EXIT_CODE_ERR = 1
 EXIT_CODE_PARSER_ERR = 2
@@ -23,6 +60,38 @@ EXIT_CODE_PARSER_ERR = 2
 # Arguments and commands
 RESET_TIME_ARG_SHORT = '-t'
 RESET_TIME_ARG_LONG = '--reset-time'
+TARGETS_FILE_ARG_LONG = '--targets-file'
+TARGETS_FILE_ARG_SHORT = '-f'
+PARALLEL_ARG_LONG = '--parallel'
+PARALLEL_ARG_SHORT = '-p'
+STDIN_FILENAME = '-'
+STREAM_ARG_LONG = '--stream'
+READY_TCP_ARG_LONG = '--ready-tcp'
+READY_HTTP_ARG_LONG = '--ready-http'
+LEARN_INTERVALS_ARG_LONG = '--learn-intervals'
+INTERVAL_HISTORY_ARG_LONG = '--interval-history'
+LOCK_DIR_ARG_LONG = '--lock-dir'
+RETRIES_ARG_LONG = '--retries'
+CONNECT_TIMEOUT_ARG_LONG = '--connect-timeout'
+READ_TIMEOUT_ARG_LONG = '--read-timeout'
+DEADLINE_ARG_LONG = '--deadline'
+RETRY_BACKOFF_ARG_LONG = '--retry-backoff'
+SOCKET_ARG_LONG = '--socket'
+SOCKET_ARG_SHORT = '-s'
+PORT_ARG_LONG = '--port'
+STATUS_TIMEOUT_ARG_LONG = '--timeout'
+INVENTORY_ARG_LONG = '--inventory'
+DNS_TTL_ARG_LONG = '--dns-ttl'
+PROCESSES_ARG_LONG = '--processes'
+MAX_ON_ARG_LONG = '--max-on'
+STAGGER_ARG_LONG = '--stagger'
+RATE_ARG_LONG = '--rate'
+BURST_ARG_LONG = '--burst'
+SUBNET_RATE_ARG_LONG = '--subnet-rate'
+GROUP_RATE_ARG_LONG = '--group-rate'
+OFF_TIME_ARG_LONG = '--off-time'
+POWER_ACTIONS = ('on', 'off', 'cycle')
+CLIENT_ACTIONS = ('reset', 'status', 'ping', 'circuits', 'metrics')
 
 # Help strings
 HELP_TEXT = (
@@ -30,13 +99,124 @@ HELP_TEXT = (
 )
 HELP_TEXT_RESET = "Send reset command; wait for on/off cycle."
 HELP_TEXT_VERSION = "Print version"
-HELP_TEXT_TARGET_ARG = 'IP address/hostname of ezOutlet device.'
+HELP_TEXT_POWER = "Switch ezOutlets on or off, or off and on again, in staggered batches."
+HELP_TEXT_POWER_ACTION_ARG = 'Switch the targets on, off, or off for {0} seconds and then on.'.format(
+    OFF_TIME_ARG_LONG)
+HELP_TEXT_POWER_TARGET_ARG = 'IP address/hostname of ezOutlet device.'
+HELP_TEXT_MAX_ON_ARG = 'Switch at most N outlets on at once, bounding inrush current (default: all).'
+HELP_TEXT_STAGGER_ARG = 'Seconds to wait after each batch of {0} outlets is switched on, before the next' \
+                        ' (default 0).'.format(MAX_ON_ARG_LONG)
+HELP_TEXT_OFF_TIME_ARG = 'For cycle, seconds to keep the outlets off (default {0}).'.format(
+    DEFAULT_EZ_OUTLET_RESET_INTERVAL)
+HELP_TEXT_STATUS = "Report whether ezOutlets are reachable, and their relay state, without resetting them."
+HELP_TEXT_STATUS_TARGET_ARG = 'IP address/hostname of ezOutlet device. Give several to query them concurrently.'
+HELP_TEXT_STATUS_TIMEOUT_ARG = 'Seconds to wait for each ezOutlet to answer (default {0}).'.format(
+    DEFAULT_STATUS_TIMEOUT)
+HELP_TEXT_STATUS_PARALLEL_ARG = 'Maximum number of outlets to query at once (default {0}).'.format(
+    DEFAULT_STATUS_MAX_WORKERS)
+HELP_TEXT_CLIENT_STATUS_TIMEOUT_ARG = 'For status, seconds to wait for each ezOutlet to answer (default {0}).'.format(
+    DEFAULT_STATUS_TIMEOUT)
+HELP_TEXT_SERVE = "Run a daemon that keeps connections to ezOutlets open and resets them on request from `client`."
+HELP_TEXT_CLIENT = "Forward a request to a daemon started with `serve`."
+HELP_TEXT_CLIENT_ACTION_ARG = 'Request to send: reset targets, query their status as the status command' \
+                              ' does, check the daemon is running, list the circuit breaker state of each' \
+                              ' outlet the daemon has used, or print reset counts and timings per outlet in' \
+                              ' the Prometheus text format.'
+HELP_TEXT_SOCKET_ARG = 'Unix domain socket of the daemon (default {0}).'.format(DEFAULT_DAEMON_SOCKET_PATH)
+HELP_TEXT_PORT_ARG = 'Use TCP port PORT on {0} instead of a Unix domain socket. Requests must carry the token' \
+                     ' the daemon writes to {1}, which only its owner can read.'.format(DAEMON_HOST, DAEMON_TOKEN_PATH)
+HELP_TEXT_TARGET_ARG = 'IP address/hostname of ezOutlet device. Give several to reset them concurrently.'
+HELP_TEXT_TARGETS_FILE_ARG = 'File listing targets, one per line; "{0}" reads from stdin.' \
+                             ' Blank lines and lines starting with # are ignored.'.format(STDIN_FILENAME)
+HELP_TEXT_INVENTORY_ARG = 'JSON inventory of named outlets and groups (default ${0}). Targets may then be' \
+                          ' outlet names, or @GROUP for every outlet in a group; outlets use their own' \
+                          ' timeouts, reset intervals and readiness probes unless overridden by options.'.format(
+                              INVENTORY_ENV_VAR)
+HELP_TEXT_SERVE_INVENTORY_ARG = 'JSON inventory (default ${0}) whose hosts are looked up at startup, so that' \
+                                ' the first resets do not wait for DNS.'.format(INVENTORY_ENV_VAR)
+HELP_TEXT_DNS_TTL_ARG = 'Seconds to reuse each looked up address (default {0}). If a later lookup fails, the' \
+                        ' last address is used.'.format(DEFAULT_DNS_TTL)
+HELP_TEXT_READY_TCP_ARG = 'After the ezOutlet turns back on, poll until a TCP connection to HOST:PORT succeeds,' \
+                          ' waiting at most {0} seconds.'.format(RESET_TIME_ARG_LONG)
+HELP_TEXT_READY_HTTP_ARG = 'After the ezOutlet turns back on, poll until an HTTP GET to URL gets a response,' \
+                           ' waiting at most {0} seconds.'.format(RESET_TIME_ARG_LONG)
+HELP_TEXT_LEARN_INTERVALS_ARG = 'Learn how long each outlet takes to come back (from readiness probes) and, when' \
+                                ' not probing, wait that long instead of the fixed delay.' \
+                                ' History is kept in {0}.'.format(DEFAULT_INTERVAL_HISTORY_PATH)
+HELP_TEXT_INTERVAL_HISTORY_ARG = 'Like {0}, but keep history in the given file.'.format(LEARN_INTERVALS_ARG_LONG)
+HELP_TEXT_LOCK_DIR_ARG = 'Coordinate with other ezoutlet processes through lock files in DIR: resetting an outlet' \
+                         ' which another process is already resetting joins that reset instead of cycling' \
+                         ' the outlet again.'
+HELP_TEXT_RETRIES_ARG = 'Retry requests failing with a timeout or connection error up to N times (default 0).' \
+                        ' Retries are limited to a burst of {0}, then {1} per second, in total.'.format(
+                            DEFAULT_RETRY_BUDGET, DEFAULT_RETRY_BUDGET_RATE)
+HELP_TEXT_RETRY_BACKOFF_ARG = 'Seconds to wait before the first retry, doubling for each further retry, with' \
+                              ' random jitter (default {0}).'.format(DEFAULT_RETRY_BACKOFF)
+HELP_TEXT_CONNECT_TIMEOUT_ARG = 'Seconds to wait to connect to each ezOutlet (default {0}). A short timeout' \
+                                ' detects a dead outlet quickly.'.format(DEFAULT_TIMEOUT)
+HELP_TEXT_READ_TIMEOUT_ARG = 'Seconds to wait for each ezOutlet to respond once connected' \
+                             ' (default {0}).'.format(DEFAULT_TIMEOUT)
+HELP_TEXT_DEADLINE_ARG = 'Fail if the whole reset, including retries and waiting, cannot complete' \
+                         ' within SECONDS.'
+HELP_TEXT_PARALLEL_ARG = 'Maximum number of outlets to reset at once (default {0}).'.format(
+    DEFAULT_FLEET_MAX_WORKERS)
+HELP_TEXT_PROCESSES_ARG = 'Reset from N worker processes, each resetting its share of the targets with up to' \
+                          ' {0} requests at once; 0 picks N from the CPU count. For thousands of outlets.' \
+                          ' Retries are not reported.'.format(PARALLEL_ARG_LONG)
+HELP_TEXT_STREAM_ARG = 'Print each outlet\'s summary line as soon as it is back (or has failed), in the order they' \
+                       ' finish, instead of all of them at the end in target order.'
+HELP_TEXT_RATE_ARG = 'Send at most this many requests per second, to all outlets together (default: no limit).'
+HELP_TEXT_BURST_ARG = 'Requests allowed at once by {0}, {1} and {2} limits after a quiet spell (default 1).'.format(
+    RATE_ARG_LONG, SUBNET_RATE_ARG_LONG, GROUP_RATE_ARG_LONG)
+HELP_TEXT_RESET_STAGGER_ARG = 'Seconds to wait between sending one request and the next (default 0).'
+HELP_TEXT_SUBNET_RATE_ARG = 'Send at most this many requests per second to each /{0} subnet.'.format(
+    DEFAULT_SUBNET_PREFIX)
+HELP_TEXT_GROUP_RATE_ARG = 'Send at most RPS requests per second to the outlets of @GROUP (an inventory group,' \
+                           ' outlet or host). May be given more than once.'
 HELP_TEXT_RESET_TIME_ARG = 'Extra time in seconds to wait, e.g. for device reboot.' \
                            ' Note that the script already waits {0} seconds for the' \
                            ' ezOutlet to turn off and on.'.format(DEFAULT_EZ_OUTLET_RESET_INTERVAL)
 
+# Output
+FLEET_RESULT_OK = 'ok'
+FLEET_RESULT_ERROR = 'error'
+
+DNS_PREFETCH_FAILED_MESSAGE = "{0}: could not resolve {1} ({2})."
+RETRY_MESSAGE = "{0}: {1}: attempt {2} of {3} failed ({4}); retrying in {5:.2f} seconds."
+
 # Errors
 ERROR_STRING = "{0}: error: {1}"
 UNHANDLED_ERROR_MESSAGE = "Unhandled exception! Please file bug report.\n\n{0}"
 RESET_TIME_NEGATIVE_ERROR_MESSAGE = "argument{0}/{1}: value must be non-negative.".format(RESET_TIME_ARG_LONG,
                                                                                           RESET_TIME_ARG_SHORT)
+TARGET_MISSING_ERROR_MESSAGE = "the following arguments are required: target"
+PARALLEL_NOT_POSITIVE_ERROR_MESSAGE = "argument{0}/{1}: value must be positive.".format(PARALLEL_ARG_LONG,
+                                                                                        PARALLEL_ARG_SHORT)
+READY_PROBE_NEEDS_RESET_TIME_ERROR_MESSAGE = ("argument {0}/{1}: {2} is the maximum time to wait for"
+                                              " readiness, so must be positive.").format(
+    READY_TCP_ARG_LONG, READY_HTTP_ARG_LONG, RESET_TIME_ARG_LONG)
+READY_PROBE_SINGLE_TARGET_ERROR_MESSAGE = "argument {0}/{1}: only allowed with a single target.".format(
+    READY_TCP_ARG_LONG, READY_HTTP_ARG_LONG)
+DAEMON_CONNECT_ERROR_MESSAGE = "Cannot reach ezoutlet daemon at {0}: {1}"
+DAEMON_ERROR_MESSAGE = "ezoutlet daemon: {0}"
+DAEMON_UNKNOWN_COMMAND_MESSAGE = "unknown command: {0!r}"
+DAEMON_ALREADY_RUNNING_MESSAGE = "ezoutlet daemon already running at {0}"
+DAEMON_TOKEN_ERROR_MESSAGE = "Cannot read ezoutlet daemon token {0}: {1}"
+DAEMON_TOKEN_REJECTED_MESSAGE = "missing or wrong token"
+UNIX_SOCKET_UNSUPPORTED_ERROR_MESSAGE = "Unix domain sockets are not supported here; use {0}.".format(PORT_ARG_LONG)
+RETRIES_NEGATIVE_ERROR_MESSAGE = "argument {0}: value must be non-negative.".format(RETRIES_ARG_LONG)
+RETRY_BACKOFF_NEGATIVE_ERROR_MESSAGE = "argument {0}: value must be non-negative.".format(RETRY_BACKOFF_ARG_LONG)
+TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE = "argument {0}: value must be positive."
+MAX_ON_NOT_POSITIVE_ERROR_MESSAGE = "argument {0}: value must be positive.".format(MAX_ON_ARG_LONG)
+STAGGER_NEGATIVE_ERROR_MESSAGE = "argument {0}: value must be non-negative.".format(STAGGER_ARG_LONG)
+RATE_NOT_POSITIVE_ERROR_MESSAGE = "argument {0}: value must be positive."
+BURST_NOT_POSITIVE_ERROR_MESSAGE = "argument {0}: value must be positive.".format(BURST_ARG_LONG)
+GROUP_RATE_FORMAT_ERROR_MESSAGE = "argument {0}: expected @GROUP=RPS with RPS positive.".format(GROUP_RATE_ARG_LONG)
+OFF_TIME_NEGATIVE_ERROR_MESSAGE = "argument {0}: value must be non-negative.".format(OFF_TIME_ARG_LONG)
+POWER_OFF_OPTIONS_ERROR_MESSAGE = "argument {0}/{1}: not allowed with off.".format(MAX_ON_ARG_LONG, STAGGER_ARG_LONG)
+PROCESSES_NEGATIVE_ERROR_MESSAGE = "argument {0}: value must be non-negative.".format(PROCESSES_ARG_LONG)
+INVENTORY_READY_PROBES = 'readiness probes from the inventory'
+PROCESSES_NOT_ALLOWED_ERROR_MESSAGE = "argument {0}: not allowed with {{0}}.".format(PROCESSES_ARG_LONG)
+DNS_TTL_NEGATIVE_ERROR_MESSAGE = "argument {0}: value must be non-negative.".format(DNS_TTL_ARG_LONG)
+NO_INVENTORY_GROUP_ERROR_MESSAGE = "target {0}: groups need an inventory; use {1} or set ${2}."
+READY_TCP_FORMAT_ERROR_MESSAGE = "argument {0}: expected HOST:PORT.".format(READY_TCP_ARG_LONG)
@@ -0,0 +1,191 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Coalescing of concurrent resets of the same ezOutlet.
+
+An ezOutlet ignores a reset while its relay is cycling, so two callers
+resetting one outlet at nearly the same time gain nothing from sending two
+requests. With a coordinator, the first caller sends the reset and later
+callers join its cycle: they share its response, and wait for the cycle
+(or for their own, longer, delay) to finish.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import threading
+import time
+
+try:
+    # Python 2
+    from urllib import quote
+except ImportError:
+    # Python 3
+    # noinspection PyUnresolvedReferences,PyCompatibility
+    from urllib.parse import quote
+
+from . import file_util
+from . import reset_handle
+
+
+class ResetCoordinator(object):
+    """Coalesces concurrent resets of the same hostname within one process.
+
+    Share one coordinator between every EzOutlet (or EzOutletFleet) which may
+    reset the same outlets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cycles = {}
+
+    def begin_reset(self, hostname, delay, send_reset):
+        """Start a reset of hostname, or join one in progress.
+
+        A reset is in progress from when its request is sent until its
+        ResetHandle completes. A caller joining it gets a handle sharing its
+        response, completing at the later of the two callers' deadlines. If
+        the reset request fails, every caller waiting on it gets the
+        exception, and the next caller sends a new request.
+
+        Args:
+            hostname: Hostname or IP address of the ezOutlet.
+            delay: Time in seconds from the reset being acknowledged until it
+                is complete, for this caller.
+            send_reset: Callable sending the reset request and returning the
+                response contents.
+
+        Returns: ResetHandle. Its `coalesced` property is True if this call
+            joined another caller's reset.
+        """
+        with self._lock:
+            cycle = self._cycles.get(hostname)
+            is_leader = cycle is None or cycle.is_over()
+            if is_leader:
+                cycle = self._cycles[hostname] = _Cycle()
+
+        if not is_leader:
+            return cycle.join(hostname, delay, coalesced=True)
+
+        try:
+            response, acknowledged_at, deadline, coalesced = self._start_cycle(hostname, delay, send_reset)
+        except Exception as e:
+            with self._lock:
+                if self._cycles.get(hostname) is cycle:
+                    del self._cycles[hostname]
+            cycle.fail(e)
+            raise
+        cycle.start(response, acknowledged_at, deadline)
+        return cycle.join(hostname, delay, coalesced=coalesced)
+
+    def _start_cycle(self, hostname, delay, send_reset):
+        """Send the reset request.
+
+        Returns: Tuple of response contents, time acknowledged, deadline (both
+            as from time.time()), and whether another process's reset was
+            joined instead.
+        """
+        response = send_reset()
+        acknowledged_at = time.time()
+        return response, acknowledged_at, acknowledged_at + delay, False
+
+
+class FileResetCoordinator(ResetCoordinator):
+    """Coalesces resets across processes, using one lock file per hostname.
+
+    Each file records the last reset's response and deadline. It is locked
+    while a reset request is being sent, so processes starting a reset at
+    the same time see each other's cycle.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Directory to keep lock files in. Created if missing.
+                Every cooperating process must use the same directory.
+        """
+        super(FileResetCoordinator, self).__init__()
+        self._directory = os.path.expanduser(directory)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _start_cycle(self, hostname, delay, send_reset):
+        file_util.makedirs(self._directory)
+        path = os.path.join(self._directory, quote(hostname, safe='') + '.json')
+        with io.open(path, 'a+b') as f:
+            file_util.lock_file(f)
+            try:
+                f.seek(0)
+                state = _parse_state(f.read())
+                if state is not None and state['deadline'] > time.time():
+                    return state['response'], state['acknowledged_at'], state['deadline'], True
+
+                response, acknowledged_at, deadline, _ = super(FileResetCoordinator, self)._start_cycle(
+                    hostname, delay, send_reset)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({'response': response,
+                                    'acknowledged_at': acknowledged_at,
+                                    'deadline': deadline}).encode('utf-8'))
+                f.flush()
+                return response, acknowledged_at, deadline, False
+            finally:
+                file_util.unlock_file(f)
+
+
+class _Cycle(object):
+    """One reset of one outlet, shared by every caller joining it."""
+
+    def __init__(self):
+        self._settled = threading.Event()
+        self._response = None
+        self._acknowledged_at = None
+        self._deadline = None
+        self._exception = None
+
+    def start(self, response, acknowledged_at, deadline):
+        self._response = response
+        self._acknowledged_at = acknowledged_at
+        self._deadline = deadline
+        self._settled.set()
+
+    def fail(self, exception):
+        self._exception = exception
+        self._settled.set()
+
+    def is_over(self):
+        """Returns: True if the reset failed or is complete; False if it is in progress."""
+        if not self._settled.is_set():
+            return False
+        return self._exception is not None or time.time() >= self._deadline
+
+    def join(self, hostname, delay, coalesced):
+        """Wait for the reset request to be answered.
+
+        Returns: ResetHandle completing at the later of the cycle's deadline
+            and delay seconds after acknowledgement.
+
+        Raises:
+            Exception: The exception raised sending the reset request.
+        """
+        self._settled.wait()
+        if self._exception is not None:
+            raise self._exception
+        deadline = max(self._deadline, self._acknowledged_at + delay)
+        return reset_handle.ResetHandle(hostname=hostname,
+                                        response=self._response,
+                                        delay=deadline - time.time(),
+                                        coalesced=coalesced)
+
+
+def _parse_state(data):
+    try:
+        return json.loads(data.decode('utf-8'))
+    except ValueError:
+        return None
@@ -0,0 +1,288 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Long-running ezoutlet daemon, controlled over a local socket.
+
+The daemon keeps one HTTP connection pool, and any learned per-outlet state,
+for its whole lifetime, so each request skips interpreter startup, imports
+and connection setup. Use ezoutlet.daemon_client (or `ezoutlet client`) to
+talk to it.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import binascii
+import hmac
+import io
+import os
+import socket
+
+try:
+    # Python 2
+    import SocketServer as socketserver
+except ImportError:
+    # Python 3
+    # noinspection PyUnresolvedReferences
+    import socketserver
+
+from . import __version__
+from . import circuit_breaker
+from . import constants
+from . import coordination
+from . import dns_cache
+from . import daemon_client
+from . import exceptions
+from . import ez_outlet
+from . import file_util
+from . import fleet
+from . import instrumentation
+from . import summary
+
+
+class EzOutletDaemon(object):
+    """Serves requests from DaemonClient on a Unix domain socket or local TCP port.
+
+    Requests are handled concurrently, one thread per connection; resets of
+    different targets do not wait for one another, and concurrent resets of
+    the same target are coalesced.
+
+    A Unix domain socket is only accessible to its owner. Any local user can
+    connect to a TCP port, so on one the daemon writes a random token to a
+    file only its owner can read (see daemon_client.get_token_path), and
+    rejects requests without it.
+    """
+
+    def __init__(self, address, timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT, session=None, interval_history=None,
+                 coordinator=None, circuit_breakers=None, metrics=None, observers=(), resolver=None):
+        """
+        Args:
+            address: Unix domain socket path, or (host, port) tuple. Port 0
+                picks a free port; see `address` for the one chosen. A stale
+                socket file left by a dead daemon is replaced.
+            timeout: Time in seconds to wait for each EzOutlet to respond.
+            session: requests.Session to share between all requests. By
+                default the daemon creates (and closes) one.
+            interval_history: IntervalHistory to learn per-host reset times
+                in. See EzOutlet.
+            coordinator: ResetCoordinator for all requests. By default the
+                daemon uses its own, so that clients resetting the same
+                outlet at once share one power cycle.
+            circuit_breakers: CircuitBreakerRegistry for all requests. By
+                default the daemon uses its own, so outlets which stop
+                responding fail fast; see the 'circuits' command.
+            metrics: ResetMetrics recording every reset, served by the
+                'metrics' command. By default the daemon uses its own.
+            observers: Further callables given a ResetTiming for every
+                outlet reset. See instrumentation module.
+            resolver: CachingResolver for all requests. By default the
+                daemon uses its own, so hostnames are looked up once per
+                DNS TTL rather than per connection. See prefetch().
+        """
+        self._timeout = timeout
+        self._interval_history = interval_history
+        self._coordinator = coordination.ResetCoordinator() if coordinator is None else coordinator
+        self._circuit_breakers = (circuit_breaker.CircuitBreakerRegistry() if circuit_breakers is None
+                                  else circuit_breakers)
+        self._metrics = instrumentation.ResetMetrics() if metrics is None else metrics
+        self._observers = [self._metrics] + list(observers)
+        self._resolver = dns_cache.CachingResolver() if resolver is None else resolver
+        self._owns_session = session is None
+        if session is None:
+            session = ez_outlet.make_session(pool_connections=constants.DEFAULT_DAEMON_POOL_CONNECTIONS,
+                                             pool_maxsize=constants.DEFAULT_DAEMON_POOL_MAXSIZE)
+        self._session = session
+        self._server = _make_server(address)
+        self._server.ez_daemon = self
+        self._token = None
+        self._token_path = daemon_client.get_token_path(self.address)
+        if self._token_path is not None:
+            try:
+                self._token = _write_token(self._token_path)
+            except Exception:
+                self._server.server_close()
+                raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def address(self):
+        """Address clients should connect to."""
+        address = self._server.server_address
+        return tuple(address[:2]) if isinstance(address, tuple) else address
+
+    def serve_forever(self, poll_interval=0.5):
+        """Handle requests until shutdown() is called.
+
+        Args:
+            poll_interval: Time in seconds between checks for shutdown().
+
+        Returns: None
+        """
+        self._server.serve_forever(poll_interval=poll_interval)
+
+    def shutdown(self):
+        """Stop serve_forever(). Must be called from another thread.
+
+        Returns: None
+        """
+        self._server.shutdown()
+
+    def close(self):
+        """Stop listening, remove the socket file, and close the HTTP session.
+
+        Returns: None
+        """
+        address = self.address
+        self._server.server_close()
+        if not isinstance(address, tuple):
+            _remove_if_exists(address)
+        if self._token_path is not None:
+            _remove_if_exists(self._token_path)
+        if self._owns_session:
+            self._session.close()
+
+    def prefetch(self, hostnames):
+        """Look hostnames up ahead of their first reset.
+
+        Returns: dict mapping each hostname to its address, or to the
+            exception raised resolving it.
+        """
+        return self._resolver.prefetch(hostnames)
+
+    def handle_request(self, request):
+        """Handle one decoded request.
+
+        Returns: Response dict. Failures are reported in its 'error' key,
+            not raised.
+        """
+        try:
+            if self._token is not None and not _token_matches(request.get('token'), self._token):
+                return {'error': constants.DAEMON_TOKEN_REJECTED_MESSAGE}
+            command = request.get('command')
+            if command == 'ping':
+                return {'version': __version__}
+            elif command == 'reset':
+                return {'results': self._reset(**_params(request))}
+            elif command == 'status':
+                return {'results': self._status(**_params(request))}
+            elif command == 'circuits':
+                return {'circuits': self._circuit_breakers.states()}
+            elif command == 'metrics':
+                return {'metrics': self._metrics.render()}
+            else:
+                return {'error': constants.DAEMON_UNKNOWN_COMMAND_MESSAGE.format(command)}
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _reset(self, targets,
+               post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+               ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+               max_workers=fleet.EzOutletFleet.DEFAULT_MAX_WORKERS):
+        ez_fleet = fleet.EzOutletFleet(hostnames=targets,
+                                       timeout=self._timeout,
+                                       max_workers=max_workers,
+                                       session=self._session,
+                                       interval_history=self._interval_history,
+                                       coordinator=self._coordinator,
+                                       circuit_breakers=self._circuit_breakers,
+                                       observers=self._observers,
+                                       resolver=self._resolver)
+        results = ez_fleet.reset(post_reset_delay=post_reset_delay,
+                                 ez_outlet_reset_interval=ez_outlet_reset_interval)
+        return [summary.summarize(target, results[target]) for target in ez_fleet.hostnames]
+
+    def _status(self, targets, timeout=constants.DEFAULT_STATUS_TIMEOUT,
+                max_workers=constants.DEFAULT_STATUS_MAX_WORKERS):
+        ez_fleet = fleet.EzOutletFleet(hostnames=targets,
+                                       max_workers=max_workers,
+                                       session=self._session,
+                                       circuit_breakers=self._circuit_breakers,
+                                       resolver=self._resolver)
+        statuses = ez_fleet.status(timeout=timeout)
+        return [statuses[target].as_dict() for target in ez_fleet.hostnames]
+
+
+def _params(request):
+    return dict((str(k), v) for k, v in request.items() if k not in ('command', 'token'))
+
+
+def _token_matches(token, expected):
+    return isinstance(token, type('')) and hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+
+def _write_token(path):
+    """Write a new random token to path, readable only by this user. Returns: The token."""
+    token = binascii.hexlify(os.urandom(16)).decode('ascii')
+    file_util.makedirs(os.path.dirname(path))
+    # Created afresh, since an existing file's permissions would be kept.
+    _remove_if_exists(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with io.open(fd, 'wb') as f:
+        f.write(token.encode('ascii'))
+    return token
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in iter(self.rfile.readline, b''):
+            try:
+                request = daemon_client.decode_message(line)
+            except ValueError as e:
+                response = {'error': str(e)}
+            else:
+                response = self.server.ez_daemon.handle_request(request)
+            self.wfile.write(daemon_client.encode_message(response))
+            self.wfile.flush()
+
+
+class _TcpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+def _make_server(address):
+    if isinstance(address, tuple):
+        return _TcpServer(address, _RequestHandler)
+    if _UnixServer is None:
+        raise exceptions.EzOutletError(constants.UNIX_SOCKET_UNSUPPORTED_ERROR_MESSAGE)
+    _remove_stale_socket(address)
+    directory = os.path.dirname(address)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    # Anyone who can connect can power-cycle outlets; keep the socket private.
+    old_umask = os.umask(0o077)
+    try:
+        return _UnixServer(address, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+
+
+def _remove_stale_socket(path):
+    if not os.path.exists(path):
+        return
+    try:
+        daemon_client.connect(path, timeout=1).close()
+    except (socket.error, socket.timeout):
+        os.remove(path)
+    else:
+        raise exceptions.EzOutletError(constants.DAEMON_ALREADY_RUNNING_MESSAGE.format(path))
+
+
+def _remove_if_exists(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
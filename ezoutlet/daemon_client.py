@@ -0,0 +1,185 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Client for the ezoutlet daemon (see ezoutlet.daemon).
+
+The daemon speaks a line-based protocol: each request and each response is
+one JSON object followed by a newline. This module uses only the standard
+library, so that forwarding a request costs little more than interpreter
+startup.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import socket
+
+from . import constants
+from . import exceptions
+
+
+def get_address(socket_path=None, port=None):
+    """Daemon address from command-line style options.
+
+    Args:
+        socket_path: Path of a Unix domain socket. Defaults to
+            DEFAULT_DAEMON_SOCKET_PATH.
+        port: TCP port on DAEMON_HOST. Takes precedence over socket_path.
+
+    Returns: (host, port) tuple, or Unix domain socket path.
+    """
+    if port is not None:
+        return constants.DAEMON_HOST, port
+    return os.path.expanduser(socket_path or constants.DEFAULT_DAEMON_SOCKET_PATH)
+
+
+def get_token_path(address):
+    """Returns: Path of the token file for a daemon on TCP address, or None for a Unix domain socket."""
+    if not isinstance(address, tuple):
+        return None
+    return os.path.expanduser(constants.DAEMON_TOKEN_PATH.format(address[1]))
+
+
+def read_token(address):
+    """Token to send to the daemon at address, as returned by get_address().
+
+    Returns: The token, or None for a Unix domain socket, whose file
+        permissions already restrict who may connect.
+
+    Raises:
+        EzOutletError: If the token file cannot be read.
+    """
+    path = get_token_path(address)
+    if path is None:
+        return None
+    try:
+        with io.open(path, encoding='ascii') as f:
+            return f.read().strip()
+    except (IOError, OSError) as e:
+        raise exceptions.EzOutletError(constants.DAEMON_TOKEN_ERROR_MESSAGE.format(path, e.strerror))
+
+
+def encode_message(message):
+    return (json.dumps(message, sort_keys=True) + '\n').encode('utf-8')
+
+
+def decode_message(line):
+    return json.loads(line.decode('utf-8'))
+
+
+def connect(address, timeout=None):
+    """Open a stream socket to address, as returned by get_address().
+
+    Raises:
+        socket.error: If the connection fails.
+        EzOutletError: If address is a Unix domain socket path and this
+            platform has none.
+    """
+    if isinstance(address, tuple):
+        return socket.create_connection(address, timeout=timeout)
+    if not hasattr(socket, 'AF_UNIX'):
+        raise exceptions.EzOutletError(constants.UNIX_SOCKET_UNSUPPORTED_ERROR_MESSAGE)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(address)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+class DaemonClient(object):
+    """Sends requests to a running ezoutlet daemon.
+
+    Each request uses a new connection, so one client may be shared between
+    threads.
+    """
+
+    def __init__(self, address=None, timeout=None):
+        """
+        Args:
+            address: Daemon address, as returned by get_address(). Defaults to
+                the default Unix domain socket.
+            timeout: Time in seconds to wait for a response, or None to wait
+                as long as the request takes.
+        """
+        self._address = get_address() if address is None else address
+        self._timeout = timeout
+
+    @property
+    def address(self):
+        return self._address
+
+    def request(self, command, **params):
+        """Send one request and return the daemon's response.
+
+        Args:
+            command: Daemon command name, e.g. 'reset'.
+            params: Command parameters; must be JSON-serializable.
+
+        Returns: Response dict.
+
+        Raises:
+            EzOutletError: If the daemon cannot be reached, or reports an
+                error.
+        """
+        params['command'] = command
+        token = read_token(self._address)
+        if token is not None:
+            params['token'] = token
+        try:
+            sock = connect(self._address, timeout=self._timeout)
+            try:
+                sock.sendall(encode_message(params))
+                line = sock.makefile('rb').readline()
+            finally:
+                sock.close()
+        except (socket.error, socket.timeout) as e:
+            raise exceptions.EzOutletError(constants.DAEMON_CONNECT_ERROR_MESSAGE.format(self._address, e))
+        if not line:
+            raise exceptions.EzOutletError(
+                constants.DAEMON_CONNECT_ERROR_MESSAGE.format(self._address, 'connection closed'))
+        response = decode_message(line)
+        if 'error' in response:
+            raise exceptions.EzOutletError(constants.DAEMON_ERROR_MESSAGE.format(response['error']))
+        return response
+
+    def ping(self):
+        """Returns: Response dict, including the daemon's version."""
+        return self.request('ping')
+
+    def circuits(self):
+        """Returns: dict mapping each outlet the daemon has used to its circuit breaker state."""
+        return self.request('circuits')['circuits']
+
+    def metrics(self):
+        """Returns: The daemon's per-outlet reset metrics, in the Prometheus text exposition format."""
+        return self.request('metrics')['metrics']
+
+    def status(self, targets, timeout=constants.DEFAULT_STATUS_TIMEOUT,
+               max_workers=constants.DEFAULT_STATUS_MAX_WORKERS):
+        """Have the daemon query targets' reachability and relay state, as EzOutletFleet.status does.
+
+        Returns: List of status dicts (see OutletStatus.as_dict), in target
+            order.
+        """
+        return self.request('status', targets=list(targets), timeout=timeout, max_workers=max_workers)['results']
+
+    def reset(self, targets, post_reset_delay=0,
+              ez_outlet_reset_interval=constants.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+              max_workers=constants.DEFAULT_FLEET_MAX_WORKERS):
+        """Have the daemon reset targets and wait for them, as EzOutletFleet.reset does.
+
+        Returns: List of per-target summaries (see ezoutlet.summary), in
+            target order.
+        """
+        return self.request('reset',
+                            targets=list(targets),
+                            post_reset_delay=post_reset_delay,
+                            ez_outlet_reset_interval=ez_outlet_reset_interval,
+                            max_workers=max_workers)['results']
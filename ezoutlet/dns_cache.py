@@ -0,0 +1,133 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Cached hostname resolution for ezOutlets.
+
+Without a resolver, every new connection to an ezOutlet looks its hostname
+up again. A CachingResolver keeps each answer for ttl seconds, and if a
+later lookup fails it keeps using the last address it got (for at most
+max_stale seconds past the ttl), so a slow or flaky DNS server neither
+delays nor breaks resets. Share one CachingResolver between EzOutlets, and
+call prefetch() to look up a whole fleet or inventory ahead of time.
+
+IP addresses are returned as they are, without a lookup.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import socket
+import threading
+import time
+
+from concurrent import futures
+
+from . import constants
+
+logger = logging.getLogger(__name__)
+
+STALE_ADDRESS_MSG = 'Resolving {0} failed ({1}); using last known address {2}'
+
+
+class CachingResolver(object):
+    """Thread-safe hostname to address cache."""
+
+    def __init__(self, ttl=constants.DEFAULT_DNS_TTL, max_stale=None, getaddrinfo=socket.getaddrinfo):
+        """
+        Args:
+            ttl: Time in seconds to use an address before looking the
+                hostname up again.
+            max_stale: Time in seconds past ttl an address may still be used
+                when looking the hostname up again fails, or None for no
+                limit.
+            getaddrinfo: Function to look hostnames up with, with the
+                signature of socket.getaddrinfo.
+        """
+        self._ttl = ttl
+        self._max_stale = max_stale
+        self._getaddrinfo = getaddrinfo
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def resolve(self, hostname):
+        """Returns: An IP address of hostname, cached if possible.
+
+        Raises:
+            socket.error: If hostname cannot be resolved and no usable
+                address is cached.
+        """
+        if _is_address(hostname):
+            return hostname
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(hostname)
+        if entry is not None and now < entry[1]:
+            return entry[0]
+        try:
+            address = self._lookup(hostname)
+        except (socket.error, UnicodeError) as e:
+            if entry is None or (self._max_stale is not None and now >= entry[1] + self._max_stale):
+                raise
+            logger.warning(STALE_ADDRESS_MSG.format(hostname, e, entry[0]))
+            return entry[0]
+        with self._lock:
+            self._entries[hostname] = (address, time.time() + self._ttl)
+        return address
+
+    def prefetch(self, hostnames, max_workers=constants.DEFAULT_DNS_PREFETCH_WORKERS):
+        """Resolve hostnames concurrently, filling the cache.
+
+        Args:
+            hostnames: Hostnames to resolve.
+            max_workers: Maximum number of lookups at once.
+
+        Returns: dict mapping each hostname to its address, or to the
+            exception raised resolving it.
+        """
+        hostnames = list(set(hostnames))
+        results = {}
+        if not hostnames:
+            return results
+        with futures.ThreadPoolExecutor(max_workers=min(max_workers, len(hostnames))) as executor:
+            future_to_hostname = dict((executor.submit(self.resolve, h), h) for h in hostnames)
+            for future in futures.as_completed(future_to_hostname):
+                hostname = future_to_hostname[future]
+                try:
+                    results[hostname] = future.result()
+                except Exception as e:
+                    results[hostname] = e
+        return results
+
+    def addresses(self):
+        """Returns: dict mapping each cached hostname to its address, stale or not."""
+        with self._lock:
+            return dict((hostname, entry[0]) for hostname, entry in self._entries.items())
+
+    def clear(self):
+        """Forget every cached address.
+
+        Returns: None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, hostname):
+        return self._getaddrinfo(hostname, None, 0, socket.SOCK_STREAM)[0][4][0]
+
+
+def _is_address(hostname):
+    try:
+        socket.getaddrinfo(hostname, None, 0, socket.SOCK_STREAM, 0, socket.AI_NUMERICHOST)
+    except (socket.error, UnicodeError):
+        return False
+    return True
+
+
+_default_resolver = CachingResolver()
+
+
+def default_resolver():
+    """Returns: A CachingResolver shared by the whole process."""
+    return _default_resolver
@@ -13,3 +13,8 @@ class EzOutletError(Exception):
 
 class EzOutletUsageError(EzOutletError):
     pass
+
+
+class CircuitOpenError(EzOutletError):
+    """Request not sent because the outlet's circuit breaker is open."""
+    pass
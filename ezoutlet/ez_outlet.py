@@ -7,7 +7,10 @@ from __future__ import print_function
 from __future__ import unicode_literals
 from future.utils import raise_
 
+import logging
+import socket
 import sys
+import threading
 import time
 
 try:
@@ -19,15 +22,41 @@ except ImportError:
     import urllib.parse as urlparse
 
 import requests
+import requests.adapters
 
 from . import constants
 from . import exceptions
+from . import instrumentation
+from . import outlet_status
+from . import readiness
+from . import reset_handle
+from . import retry
+
+logger = logging.getLogger(__name__)
 
 
 def _get_url(hostname, path):
     return urlparse.urlunparse(('http', hostname, path, '', '', ''))
 
 
+def make_session(pool_connections=constants.DEFAULT_POOL_CONNECTIONS, pool_maxsize=constants.DEFAULT_POOL_MAXSIZE):
+    """Create a keep-alive HTTP session suitable for sharing among EzOutlets.
+
+    Args:
+        pool_connections: Number of hosts to keep connection pools for.
+        pool_maxsize: Maximum number of connections kept open per host.
+
+    Returns: requests.Session
+    """
+    session = requests.Session()
+    # Outlets are always reached directly; skip per-request proxy/netrc lookups.
+    session.trust_env = False
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
 class EzOutlet:
     """Uses ezOutlet EZ-11b to reset a device.
 
@@ -35,43 +64,155 @@ class EzOutlet:
     reset a device under test (DUT).
 
     In addition to reset(), post_fail() is provided, meant to be given as a
-    callback to a Session object.
+    callback to a Session object. To overlap the power cycle with the
+    fuzzer's own work, use restart.RestartAdapter instead.
 
     It uses undocumented but simple CGI scripts.
+
+    HTTP connections are kept alive between resets. Pass a session from
+    make_session() to share one connection pool among many EzOutlets.
+    Use close(), or use the EzOutlet as a context manager, to release
+    connections when done.
+
+    An EzOutlet may be used from several threads at once, but nothing stops
+    their resets of the outlet from overlapping; give them a coordinator, or
+    use outlet_pool.EzOutletPool, which also serializes power operations
+    per outlet.
     """
     DEFAULT_EZ_OUTLET_RESET_INTERVAL = constants.DEFAULT_EZ_OUTLET_RESET_INTERVAL
-    DEFAULT_TIMEOUT = 10
+    DEFAULT_TIMEOUT = constants.DEFAULT_TIMEOUT
+    DEFAULT_STATUS_TIMEOUT = constants.DEFAULT_STATUS_TIMEOUT
     DEFAULT_WAIT_TIME = 0
     RESET_URL_PATH = '/reset.cgi'
+    # Unverified: unlike /reset.cgi, these are guessed from the reset page's naming and have not been checked
+    # against EZ-11b firmware. The simulator implements them as written.
+    TURN_ON_URL_PATH = '/on.cgi'
+    TURN_OFF_URL_PATH = '/off.cgi'
     EXPECTED_RESPONSE_CONTENTS = '0,0'
     NO_RESPONSE_MSG = "No response from EzOutlet after {0} seconds."
+    DEADLINE_EXCEEDED_MSG = "Reset cannot complete within its deadline of {0} seconds."
+    DEADLINE_PASSED_MSG = "Deadline passed before EzOutlet responded."
+    LEFT_OFF_MSG = "EzOutlet switched off, but not back on, so it is left off: {0}"
+    CONNECTION_ERROR_MSG = "Could not connect to EzOutlet: {0}"
+    RETRIES_EXHAUSTED_MSG = "{0} (gave up after {1} attempts)"
     UNEXPECTED_RESPONSE_MSG = ("Unexpected response from EzOutlet. Expected: " +
                                repr(EXPECTED_RESPONSE_CONTENTS) +
                                " Actual: {0}")
     LOG_REQUEST_MSG = 'HTTP GET {0}'
 
-    def __init__(self, hostname, timeout=DEFAULT_TIMEOUT):
+    def __init__(self, hostname, timeout=DEFAULT_TIMEOUT, session=None, interval_history=None, coordinator=None,
+                 retry_policy=None, circuit_breakers=None, connect_timeout=None, read_timeout=None, observers=(),
+                 resolver=None, rate_limiter=None):
         """
         Args:
             hostname: Hostname or IP address of device.
             timeout: Time in seconds to wait for the EzOutlet to respond.
+                Default for connect_timeout and read_timeout.
+            session: requests.Session to send requests with, e.g. from
+                make_session(). By default the EzOutlet creates (and closes)
+                its own.
+            interval_history: IntervalHistory to learn reset times in. Resets
+                with a readiness probe record how long the device took to
+                come back; resets without one wait for the learned time
+                instead of post_reset_delay + ez_outlet_reset_interval.
+            coordinator: ResetCoordinator shared with other EzOutlets. A reset
+                started while another caller's reset of the same hostname is
+                in progress joins it instead of sending a request. See
+                coordination module.
+            retry_policy: RetryPolicy for requests to the ezOutlet. By
+                default each request is tried once. See retry module.
+            circuit_breakers: CircuitBreakerRegistry, e.g.
+                circuit_breaker.default_registry(). Once this hostname's
+                breaker opens, requests fail fast with CircuitOpenError.
+                See circuit_breaker module.
+            connect_timeout: Time in seconds to wait for a connection. A
+                short one detects a dead outlet quickly.
+            read_timeout: Time in seconds to wait for a response once
+                connected.
+            observers: Callables given a ResetTiming after every reset,
+                e.g. instrumentation.ResetMetrics. See instrumentation
+                module.
+            resolver: CachingResolver, e.g. dns_cache.default_resolver(), to
+                look hostname up with instead of on every new connection.
+                See dns_cache module.
+            rate_limiter: RateLimiter shared with other EzOutlets. Every
+                request, including retries and status queries, waits until
+                it allows one. See rate_limit module.
         """
         self._hostname = hostname
         self._timeout = timeout
+        self._connect_timeout = timeout if connect_timeout is None else connect_timeout
+        self._read_timeout = timeout if read_timeout is None else read_timeout
+        self._session = session
+        self._owns_session = session is None
+        self._session_lock = threading.Lock()
+        self._interval_history = interval_history
+        self._coordinator = coordinator
+        self._retry_policy = retry.RetryPolicy() if retry_policy is None else retry_policy
+        self._circuit_breaker = None if circuit_breakers is None else circuit_breakers.get(hostname)
+        self._observers = list(observers)
+        self._resolver = resolver
+        self._rate_limiter = rate_limiter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the HTTP session, if it was created by this EzOutlet.
+
+        A session passed to the constructor is left open for its owner to
+        close.
+
+        Returns: None
+        """
+        with self._session_lock:
+            if self._owns_session and self._session is not None:
+                self._session.close()
+                self._session = None
+
+    @property
+    def hostname(self):
+        return self._hostname
 
     @property
     def url(self):
         return _get_url(self._hostname, self.RESET_URL_PATH)
 
-    def reset(self, post_reset_delay=DEFAULT_WAIT_TIME, ez_outlet_reset_interval=DEFAULT_EZ_OUTLET_RESET_INTERVAL):
+    def reset(self, post_reset_delay=DEFAULT_WAIT_TIME, ez_outlet_reset_interval=DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+              readiness_probe=None, deadline=None):
         """Send reset request to ezOutlet, check response, wait for reset.
 
         After sending HTTP request and receiving response, wait
         dut_reset_delay + ez_outlet_reset_interval seconds.
 
+        If a readiness_probe is given, wait ez_outlet_reset_interval seconds,
+        then poll the probe until it succeeds. post_reset_delay is then the
+        maximum time to poll, rather than a fixed delay.
+
+        If the EzOutlet has an interval_history, a reset without a
+        readiness_probe waits for the learned reset time instead, once enough
+        resets with a probe have been recorded.
+
+        If the EzOutlet has a coordinator and the outlet is already being
+        reset, no request is sent; the in-progress reset's response is
+        returned once it, and this call's own wait, are over.
+
         If the outlet does not respond (after self._timeout seconds), or gives
         an unexpected response, this method will raise an exception.
 
+        With a deadline, the whole reset (request, retries, wait and readiness
+        polling) is bounded: request timeouts and readiness polling are cut
+        short to fit, and an exception is raised as soon as the reset cannot
+        complete in time, rather than when the deadline passes. The request
+        must be acknowledged early enough to leave time for the wait, so a
+        deadline shorter than the wait fails without power-cycling the outlet.
+
+        Whether it succeeds or not, the reset's ResetTiming is then passed to
+        each observer.
+
         Args:
             post_reset_delay: Time in seconds to allow the device being reset
                 to reboot. See also reset_delay.
@@ -79,6 +220,10 @@ class EzOutlet:
                 dut_reset_delay). This should be configured to match the time
                 the ezOutlet device actually takes to turn off and on again.
                 Set to 0 to make this method non-blocking.
+            readiness_probe: Callable returning True once the device being
+                reset is up, e.g. readiness.TcpProbe. See readiness module.
+            deadline: Maximum time in seconds for the whole reset, or None
+                for no limit.
 
         Returns: HTTP response contents.
 
@@ -86,37 +231,355 @@ class EzOutlet:
             EzOutletResetError: If the reset fails due to:
                 - no response in self._timeout seconds or
                 - unexpected response contents (see
-                  EzOutletReset.EXPECTED_RESPONSE_CONTENTS)
+                  EzOutletReset.EXPECTED_RESPONSE_CONTENTS) or
+                - readiness_probe not succeeding within post_reset_delay
+                  seconds or
+                - the reset not completing within deadline seconds
         """
-        response = self._http_get(self.url)
+        with instrumentation.ResetTiming(self._hostname, observers=self._observers) as timing:
+            return self._reset(post_reset_delay, ez_outlet_reset_interval, readiness_probe, deadline, timing)
+
+    def _reset(self, post_reset_delay, ez_outlet_reset_interval, readiness_probe, deadline, timing):
+        """reset(), recording where the time went in timing."""
+        deadline_at = None if deadline is None else time.time() + deadline
+
+        if readiness_probe is None:
+            delay = self._reset_delay(post_reset_delay, ez_outlet_reset_interval)
+        else:
+            delay = ez_outlet_reset_interval
+
+        # The outlet must acknowledge by send_deadline_at for the reset to complete in time.
+        send_deadline_at = None if deadline_at is None else deadline_at - delay
+        if send_deadline_at is not None and send_deadline_at <= time.time():
+            raise exceptions.EzOutletError(self.DEADLINE_EXCEEDED_MSG.format(deadline))
+
+        def send_reset():
+            return self._send_reset(deadline_at=send_deadline_at, timing=timing)
+
+        coalesced = False
+        if self._coordinator is None:
+            response = send_reset()
+        else:
+            handle = self._coordinator.begin_reset(self._hostname, delay, send_reset)
+            response, coalesced = handle.response, handle.coalesced
+            if coalesced:
+                delay = handle.remaining()
+        timing.coalesced = coalesced
+
+        if deadline_at is not None and time.time() + delay > deadline_at:
+            raise exceptions.EzOutletError(self.DEADLINE_EXCEEDED_MSG.format(deadline))
+        start = instrumentation.clock()
+        self._wait_for_reset(delay)
+        timing.wait_time = instrumentation.clock() - start
+        if readiness_probe is not None:
+            timeout = post_reset_delay
+            if deadline_at is not None:
+                timeout = min(timeout, max(deadline_at - time.time(), 0))
+            start = instrumentation.clock()
+            try:
+                ready_time = readiness.wait_until_ready(readiness_probe, timeout=timeout)
+            finally:
+                timing.ready_time = instrumentation.clock() - start
+            if not coalesced:
+                # A joined reset was acknowledged earlier than this call knows.
+                self.record_reset_time(ez_outlet_reset_interval + ready_time)
 
-        self._check_response_raise_if_unexpected(response)
+        return response
 
-        self._wait_for_reset(post_reset_delay + ez_outlet_reset_interval)
+    def post_fail(self, *args, **kwargs):
+        """Reset the device, with default arguments. Blocks until the reset is complete.
+
+        Meant as a restart (post-fail) callback for a fuzzing Session; its
+        arguments are ignored.
+
+        Returns: HTTP response contents.
+
+        Raises:
+            EzOutletResetError: If the reset fails. See reset().
+        """
+        return self.reset()
+
+    def turn_on(self):
+        """Switch the outlet on, and return once the ezOutlet acknowledges.
+
+        Returns: HTTP response contents.
+
+        Raises:
+            EzOutletError: As reset() does, if the request fails.
+        """
+        return self._send_command(self.TURN_ON_URL_PATH)
+
+    def turn_off(self):
+        """Switch the outlet off, and return once the ezOutlet acknowledges.
+
+        The outlet stays off until turn_on() (or a reset).
+
+        Returns: HTTP response contents.
+
+        Raises:
+            EzOutletError: As reset() does, if the request fails.
+        """
+        return self._send_command(self.TURN_OFF_URL_PATH)
+
+    def cycle(self, off_duration=DEFAULT_EZ_OUTLET_RESET_INTERVAL):
+        """Switch the outlet off, wait off_duration seconds, and switch it on again.
+
+        Unlike reset(), the time off is chosen by the caller rather than by
+        the ezOutlet, and this returns as soon as the outlet is back on.
+
+        Args:
+            off_duration: Time in seconds to keep the outlet off.
+
+        Returns: HTTP response contents of turning the outlet on.
+
+        Raises:
+            EzOutletError: As reset() does, if either request fails. If
+                turning off fails, the outlet is not turned on. If turning
+                on fails, the message (LEFT_OFF_MSG) says the outlet is
+                left off.
+        """
+        self.turn_off()
+        time.sleep(off_duration)
+        try:
+            return self.turn_on()
+        except exceptions.EzOutletError as e:
+            raise exceptions.EzOutletError(self.LEFT_OFF_MSG.format(e))
+
+    def status(self, timeout=DEFAULT_STATUS_TIMEOUT):
+        """Query whether the ezOutlet is reachable, and its relay state, without resetting it.
+
+        One request is sent, with no retries. The circuit breaker and
+        observers are not involved, so a status sweep neither trips nor
+        resets breakers. The request waits for the rate limiter, if any.
+
+        Args:
+            timeout: Time in seconds to wait for the ezOutlet to answer.
+
+        Returns: OutletStatus. Failures are reported in it, not raised.
+        """
+        url = _get_url(self._hostname, outlet_status.STATUS_URL_PATH)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(self._hostname)
+        logger.debug(self.LOG_REQUEST_MSG.format(url))
+        start = instrumentation.clock()
+        try:
+            response = self._get(url, timeout=timeout)
+            latency = instrumentation.clock() - start
+        except requests.exceptions.Timeout:
+            return outlet_status.OutletStatus(self._hostname, reachable=False,
+                                              error=self.NO_RESPONSE_MSG.format(timeout))
+        except requests.exceptions.RequestException as e:
+            return outlet_status.OutletStatus(self._hostname, reachable=False,
+                                              error=self.CONNECTION_ERROR_MSG.format(e))
+        relay = outlet_status.parse_relay_state(response.text) if response.status_code == 200 else None
+        return outlet_status.OutletStatus(self._hostname, reachable=True, latency=latency, relay=relay)
+
+    def begin_reset(self, post_reset_delay=DEFAULT_WAIT_TIME,
+                    ez_outlet_reset_interval=DEFAULT_EZ_OUTLET_RESET_INTERVAL, deadline=None):
+        """Send reset request to ezOutlet, check response, return immediately.
+
+        Like reset(), but instead of waiting for the reset, returns a
+        ResetHandle which completes post_reset_delay +
+        ez_outlet_reset_interval seconds (or the learned reset time; see
+        reset()) after the response.
+
+        With a coordinator, may join a reset already in progress; see
+        reset().
+
+        Observers are given a ResetTiming covering the request only; its
+        wait_time is 0.
+
+        Args:
+            post_reset_delay: See reset().
+            ez_outlet_reset_interval: See reset().
+            deadline: Maximum time in seconds for sending the request,
+                including retries, or None for no limit.
+
+        Returns: ResetHandle
+
+        Raises:
+            EzOutletResetError: If the reset fails. See reset().
+        """
+        with instrumentation.ResetTiming(self._hostname, observers=self._observers) as timing:
+            return self._begin_reset(post_reset_delay, ez_outlet_reset_interval, deadline, timing)
+
+    def _begin_reset(self, post_reset_delay, ez_outlet_reset_interval, deadline, timing):
+        """begin_reset(), recording where the time went in timing."""
+        deadline_at = None if deadline is None else time.time() + deadline
+
+        def send_reset():
+            return self._send_reset(deadline_at=deadline_at, timing=timing)
+
+        delay = self._reset_delay(post_reset_delay, ez_outlet_reset_interval)
+        if self._coordinator is not None:
+            handle = self._coordinator.begin_reset(self._hostname, delay, send_reset)
+            timing.coalesced = handle.coalesced
+            return handle
+
+        response = send_reset()
+
+        return reset_handle.ResetHandle(hostname=self._hostname,
+                                        response=response,
+                                        delay=delay)
+
+    def record_reset_time(self, seconds):
+        """Record how long a reset took, if this EzOutlet has an interval_history.
+
+        Args:
+            seconds: Time from reset acknowledgement until the device was
+                ready.
+
+        Returns: None
+        """
+        if self._interval_history is not None:
+            self._interval_history.record(self._hostname, seconds)
+
+    def _reset_delay(self, post_reset_delay, ez_outlet_reset_interval):
+        """Returns: Time in seconds to wait after a reset without a readiness probe."""
+        default = post_reset_delay + ez_outlet_reset_interval
+        if self._interval_history is None:
+            return default
+        return self._interval_history.estimate(self._hostname, default=default)
+
+    def _send_reset(self, deadline_at=None, timing=None):
+        """Send reset request and check response, without waiting.
+
+        Args:
+            deadline_at: Time (as from time.time()) by which the request,
+                including retries, must be done; or None.
+            timing: ResetTiming to record request and validation times in;
+                or None.
+
+        Returns: HTTP response contents.
+        """
+        if timing is None:
+            timing = instrumentation.ResetTiming(self._hostname)
+        response = self._http_get(self.url, deadline_at=deadline_at, timing=timing)
+
+        start = instrumentation.clock()
+        try:
+            self._check_response_raise_if_unexpected(response)
+        finally:
+            timing.validation_time = instrumentation.clock() - start
 
         return response
 
-    def _http_get(self, url):
-        """HTTP GET and return response.
+    def _send_command(self, path):
+        """GET path on the ezOutlet and check the response.
+
+        Returns: HTTP response contents.
+        """
+        response = self._http_get(_get_url(self._hostname, path))
+        self._check_response_raise_if_unexpected(response)
+        return response
+
+    def _http_get(self, url, deadline_at=None, timing=None):
+        """HTTP GET and return response, retrying as the retry policy allows.
 
         Args:
             url: Target to GET.
+            deadline_at: Time (as from time.time()) after which no attempt
+                is made or waited for; or None.
+            timing: ResetTiming to record attempts and their times in; or
+                None.
 
         Returns: Response contents.
 
         Raises:
             EzOutletResetError: If the reset fails due to:
                 - no response in self._timeout seconds
+                - connection failure
+            CircuitOpenError: If the circuit breaker is open.
         """
-        try:
-            return requests.get(url,
-                                timeout=self._timeout,
-                                proxies={"http": None, "https": None}).text
-        except requests.exceptions.ConnectTimeout:
-            raise_(exceptions.EzOutletError(
-                self.NO_RESPONSE_MSG.format(self._timeout)),
-                None,
-                sys.exc_info()[2])
+        if timing is None:
+            timing = instrumentation.ResetTiming(self._hostname)
+        attempt = 1
+        while True:
+            if self._rate_limiter is not None:
+                timing.rate_limit_wait_time += self._rate_limiter.acquire(self._hostname, deadline_at=deadline_at)
+            timeout = self._request_timeout(deadline_at)
+            # Last before the request: in half-open state this claims the probe, which only the
+            # request's outcome releases.
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.before_request()
+            logger.debug(self.LOG_REQUEST_MSG.format(url))
+            start = instrumentation.clock()
+            try:
+                response = self._get(url, timeout=timeout).text
+            except requests.exceptions.RequestException as e:
+                timing.add_attempt(instrumentation.clock() - start)
+                if self._circuit_breaker is not None:
+                    self._circuit_breaker.record_failure()
+                max_delay = None if deadline_at is None else deadline_at - time.time()
+                delay = self._retry_policy.next_delay(attempt, e, hostname=self._hostname, max_delay=max_delay)
+                if delay is None:
+                    self._raise_request_error(e, attempt)
+                    raise
+            else:
+                timing.add_attempt(instrumentation.clock() - start)
+                if self._circuit_breaker is not None:
+                    self._circuit_breaker.record_success()
+                return response
+            time.sleep(delay)
+            timing.retry_wait_time += delay
+            attempt += 1
+
+    def _request_timeout(self, deadline_at):
+        """Returns: timeout argument for requests, cut short to fit deadline_at."""
+        if deadline_at is None:
+            if self._connect_timeout == self._read_timeout:
+                return self._connect_timeout
+            return self._connect_timeout, self._read_timeout
+        remaining = deadline_at - time.time()
+        if remaining <= 0:
+            raise exceptions.EzOutletError(self.DEADLINE_PASSED_MSG)
+        return min(self._connect_timeout, remaining), min(self._read_timeout, remaining)
+
+    def _raise_request_error(self, exception, attempts):
+        """Raise EzOutletError for a failed request, if it is a timeout or connection failure.
+
+        Must be called while handling exception.
+        """
+        if isinstance(exception, requests.exceptions.ConnectTimeout):
+            msg = self.NO_RESPONSE_MSG.format(self._connect_timeout)
+        elif isinstance(exception, requests.exceptions.Timeout):
+            msg = self.NO_RESPONSE_MSG.format(self._read_timeout)
+        elif isinstance(exception, requests.exceptions.ConnectionError):
+            msg = self.CONNECTION_ERROR_MSG.format(exception)
+        else:
+            return
+        if attempts > 1:
+            msg = self.RETRIES_EXHAUSTED_MSG.format(msg, attempts)
+        raise_(exceptions.EzOutletError(msg), None, sys.exc_info()[2])
+
+    def _get(self, url, timeout):
+        """HTTP GET url once. With a resolver, connect to its address for the hostname.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails,
+                including requests.exceptions.ConnectionError if the
+                hostname cannot be resolved.
+        """
+        kwargs = {'timeout': timeout, 'proxies': {"http": None, "https": None}}
+        if self._resolver is not None:
+            parts = urlparse.urlsplit(url)
+            try:
+                address = self._resolver.resolve(parts.hostname)
+            except (socket.error, UnicodeError) as e:
+                raise_(requests.exceptions.ConnectionError(e), None, sys.exc_info()[2])
+            if address != parts.hostname:
+                netloc = '[{0}]'.format(address) if ':' in address else address
+                if parts.port is not None:
+                    netloc = '{0}:{1}'.format(netloc, parts.port)
+                url = urlparse.urlunsplit(parts._replace(netloc=netloc))
+                kwargs['headers'] = {'Host': parts.netloc}
+        return self._get_session().get(url, **kwargs)
+
+    def _get_session(self):
+        with self._session_lock:
+            if self._session is None:
+                self._session = make_session(pool_connections=1)
+            return self._session
 
     def _check_response_raise_if_unexpected(self, response):
         """Raise if response is unexpected.
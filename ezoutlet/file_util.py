@@ -0,0 +1,73 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""File helpers for state shared between processes: advisory locks and atomic replacement."""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import contextlib
+import io
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+def makedirs(directory):
+    """Create directory and its parents, unless it exists. Safe if another process creates it concurrently."""
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+
+def lock_file(f):
+    """Block until an exclusive lock on open file f is held."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(f):
+    """Release a lock taken with lock_file()."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Context manager holding an exclusive lock on the file at path, which is created if missing.
+
+    Use a lock file separate from any file replaced with replace(), since
+    replacing a file does not carry its lock over.
+    """
+    with io.open(path, 'a+b') as f:
+        lock_file(f)
+        try:
+            yield
+        finally:
+            unlock_file(f)
+
+
+def replace(src, dst):
+    """Rename src to dst, overwriting dst, atomically where the platform allows."""
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2: os.rename cannot overwrite on Windows.
+        if os.path.exists(dst) and os.name == 'nt':
+            os.remove(dst)
+        os.rename(src, dst)
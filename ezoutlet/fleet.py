@@ -0,0 +1,478 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import heapq
+import itertools
+import time
+from concurrent import futures
+
+from . import constants
+from . import exceptions
+from . import ez_outlet
+from . import readiness
+
+
+class EzOutletFleet(object):
+    """Resets many ezOutlet EZ-11b devices concurrently.
+
+    Reset requests are sent in parallel (at most max_workers at a time).
+    Instead of each outlet waiting for its own on/off cycle, the fleet waits
+    once, so a fleet reset takes roughly as long as a single reset.
+
+    All outlets share one keep-alive connection pool, so repeated fleet
+    resets reuse connections. Use close(), or use the fleet as a context
+    manager, to release them.
+    """
+    DEFAULT_MAX_WORKERS = constants.DEFAULT_FLEET_MAX_WORKERS
+
+    def __init__(self, hostnames, timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT, max_workers=DEFAULT_MAX_WORKERS,
+                 session=None, interval_history=None, coordinator=None, retry_policy=None, circuit_breakers=None,
+                 connect_timeout=None, read_timeout=None, observers=(), outlet_options=None, resolver=None,
+                 rate_limiter=None):
+        """
+        Args:
+            hostnames: Hostnames or IP addresses of devices. Each is reset
+                once, however often it is given.
+            timeout: Time in seconds to wait for each EzOutlet to respond.
+            max_workers: Maximum number of reset requests in flight at once.
+            session: requests.Session shared by every outlet. By default the
+                fleet creates (and closes) one sized for its hosts.
+            interval_history: IntervalHistory to learn per-host reset times
+                in. See EzOutlet.
+            coordinator: ResetCoordinator, so that resets of outlets already
+                being reset elsewhere join those resets. See EzOutlet.
+            retry_policy: RetryPolicy shared by every outlet. Give it a
+                RetryBudget to limit retries across the whole fleet.
+            circuit_breakers: CircuitBreakerRegistry, so that outlets which
+                have stopped responding fail fast. See EzOutlet.
+            connect_timeout: See EzOutlet.
+            read_timeout: See EzOutlet.
+            observers: Callables given a ResetTiming after each outlet's
+                request. The fleet waits for all outlets at once, so these
+                records cover the request only. See EzOutlet.begin_reset.
+            outlet_options: dict mapping hostnames to dicts of EzOutlet
+                keyword arguments (e.g. timeout) overriding the fleet's for
+                that outlet.
+            resolver: CachingResolver shared by every outlet. See EzOutlet.
+            rate_limiter: RateLimiter pacing requests to every outlet, e.g.
+                to bound the load of a large reset on the network. See
+                EzOutlet.
+        """
+        hostnames = unique_hostnames(hostnames)
+        self._owns_session = session is None
+        if session is None:
+            session = ez_outlet.make_session(pool_connections=max(len(hostnames), 1), pool_maxsize=1)
+        self._session = session
+        options = dict(timeout=timeout, session=session, coordinator=coordinator, retry_policy=retry_policy,
+                       circuit_breakers=circuit_breakers, connect_timeout=connect_timeout,
+                       read_timeout=read_timeout, observers=observers, resolver=resolver,
+                       rate_limiter=rate_limiter)
+        outlet_options = outlet_options or {}
+        self._outlets = [ez_outlet.EzOutlet(hostname=hostname, **dict(options, **outlet_options.get(hostname, {})))
+                         for hostname in hostnames]
+        self._max_workers = max_workers
+        self._interval_history = interval_history
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the shared HTTP session, if it was created by this fleet.
+
+        Returns: None
+        """
+        if self._owns_session:
+            self._session.close()
+
+    @property
+    def hostnames(self):
+        return [outlet.hostname for outlet in self._outlets]
+
+    def reset(self,
+              post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+              ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+              readiness_probes=None, deadline=None, reset_options=None):
+        """Send reset request to every ezOutlet, check responses, wait once.
+
+        After every request has been answered (or has failed), wait until
+        post_reset_delay + ez_outlet_reset_interval seconds have passed since
+        the last successful response.
+
+        With readiness_probes, each probed host waits only
+        ez_outlet_reset_interval, then its probe is polled for at most
+        post_reset_delay seconds. All hosts are handled concurrently.
+
+        With an interval_history, hosts without a probe wait for their
+        learned reset time instead (see EzOutlet.reset), and probed hosts
+        record how long they took.
+
+        With a deadline, hosts whose reset cannot complete in time fail
+        (see EzOutlet.reset), and the fleet does not wait for them.
+
+        With reset_options, hosts may have their own post_reset_delay and
+        ez_outlet_reset_interval; the fleet then waits until the last of
+        them is done.
+
+        Errors are not raised; they are returned in place of the response.
+
+        Args:
+            post_reset_delay: See EzOutlet.reset.
+            ez_outlet_reset_interval: See EzOutlet.reset.
+            readiness_probes: dict mapping hostnames to readiness probes. See
+                EzOutlet.reset.
+            deadline: Maximum time in seconds for the whole fleet reset, or
+                None for no limit.
+            reset_options: dict mapping hostnames to dicts with
+                post_reset_delay and/or ez_outlet_reset_interval for that
+                host.
+
+        Returns: dict mapping each hostname to its HTTP response contents, or
+            to the exception raised while resetting it.
+        """
+        readiness_probes = readiness_probes or {}
+        reset_args, delay_for = self._reset_plan(post_reset_delay, ez_outlet_reset_interval, readiness_probes,
+                                                 reset_options)
+        deadline_at = None if deadline is None else time.time() + deadline
+        handles = self._begin_reset(delay_for, deadline_at, deadline)
+
+        results = {}
+        pending = []
+        for hostname, h in handles.items():
+            if isinstance(h, Exception):
+                results[hostname] = h
+            elif deadline_at is not None and h.deadline > deadline_at:
+                results[hostname] = exceptions.EzOutletError(
+                    ez_outlet.EzOutlet.DEADLINE_EXCEEDED_MSG.format(deadline))
+            else:
+                results[hostname] = h.response
+                pending.append(h)
+        if pending and readiness_probes:
+            results.update(self._wait_until_all_ready(pending, readiness_probes, reset_args, deadline_at))
+        elif pending:
+            max(pending, key=lambda h: h.deadline).wait()
+        return results
+
+    def iter_reset(self,
+                   post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+                   ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                   readiness_probes=None, deadline=None, reset_options=None):
+        """Reset every outlet as reset() does, yielding each host's result as soon as that host is done.
+
+        A host is done when its request fails, or when its own reset (and
+        readiness probe, if any) is complete, so hosts are yielded roughly in
+        the order their devices come back. Results are not kept, and at most
+        max_workers requests are queued at a time, so memory grows with the
+        number of resets in progress rather than with the fleet.
+
+        Args: See reset().
+
+        Yields: Tuples of hostname and its HTTP response contents, or the
+            exception raised while resetting it.
+        """
+        readiness_probes = readiness_probes or {}
+        reset_args, delay_for = self._reset_plan(post_reset_delay, ez_outlet_reset_interval, readiness_probes,
+                                                 reset_options)
+        deadline_at = None if deadline is None else time.time() + deadline
+        outlets = iter(self._outlets)
+        requests = {}  # Future of each request in flight: hostname
+        probes = {}  # Future of each readiness probe being polled: ResetHandle
+        waiting = []  # Heap of (deadline, sequence, ResetHandle) for hosts without a probe
+        sequence = itertools.count()
+        # Waiting for a probe is mostly sleeping, so every probed host may have its own thread.
+        with futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor, \
+                futures.ThreadPoolExecutor(max_workers=max(len(readiness_probes), 1)) as probe_executor:
+            def submit_next():
+                outlet = next(outlets, None)
+                if outlet is not None:
+                    requests[executor.submit(self._begin_outlet_reset, outlet, delay_for, deadline_at,
+                                             deadline)] = outlet.hostname
+
+            for _ in range(self._max_workers):
+                submit_next()
+            while requests or probes or waiting:
+                timeout = max(waiting[0][0] - time.time(), 0) if waiting else None
+                if requests or probes:
+                    done = futures.wait(list(requests) + list(probes), timeout=timeout,
+                                        return_when=futures.FIRST_COMPLETED)[0]
+                else:
+                    waiting[0][2].wait()
+                    done = ()
+                for future in done:
+                    if future in probes:
+                        h = probes.pop(future)
+                        try:
+                            future.result()
+                        except Exception as e:
+                            yield h.hostname, e
+                        else:
+                            yield h.hostname, h.response
+                        continue
+                    hostname = requests.pop(future)
+                    submit_next()
+                    try:
+                        h = future.result()
+                    except Exception as e:
+                        yield hostname, e
+                        continue
+                    if deadline_at is not None and h.deadline > deadline_at:
+                        yield hostname, exceptions.EzOutletError(
+                            ez_outlet.EzOutlet.DEADLINE_EXCEEDED_MSG.format(deadline))
+                    elif hostname in readiness_probes:
+                        probes[probe_executor.submit(self._wait_until_ready, h, readiness_probes[hostname],
+                                                     reset_args, deadline_at)] = h
+                    else:
+                        heapq.heappush(waiting, (h.deadline, next(sequence), h))
+                while waiting and waiting[0][0] <= time.time():
+                    h = heapq.heappop(waiting)[2]
+                    h.wait()
+                    yield h.hostname, h.response
+
+    def turn_on(self, max_simultaneous_on=None, stagger=0):
+        """Switch every outlet on, in staggered batches.
+
+        At most max_simultaneous_on outlets are switched on at once. Once a
+        batch has been acknowledged, the next is started stagger seconds
+        later, so the inrush current of one batch has settled before the
+        next. See EzOutlet.turn_on.
+
+        Args:
+            max_simultaneous_on: Maximum number of outlets per batch, or None
+                for a single batch (still at most max_workers requests in
+                flight).
+            stagger: Time in seconds between batches.
+
+        Returns: dict mapping each hostname to its HTTP response contents, or
+            to the exception raised while switching it.
+        """
+        return self._switch_in_batches(lambda outlet: outlet.turn_on(), self._outlets, max_simultaneous_on,
+                                       stagger)
+
+    def turn_off(self, max_simultaneous_off=None, stagger=0):
+        """Switch every outlet off, in staggered batches. See turn_on.
+
+        Returns: dict mapping each hostname to its HTTP response contents, or
+            to the exception raised while switching it.
+        """
+        return self._switch_in_batches(lambda outlet: outlet.turn_off(), self._outlets, max_simultaneous_off,
+                                       stagger)
+
+    def cycle(self, off_duration=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL, max_simultaneous_on=None,
+              stagger=0):
+        """Switch every outlet off at once, wait off_duration seconds, then switch them on as turn_on does.
+
+        Outlets which fail to switch off are not switched on. Every outlet
+        is off for at least off_duration seconds; those in later batches
+        stay off longer. Outlets which switch off but fail to switch on map
+        to an EzOutletError with EzOutlet.LEFT_OFF_MSG.
+
+        Args:
+            off_duration: Minimum time in seconds to keep each outlet off.
+            max_simultaneous_on: See turn_on.
+            stagger: See turn_on.
+
+        Returns: dict mapping each hostname to the HTTP response contents of
+            switching it on, or to the exception raised while switching it
+            off or on.
+        """
+        results = self._map_outlets(lambda outlet: outlet.turn_off(), self._outlets)
+        switched_off = [outlet for outlet in self._outlets if not isinstance(results[outlet.hostname], Exception)]
+        if switched_off:
+            time.sleep(off_duration)
+            on_results = self._switch_in_batches(lambda outlet: outlet.turn_on(), switched_off,
+                                                 max_simultaneous_on, stagger)
+            for hostname, result in on_results.items():
+                if isinstance(result, Exception):
+                    result = exceptions.EzOutletError(ez_outlet.EzOutlet.LEFT_OFF_MSG.format(result))
+                results[hostname] = result
+        return results
+
+    def status(self, timeout=ez_outlet.EzOutlet.DEFAULT_STATUS_TIMEOUT, max_workers=None):
+        """Query every ezOutlet's reachability and relay state concurrently, without resetting them.
+
+        Args:
+            timeout: Time in seconds to wait for each ezOutlet to answer.
+            max_workers: Maximum number of queries in flight at once; by
+                default the fleet's max_workers. Unreachable outlets hold
+                a worker for the whole timeout, so a sweep of many outlets
+                may want more.
+
+        Returns: dict mapping each hostname to an OutletStatus. See
+            EzOutlet.status.
+        """
+        with futures.ThreadPoolExecutor(max_workers=max_workers or self._max_workers) as executor:
+            statuses = executor.map(lambda outlet: outlet.status(timeout=timeout), self._outlets)
+            return dict(zip(self.hostnames, statuses))
+
+    def begin_reset(self,
+                    post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+                    ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL):
+        """Send reset request to every ezOutlet and check responses, without waiting.
+
+        Args:
+            post_reset_delay: See EzOutlet.reset.
+            ez_outlet_reset_interval: See EzOutlet.reset.
+
+        Returns: dict mapping each hostname to a ResetHandle (see
+            EzOutlet.begin_reset), or to the exception raised while resetting
+            it.
+        """
+        return self._begin_reset(lambda hostname: self._reset_delay(hostname, post_reset_delay,
+                                                                    ez_outlet_reset_interval))
+
+    def _begin_reset(self, delay_for, deadline_at=None, deadline=None):
+        """Begin resetting every outlet; delay_for(hostname) gives each handle's delay.
+
+        Outlets whose reset could not complete by deadline_at (as from
+        time.time()), deadline seconds from the start, fail without a
+        request being sent. See _begin_outlet_reset.
+        """
+        return self._map_outlets(lambda outlet: self._begin_outlet_reset(outlet, delay_for, deadline_at, deadline),
+                                 self._outlets)
+
+    @staticmethod
+    def _begin_outlet_reset(outlet, delay_for, deadline_at, deadline):
+        """Returns: ResetHandle from outlet.begin_reset, delayed by delay_for(hostname).
+
+        With a deadline_at, the outlet must acknowledge early enough for its
+        delay to end by then; if that time has already passed when the
+        request leaves the queue, no request is sent.
+
+        Raises:
+            EzOutletError: With DEADLINE_EXCEEDED_MSG if the reset cannot
+                complete by deadline_at. See also EzOutlet.begin_reset.
+        """
+        delay = delay_for(outlet.hostname)
+        send_deadline = None
+        if deadline_at is not None:
+            send_deadline = deadline_at - delay - time.time()
+            if send_deadline <= 0:
+                raise exceptions.EzOutletError(ez_outlet.EzOutlet.DEADLINE_EXCEEDED_MSG.format(deadline))
+        return outlet.begin_reset(post_reset_delay=delay, ez_outlet_reset_interval=0, deadline=send_deadline)
+
+    def _map_outlets(self, fn, outlets):
+        """Call fn(outlet) for each outlet, at most max_workers at a time.
+
+        Returns: dict mapping each hostname to fn's result, or to the
+            exception it raised.
+        """
+        results = {}
+        with futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            future_to_hostname = dict((executor.submit(fn, outlet), outlet.hostname) for outlet in outlets)
+            for future in futures.as_completed(future_to_hostname):
+                hostname = future_to_hostname[future]
+                try:
+                    results[hostname] = future.result()
+                except Exception as e:
+                    results[hostname] = e
+        return results
+
+    def _switch_in_batches(self, switch, outlets, batch_size, stagger):
+        """Call switch(outlet) for batch_size outlets at a time, stagger seconds apart.
+
+        Returns: See _map_outlets.
+        """
+        batch_size = batch_size or max(len(outlets), 1)
+        results = {}
+        for start in range(0, len(outlets), batch_size):
+            if start:
+                time.sleep(stagger)
+            results.update(self._map_outlets(switch, outlets[start:start + batch_size]))
+        return results
+
+    def _reset_plan(self, post_reset_delay, ez_outlet_reset_interval, readiness_probes, reset_options):
+        """Returns: Tuple of functions of a hostname, giving its (post_reset_delay, ez_outlet_reset_interval)
+            and the delay of its ResetHandle.
+        """
+        reset_options = reset_options or {}
+
+        def reset_args(hostname):
+            options = reset_options.get(hostname, {})
+            return (options.get('post_reset_delay', post_reset_delay),
+                    options.get('ez_outlet_reset_interval', ez_outlet_reset_interval))
+
+        def delay_for(hostname):
+            host_post_reset_delay, host_reset_interval = reset_args(hostname)
+            if hostname in readiness_probes:
+                return host_reset_interval
+            return self._reset_delay(hostname, host_post_reset_delay, host_reset_interval)
+
+        return reset_args, delay_for
+
+    def _reset_delay(self, hostname, post_reset_delay, ez_outlet_reset_interval):
+        default = post_reset_delay + ez_outlet_reset_interval
+        if self._interval_history is None:
+            return default
+        return self._interval_history.estimate(hostname, default=default)
+
+    def _wait_until_all_ready(self, handles, readiness_probes, reset_args, deadline_at=None):
+        """Wait for each handle, then poll its probe (if any), all concurrently. See _wait_until_ready.
+
+        Returns: dict mapping hostnames whose probe failed to the exception.
+        """
+        def wait_until_ready(handle):
+            probe = readiness_probes.get(handle.hostname)
+            if probe is None:
+                handle.wait()
+            else:
+                self._wait_until_ready(handle, probe, reset_args, deadline_at)
+
+        failures = {}
+        # Waiting is mostly sleeping, so every host gets its own thread.
+        with futures.ThreadPoolExecutor(max_workers=len(handles)) as executor:
+            future_to_hostname = dict((executor.submit(wait_until_ready, h), h.hostname) for h in handles)
+            for future in futures.as_completed(future_to_hostname):
+                try:
+                    future.result()
+                except Exception as e:
+                    failures[future_to_hostname[future]] = e
+        return failures
+
+    def _wait_until_ready(self, handle, probe, reset_args, deadline_at=None):
+        """Wait for handle, then poll probe.
+
+        reset_args(hostname) gives each host's post_reset_delay and
+        ez_outlet_reset_interval. The probe is polled for at most
+        post_reset_delay seconds, and not past deadline_at (as from
+        time.time()).
+
+        Returns: None
+
+        Raises:
+            EzOutletError: If the device does not become ready in time.
+        """
+        handle.wait()
+        timeout, ez_outlet_reset_interval = reset_args(handle.hostname)
+        probe_timeout = timeout
+        if deadline_at is not None:
+            probe_timeout = min(timeout, max(deadline_at - time.time(), 0))
+        ready_time = readiness.wait_until_ready(probe, timeout=probe_timeout)
+        if self._interval_history is not None and not handle.coalesced:
+            self._interval_history.record(handle.hostname, ez_outlet_reset_interval + ready_time)
+
+
+def unique_hostnames(hostnames):
+    """Returns: List of hostnames without repeats, in the order first given."""
+    seen = set()
+    return [h for h in hostnames if not (h in seen or seen.add(h))]
+
+
+def reset_many(hostnames,
+               post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+               ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+               timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT,
+               max_workers=EzOutletFleet.DEFAULT_MAX_WORKERS):
+    """Reset several ezOutlets concurrently. See EzOutletFleet.reset.
+
+    Returns: dict mapping each hostname to its HTTP response contents, or to
+        the exception raised while resetting it.
+    """
+    with EzOutletFleet(hostnames=hostnames, timeout=timeout, max_workers=max_workers) as fleet:
+        return fleet.reset(post_reset_delay=post_reset_delay, ez_outlet_reset_interval=ez_outlet_reset_interval)
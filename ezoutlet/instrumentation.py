@@ -0,0 +1,324 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Timing records and metrics for resets.
+
+Every EzOutlet reset produces a ResetTiming, which is passed to each of the
+outlet's observers once the reset is over, whether it succeeded or not. An
+observer is any callable taking a ResetTiming. Exceptions raised by an
+observer are logged and otherwise ignored.
+
+Observers provided here:
+    LoggingObserver: Logs each record.
+    ResetMetrics: Per-host counters and histograms, in Prometheus text
+        format.
+    PrometheusObserver: Records the same metrics with prometheus_client,
+        if it is installed.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bisect
+import logging
+import threading
+import time
+import timeit
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_OK = 'ok'
+OUTCOME_ERROR = 'error'
+
+# Seconds; spans a pooled request (milliseconds) up to a slow relay cycle.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DEFAULT_NAMESPACE = 'ezoutlet'
+
+OBSERVER_FAILED_MSG = 'Reset observer {0!r} failed'
+TIMING_LOG_MSG = ('reset {hostname}: {outcome} in {total_time:.3f}s (request {request_time:.3f}s, '
+                  '{attempts} attempt(s), validation {validation_time:.3f}s, wait {wait_time:.3f}s, '
+                  'ready {ready_time:.3f}s){suffix}')
+
+# Monotonic where available; durations must not jump with the wall clock.
+clock = timeit.default_timer
+
+
+class ResetTiming(object):
+    """Where the time of one reset went.
+
+    Durations are in seconds:
+        request_time: HTTP round trips to the ezOutlet, including name
+            resolution and connection setup when no pooled connection was
+            available, summed over attempts.
+        retry_wait_time: Backoff between attempts.
+        rate_limit_wait_time: Waiting for the rate limiter before
+            attempts.
+        validation_time: Checking the response.
+        wait_time: Waiting for the ezOutlet's on/off cycle (and the
+            device's post_reset_delay).
+        ready_time: Polling the readiness probe, if any.
+        total_time: The whole reset.
+
+    Used as a context manager around a reset: on exit, total_time, outcome
+    and error are filled in and the record is passed to each observer.
+    """
+
+    def __init__(self, hostname, observers=()):
+        """
+        Args:
+            hostname: Hostname or IP address of the ezOutlet.
+            observers: Callables to pass the finished record to.
+        """
+        self.hostname = hostname
+        self.started_at = time.time()
+        self.outcome = None
+        self.error = None
+        self.attempts = 0
+        self.coalesced = False
+        self.request_time = 0.0
+        self.retry_wait_time = 0.0
+        self.rate_limit_wait_time = 0.0
+        self.validation_time = 0.0
+        self.wait_time = 0.0
+        self.ready_time = 0.0
+        self.total_time = 0.0
+        self._observers = observers
+        self._start = clock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.total_time = clock() - self._start
+        if exc_type is None:
+            self.outcome = OUTCOME_OK
+        else:
+            self.outcome = OUTCOME_ERROR
+            self.error = str(exc_val)
+        notify(self._observers, self)
+
+    def add_attempt(self, seconds):
+        """Count one HTTP request, which took seconds."""
+        self.attempts += 1
+        self.request_time += seconds
+
+    def as_dict(self):
+        """Returns: The record as a JSON-serializable dict."""
+        return {
+            'hostname': self.hostname,
+            'started_at': self.started_at,
+            'outcome': self.outcome,
+            'error': self.error,
+            'attempts': self.attempts,
+            'coalesced': self.coalesced,
+            'request_time': self.request_time,
+            'retry_wait_time': self.retry_wait_time,
+            'rate_limit_wait_time': self.rate_limit_wait_time,
+            'validation_time': self.validation_time,
+            'wait_time': self.wait_time,
+            'ready_time': self.ready_time,
+            'total_time': self.total_time,
+        }
+
+    def __repr__(self):
+        return 'ResetTiming({0!r}, outcome={1!r}, total_time={2:.3f})'.format(self.hostname, self.outcome,
+                                                                              self.total_time)
+
+
+def notify(observers, timing):
+    """Pass timing to each observer, logging (not raising) their exceptions.
+
+    Returns: None
+    """
+    for observer in observers:
+        try:
+            observer(timing)
+        except Exception:
+            logger.exception(OBSERVER_FAILED_MSG.format(observer))
+
+
+class LoggingObserver(object):
+    """Logs one line per reset."""
+
+    def __init__(self, log=logger, level=logging.INFO):
+        """
+        Args:
+            log: logging.Logger to log to.
+            level: Level to log successful resets at. Failed resets are
+                logged at WARNING or above.
+        """
+        self._log = log
+        self._level = level
+
+    def __call__(self, timing):
+        level = self._level if timing.outcome == OUTCOME_OK else max(self._level, logging.WARNING)
+        suffix = ' (coalesced)' if timing.coalesced else ''
+        if timing.error is not None:
+            suffix += ': ' + timing.error
+        self._log.log(level, TIMING_LOG_MSG.format(suffix=suffix, **timing.as_dict()))
+
+
+class ResetMetrics(object):
+    """Per-host reset counters and latency histograms, kept in memory.
+
+    Metrics, each labelled by host:
+        <namespace>_resets_total: Resets, also labelled by outcome.
+        <namespace>_reset_attempts_total: HTTP requests sent.
+        <namespace>_reset_coalesced_total: Resets that joined another's.
+        <namespace>_reset_request_seconds: Histogram of request_time.
+        <namespace>_reset_wait_seconds: Histogram of wait_time plus
+            ready_time.
+        <namespace>_reset_duration_seconds: Histogram of total_time.
+
+    Safe to share between threads, e.g. among every outlet of a fleet.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, namespace=DEFAULT_NAMESPACE):
+        """
+        Args:
+            buckets: Histogram bucket upper bounds in seconds, ascending.
+            namespace: Prefix for metric names.
+        """
+        self._buckets = tuple(buckets)
+        self._namespace = namespace
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def __call__(self, timing):
+        host = timing.hostname
+        with self._lock:
+            self._inc('resets_total', (host, timing.outcome))
+            self._inc('reset_attempts_total', (host,), timing.attempts)
+            if timing.coalesced:
+                self._inc('reset_coalesced_total', (host,))
+            self._observe('reset_request_seconds', host, timing.request_time)
+            self._observe('reset_wait_seconds', host, timing.wait_time + timing.ready_time)
+            self._observe('reset_duration_seconds', host, timing.total_time)
+
+    def snapshot(self):
+        """Returns: dict with 'counters' mapping metric name to {label values: value}, and 'histograms'
+            mapping metric name to {host: {'buckets', 'sum', 'count'}}. Bucket counts are not cumulative.
+        """
+        with self._lock:
+            return {
+                'counters': dict((name, dict(values)) for name, values in self._counters.items()),
+                'histograms': dict((name, dict((host, h.as_dict()) for host, h in hosts.items()))
+                                   for name, hosts in self._histograms.items()),
+            }
+
+    def render(self):
+        """Returns: All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                full_name = '{0}_{1}'.format(self._namespace, name)
+                label_names = ('host', 'outcome') if name == 'resets_total' else ('host',)
+                lines.append('# TYPE {0} counter'.format(full_name))
+                for label_values, value in sorted(self._counters[name].items()):
+                    lines.append('{0}{1} {2}'.format(full_name, _labels(zip(label_names, label_values)),
+                                                     _number(value)))
+            for name in sorted(self._histograms):
+                full_name = '{0}_{1}'.format(self._namespace, name)
+                lines.append('# TYPE {0} histogram'.format(full_name))
+                for host, histogram in sorted(self._histograms[name].items()):
+                    lines.extend(histogram.render(full_name, host))
+        return ''.join(line + '\n' for line in lines)
+
+    def _inc(self, name, label_values, amount=1):
+        values = self._counters.setdefault(name, {})
+        values[label_values] = values.get(label_values, 0) + amount
+
+    def _observe(self, name, host, seconds):
+        hosts = self._histograms.setdefault(name, {})
+        if host not in hosts:
+            hosts[host] = _Histogram(self._buckets)
+        hosts[host].observe(seconds)
+
+
+class _Histogram(object):
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def as_dict(self):
+        return {'buckets': dict(zip(self._buckets + ('+Inf',), self._counts)), 'sum': self._sum,
+                'count': self._count}
+
+    def render(self, full_name, host):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float('inf'),), self._counts):
+            cumulative += count
+            labels = _labels([('host', host), ('le', _number(float(bound)))])
+            lines.append('{0}_bucket{1} {2}'.format(full_name, labels, cumulative))
+        labels = _labels([('host', host)])
+        lines.append('{0}_sum{1} {2}'.format(full_name, labels, _number(self._sum)))
+        lines.append('{0}_count{1} {2}'.format(full_name, labels, self._count))
+        return lines
+
+
+def _labels(pairs):
+    return '{' + ','.join('{0}="{1}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return '{0}'.format(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else '{0}'.format(value)
+
+
+class PrometheusObserver(object):
+    """Records the metrics of ResetMetrics with prometheus_client.
+
+    Requires the prometheus_client package (`pip install ezoutlet[prometheus]`).
+    """
+
+    def __init__(self, registry=None, namespace=DEFAULT_NAMESPACE, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            registry: prometheus_client CollectorRegistry to register with.
+                By default, prometheus_client's global registry.
+            namespace: Prefix for metric names.
+            buckets: Histogram bucket upper bounds in seconds, ascending.
+
+        Raises:
+            ImportError: If prometheus_client is not installed.
+        """
+        import prometheus_client
+
+        kwargs = {'namespace': namespace}
+        if registry is not None:
+            kwargs['registry'] = registry
+        self._resets = prometheus_client.Counter('resets', 'Resets.', ['host', 'outcome'], **kwargs)
+        self._attempts = prometheus_client.Counter('reset_attempts', 'HTTP requests sent.', ['host'], **kwargs)
+        self._coalesced = prometheus_client.Counter('reset_coalesced', "Resets that joined another's.", ['host'],
+                                                    **kwargs)
+        self._request = prometheus_client.Histogram('reset_request_seconds', 'HTTP round trip time.', ['host'],
+                                                    buckets=buckets, **kwargs)
+        self._wait = prometheus_client.Histogram('reset_wait_seconds', 'Wait for the device after a reset.',
+                                                 ['host'], buckets=buckets, **kwargs)
+        self._duration = prometheus_client.Histogram('reset_duration_seconds', 'Total reset time.', ['host'],
+                                                     buckets=buckets, **kwargs)
+
+    def __call__(self, timing):
+        host = timing.hostname
+        self._resets.labels(host, timing.outcome).inc()
+        self._attempts.labels(host).inc(timing.attempts)
+        if timing.coalesced:
+            self._coalesced.labels(host).inc()
+        self._request.labels(host).observe(timing.request_time)
+        self._wait.labels(host).observe(timing.wait_time + timing.ready_time)
+        self._duration.labels(host).observe(timing.total_time)
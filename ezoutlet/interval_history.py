@@ -0,0 +1,115 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+
+from . import constants
+from . import file_util
+
+
+class IntervalHistory(object):
+    """Per-host history of how long resets took, persisted as a JSON file.
+
+    A sample is the time from the ezOutlet acknowledging a reset until the
+    device was ready again, as measured by a readiness probe. Once a host has
+    enough samples, estimate() gives a high percentile of them, which
+    EzOutlet uses as its wait instead of a fixed delay.
+
+    Updates re-read the file while holding a lock file beside it (path +
+    '.lock'), so several processes may share one history.
+    """
+    DEFAULT_PATH = constants.DEFAULT_INTERVAL_HISTORY_PATH
+    DEFAULT_MAX_SAMPLES = 20
+    DEFAULT_MIN_SAMPLES = 3
+    DEFAULT_PERCENTILE = 90
+
+    def __init__(self, path=DEFAULT_PATH, max_samples=DEFAULT_MAX_SAMPLES, min_samples=DEFAULT_MIN_SAMPLES,
+                 percentile=DEFAULT_PERCENTILE):
+        """
+        Args:
+            path: JSON file to keep the history in. Created if missing.
+            max_samples: Number of most recent samples kept per host.
+            min_samples: Number of samples needed before estimate() gives a
+                learned value.
+            percentile: Percentile of samples used by estimate(), 0-100.
+        """
+        self._path = os.path.expanduser(path)
+        self._max_samples = max_samples
+        self._min_samples = min_samples
+        self._percentile = percentile
+        self._lock = threading.Lock()
+        self._samples = None
+
+    @property
+    def path(self):
+        return self._path
+
+    def samples(self, hostname):
+        """Returns: List of recorded samples for hostname, oldest first."""
+        with self._lock:
+            if self._samples is None:
+                self._samples = self._load()
+            return list(self._samples.get(hostname, []))
+
+    def record(self, hostname, seconds):
+        """Add a sample for hostname and save the history.
+
+        Args:
+            hostname: Hostname or IP address of the ezOutlet.
+            seconds: Time from reset acknowledgement until the device was
+                ready.
+
+        Returns: None
+        """
+        with self._lock:
+            file_util.makedirs(os.path.dirname(self._path) or '.')
+            with file_util.locked(self._path + '.lock'):
+                self._samples = self._load()
+                host_samples = self._samples.setdefault(hostname, [])
+                host_samples.append(round(seconds, 3))
+                del host_samples[:-self._max_samples]
+                self._save()
+
+    def estimate(self, hostname, default=None):
+        """Learned reset time for hostname.
+
+        Args:
+            hostname: Hostname or IP address of the ezOutlet.
+            default: Value to return if there are too few samples.
+
+        Returns: The configured percentile of hostname's samples, or default.
+        """
+        host_samples = self.samples(hostname)
+        if len(host_samples) < self._min_samples:
+            return default
+        return _percentile(sorted(host_samples), self._percentile)
+
+    def _load(self):
+        try:
+            with io.open(self._path, encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _save(self):
+        # Write-then-rename so readers never see a partial file.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self._path) or '.', prefix='.ezoutlet-history-')
+        with io.open(fd, 'wb') as f:
+            f.write(json.dumps(self._samples, sort_keys=True).encode('utf-8'))
+        file_util.replace(temp_path, self._path)
+
+
+def _percentile(sorted_samples, percentile):
+    """Nearest-rank percentile of a non-empty sorted list."""
+    rank = int(math.ceil(percentile / 100.0 * len(sorted_samples)))
+    return sorted_samples[max(rank, 1) - 1]
@@ -0,0 +1,291 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Inventory of named outlets and groups, loaded from a JSON file.
+
+Example::
+
+    {
+        "defaults": {"timeout": 5},
+        "outlets": {
+            "dut1": {"host": "192.168.1.12", "reset_interval": 5, "post_reset_delay": 60,
+                     "ready_tcp": "192.168.1.50:22"},
+            "dut2": "192.168.1.13"
+        },
+        "groups": {
+            "rack3": ["dut1", "dut2"],
+            "lab": ["@rack3", "192.168.1.99"]
+        }
+    }
+
+Targets are resolved by resolve(): "@name" is a group, which may contain
+outlet names, hosts and other groups; a name is an outlet; anything else
+is a host, which gets the outlet's options if some outlet has that host.
+Every outlet gets "defaults" for options it does not set.
+
+Outlet options (all optional):
+    timeout, connect_timeout, read_timeout: See EzOutlet.
+    reset_interval: ez_outlet_reset_interval; see EzOutlet.reset.
+    post_reset_delay: See EzOutlet.reset. With a readiness probe, the
+        longest time to poll it.
+    ready_tcp: "HOST:PORT" for a readiness.TcpProbe.
+    ready_http: URL for a readiness.HttpProbe.
+
+An outlet (or defaults) with a readiness probe must have a positive
+post_reset_delay, its own or from defaults, to poll the probe for.
+
+Command line options override the inventory's.
+
+Checking a large inventory costs more than the rest of a CLI run, so load()
+keeps a copy of each checked file, reused until the file changes. The copy
+is plain JSON, so a tampered cache can give a wrong inventory but cannot
+run code.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import numbers
+import os
+import tempfile
+
+from . import constants
+from . import exceptions
+from . import file_util
+
+NUMBER_OPTIONS = ('timeout', 'connect_timeout', 'read_timeout', 'reset_interval', 'post_reset_delay')
+STRING_OPTIONS = ('ready_tcp', 'ready_http')
+OPTIONS = NUMBER_OPTIONS + STRING_OPTIONS
+
+GROUP_PREFIX = '@'
+# Bump when the cache's layout or the checks made before caching change, so old caches are ignored.
+CACHE_FORMAT = 3
+
+INVALID_INVENTORY_MSG = "Invalid inventory {0}: {1}"
+UNKNOWN_GROUP_MSG = "Unknown group: {0}"
+GROUP_CYCLE_MSG = "Group {0} contains itself"
+
+
+class OutletConfig(object):
+    """One outlet's host and options."""
+
+    def __init__(self, host, name=None, options=None):
+        """
+        Args:
+            host: Hostname or IP address of the ezOutlet.
+            name: Inventory name of the outlet, or None.
+            options: dict of outlet options (see module docstring) which
+                are set.
+        """
+        self.host = host
+        self.name = name
+        self.options = dict(options or {})
+
+    def outlet_options(self):
+        """Returns: Keyword arguments for EzOutlet from the options set."""
+        return dict((key, self.options[key]) for key in ('timeout', 'connect_timeout', 'read_timeout')
+                    if key in self.options)
+
+    def reset_options(self):
+        """Returns: Keyword arguments for EzOutlet.reset from the options set, besides the readiness probe."""
+        options = {}
+        if 'post_reset_delay' in self.options:
+            options['post_reset_delay'] = self.options['post_reset_delay']
+        if 'reset_interval' in self.options:
+            options['ez_outlet_reset_interval'] = self.options['reset_interval']
+        return options
+
+    def __repr__(self):
+        return 'OutletConfig({0!r}, name={1!r})'.format(self.host, self.name)
+
+
+class Inventory(object):
+    """Named outlets and groups of them. See module docstring."""
+
+    def __init__(self, outlets=None, groups=None, defaults=None):
+        """
+        Args:
+            outlets: dict mapping names to OutletConfig.
+            groups: dict mapping group names (without '@') to lists of
+                targets.
+            defaults: dict of outlet options for every outlet.
+        """
+        self.outlets = dict(outlets or {})
+        self.groups = dict(groups or {})
+        self.defaults = dict(defaults or {})
+        self._by_host = dict((outlet.host, outlet) for outlet in self.outlets.values())
+
+    @classmethod
+    def from_dict(cls, data, source='<dict>'):
+        """Build an Inventory from parsed JSON.
+
+        Raises:
+            EzOutletError: If data is not a valid inventory.
+        """
+        def invalid(reason, *args):
+            return exceptions.EzOutletError(INVALID_INVENTORY_MSG.format(source, reason.format(*args)))
+
+        if not isinstance(data, dict):
+            raise invalid('expected an object')
+        unknown = set(data) - {'defaults', 'outlets', 'groups'}
+        if unknown:
+            raise invalid('unknown key {0!r}', sorted(unknown)[0])
+        defaults = _check_probe_window(_check_options(data.get('defaults', {}), invalid, 'defaults'), invalid,
+                                       'defaults')
+        outlets = {}
+        for name, entry in data.get('outlets', {}).items():
+            if not isinstance(entry, dict):
+                entry = {'host': entry}
+            entry = dict(entry)
+            host = entry.pop('host', None)
+            if not isinstance(host, type('')) or not host:
+                raise invalid('outlet {0!r} has no host', name)
+            options = dict(defaults)
+            options.update(_check_options(entry, invalid, 'outlet {0!r}'.format(name)))
+            _check_probe_window(options, invalid, 'outlet {0!r}'.format(name))
+            outlets[name] = OutletConfig(host=host, name=name, options=options)
+        groups = data.get('groups', {})
+        for name, members in groups.items():
+            if not isinstance(members, list) or not all(isinstance(m, type('')) for m in members):
+                raise invalid('group {0!r} must be a list of targets', name)
+        return cls(outlets=outlets, groups=groups, defaults=defaults)
+
+    def resolve(self, targets):
+        """Expand targets into outlets. See module docstring.
+
+        Args:
+            targets: Iterable of group references, outlet names and hosts.
+
+        Returns: List of OutletConfig, in the order given, each host at
+            most once.
+
+        Raises:
+            EzOutletError: If a group is unknown or contains itself.
+        """
+        resolved = []
+        seen = set()
+        for target in targets:
+            for outlet in self._resolve_target(target, ()):
+                if outlet.host not in seen:
+                    seen.add(outlet.host)
+                    resolved.append(outlet)
+        return resolved
+
+    def all_outlets(self):
+        """Returns: List of OutletConfig for every outlet and every host in a group, each host once."""
+        return self.resolve(sorted(self.outlets) + [GROUP_PREFIX + name for name in sorted(self.groups)])
+
+    def _resolve_target(self, target, groups_in_progress):
+        if target.startswith(GROUP_PREFIX):
+            name = target[len(GROUP_PREFIX):]
+            if name not in self.groups:
+                raise exceptions.EzOutletError(UNKNOWN_GROUP_MSG.format(target))
+            if name in groups_in_progress:
+                raise exceptions.EzOutletError(GROUP_CYCLE_MSG.format(target))
+            return [outlet for member in self.groups[name]
+                    for outlet in self._resolve_target(member, groups_in_progress + (name,))]
+        if target in self.outlets:
+            return [self.outlets[target]]
+        if target in self._by_host:
+            return [self._by_host[target]]
+        return [OutletConfig(host=target, options=self.defaults)]
+
+
+def _check_options(options, invalid, where):
+    if not isinstance(options, dict):
+        raise invalid('{0} must be an object', where)
+    for key, value in options.items():
+        if key not in OPTIONS:
+            raise invalid('{0} has unknown option {1!r}', where, key)
+        if key in NUMBER_OPTIONS and (not isinstance(value, numbers.Real) or isinstance(value, bool) or value < 0):
+            raise invalid('{0} option {1!r} must be a non-negative number', where, key)
+        if key in STRING_OPTIONS and not isinstance(value, type('')):
+            raise invalid('{0} option {1!r} must be a string', where, key)
+    return options
+
+
+def _check_probe_window(options, invalid, where):
+    if any(key in options for key in STRING_OPTIONS) and not options.get('post_reset_delay', 0) > 0:
+        raise invalid('{0} has a readiness probe, so needs a positive post_reset_delay to poll it for', where)
+    return options
+
+
+def load(path, cache_dir=constants.DEFAULT_INVENTORY_CACHE_DIR):
+    """Load an inventory file, from the cache if the file has not changed since it was cached.
+
+    Args:
+        path: JSON inventory file.
+        cache_dir: Directory to cache parsed inventories in, or None to
+            always parse.
+
+    Returns: Inventory
+
+    Raises:
+        EzOutletUsageError: If the file cannot be read.
+        EzOutletError: If the file is not a valid inventory.
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise exceptions.EzOutletUsageError(INVALID_INVENTORY_MSG.format(path, e.strerror))
+    key = [CACHE_FORMAT, path, stat.st_mtime, stat.st_size]
+    cache_path = None
+    if cache_dir is not None:
+        digest = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        cache_path = os.path.join(os.path.expanduser(cache_dir), 'inventory-{0}.json'.format(digest))
+        inventory = _read_cache(cache_path, key)
+        if inventory is not None:
+            return inventory
+
+    try:
+        with io.open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (IOError, OSError) as e:
+        raise exceptions.EzOutletUsageError(INVALID_INVENTORY_MSG.format(path, e.strerror))
+    except ValueError as e:
+        raise exceptions.EzOutletError(INVALID_INVENTORY_MSG.format(path, e))
+    inventory = Inventory.from_dict(data, source=path)
+
+    if cache_path is not None:
+        _write_cache(cache_path, key, inventory)
+    return inventory
+
+
+def _read_cache(cache_path, key):
+    """Returns: The Inventory cached under key, or None if there is none."""
+    try:
+        with io.open(cache_path, 'rb') as f:
+            cached = json.loads(f.read().decode('utf-8'))
+        if cached['key'] != key:
+            return None
+        # Checked before it was cached, so built directly rather than with from_dict.
+        outlets = dict((name, OutletConfig(host=host, name=name, options=options))
+                       for name, (host, options) in cached['outlets'].items())
+        return Inventory(outlets=outlets, groups=cached['groups'], defaults=cached['defaults'])
+    except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _write_cache(cache_path, key, inventory):
+    """Cache inventory under key. Failing to cache is not an error."""
+    directory = os.path.dirname(cache_path)
+    cached = {
+        'key': key,
+        'outlets': dict((name, [outlet.host, outlet.options]) for name, outlet in inventory.outlets.items()),
+        'groups': inventory.groups,
+        'defaults': inventory.defaults,
+    }
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.ezoutlet-inventory-')
+        with io.open(fd, 'wb') as f:
+            f.write(json.dumps(cached).encode('utf-8'))
+        file_util.replace(temp_path, cache_path)
+    except (IOError, OSError):
+        pass
@@ -0,0 +1,133 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""A thread-safe client for many outlets, shared by many worker threads.
+
+EzOutletPool keeps one EzOutlet per host, all sharing one connection pool,
+and a lock per host. Power operations (reset, turn_on, turn_off, cycle) on
+a host hold its lock, so they never interleave on one outlet; operations
+on different hosts run fully in parallel. status() takes no lock. The
+pool-wide lock only guards the host table, and is never held during a
+request or wait.
+
+What EzOutlet shares between threads is thread-safe on its own: the HTTP
+session (created under a lock), CircuitBreakerRegistry, RetryBudget,
+ResetCoordinator, IntervalHistory, CachingResolver, RateLimiter and
+ResetMetrics.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+
+from . import constants
+from . import ez_outlet
+
+
+class EzOutletPool(object):
+    """Thread-safe EzOutlets for many hosts. See module docstring."""
+
+    def __init__(self, timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT, session=None, interval_history=None,
+                 coordinator=None, retry_policy=None, circuit_breakers=None, connect_timeout=None, read_timeout=None,
+                 observers=(), resolver=None, rate_limiter=None,
+                 pool_connections=constants.DEFAULT_SHARED_POOL_CONNECTIONS,
+                 pool_maxsize=constants.DEFAULT_SHARED_POOL_MAXSIZE):
+        """
+        Args:
+            timeout: See EzOutlet.
+            session: requests.Session shared by every outlet. By default the
+                pool creates (and closes) one.
+            interval_history: See EzOutlet.
+            coordinator: See EzOutlet.
+            retry_policy: See EzOutlet.
+            circuit_breakers: See EzOutlet.
+            connect_timeout: See EzOutlet.
+            read_timeout: See EzOutlet.
+            observers: See EzOutlet.
+            resolver: See EzOutlet.
+            rate_limiter: See EzOutlet.
+            pool_connections: Number of hosts to keep connections to, if the
+                pool creates the session. See make_session().
+            pool_maxsize: Connections kept per host, if the pool creates the
+                session. See make_session().
+        """
+        self._owns_session = session is None
+        if session is None:
+            session = ez_outlet.make_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session = session
+        self._outlet_options = dict(timeout=timeout, session=session, interval_history=interval_history,
+                                    coordinator=coordinator, retry_policy=retry_policy,
+                                    circuit_breakers=circuit_breakers, connect_timeout=connect_timeout,
+                                    read_timeout=read_timeout, observers=observers, resolver=resolver,
+                                    rate_limiter=rate_limiter)
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the HTTP session, if it was created by this pool.
+
+        Returns: None
+        """
+        if self._owns_session:
+            self._session.close()
+
+    @property
+    def hostnames(self):
+        """Hosts used so far."""
+        with self._lock:
+            return list(self._hosts)
+
+    def outlet(self, hostname):
+        """Returns: The EzOutlet for hostname, created on first use."""
+        return self._host(hostname)[0]
+
+    def lock(self, hostname):
+        """Returns: hostname's lock, held by every power operation on it. Hold it to run several
+            operations on the outlet without others interleaving. It is reentrant.
+        """
+        return self._host(hostname)[1]
+
+    def reset(self, hostname, *args, **kwargs):
+        """EzOutlet.reset() for hostname, holding its lock."""
+        outlet, lock = self._host(hostname)
+        with lock:
+            return outlet.reset(*args, **kwargs)
+
+    def turn_on(self, hostname):
+        """EzOutlet.turn_on() for hostname, holding its lock."""
+        outlet, lock = self._host(hostname)
+        with lock:
+            return outlet.turn_on()
+
+    def turn_off(self, hostname):
+        """EzOutlet.turn_off() for hostname, holding its lock."""
+        outlet, lock = self._host(hostname)
+        with lock:
+            return outlet.turn_off()
+
+    def cycle(self, hostname, *args, **kwargs):
+        """EzOutlet.cycle() for hostname, holding its lock."""
+        outlet, lock = self._host(hostname)
+        with lock:
+            return outlet.cycle(*args, **kwargs)
+
+    def status(self, hostname, *args, **kwargs):
+        """EzOutlet.status() for hostname. Does not wait for power operations in progress."""
+        return self.outlet(hostname).status(*args, **kwargs)
+
+    def _host(self, hostname):
+        """Returns: Tuple of hostname's EzOutlet and lock."""
+        with self._lock:
+            host = self._hosts.get(hostname)
+            if host is None:
+                host = self._hosts[hostname] = (ez_outlet.EzOutlet(hostname=hostname, **self._outlet_options),
+                                                threading.RLock())
+            return host
@@ -0,0 +1,68 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Outlet status, as returned by EzOutlet.status().
+
+Querying status never power-cycles the outlet. The ezOutlet reports its
+relay state in a small XML document at STATUS_URL_PATH; firmware without
+that page still answers HTTP, so such outlets are reported reachable with
+an unknown (None) relay state.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import re
+
+# Unverified: guessed, not checked against EZ-11b firmware. Outlets without it are still reported reachable.
+STATUS_URL_PATH = '/xml/outlet_status.xml'
+RELAY_ON = 'on'
+RELAY_OFF = 'off'
+
+_RELAY_STATE_PATTERN = re.compile(r'<outlet_status>\s*([01])\s*</outlet_status>')
+_RELAY_STATES = {'0': RELAY_OFF, '1': RELAY_ON}
+
+
+def parse_relay_state(body):
+    """Returns: RELAY_ON or RELAY_OFF from a status page body, or None if it has no relay state."""
+    match = _RELAY_STATE_PATTERN.search(body)
+    return None if match is None else _RELAY_STATES[match.group(1)]
+
+
+def format_status_page(relay_on):
+    """Returns: Status page body for the given relay state, as the ezOutlet serves it."""
+    return '<response><outlet_status>{0}</outlet_status><site_lock>0</site_lock></response>'.format(
+        1 if relay_on else 0)
+
+
+class OutletStatus(object):
+    """Reachability and relay state of one ezOutlet."""
+
+    def __init__(self, hostname, reachable, latency=None, relay=None, error=None):
+        """
+        Args:
+            hostname: Hostname or IP address of the ezOutlet.
+            reachable: True if the ezOutlet answered HTTP.
+            latency: Time in seconds the status request took, or None if
+                it was not answered.
+            relay: RELAY_ON, RELAY_OFF, or None if unknown.
+            error: Why the ezOutlet is unreachable, or None.
+        """
+        self.hostname = hostname
+        self.reachable = reachable
+        self.latency = latency
+        self.relay = relay
+        self.error = error
+
+    def as_dict(self):
+        """Returns: JSON-serializable dict with target, reachable, latency and relay, plus error if any."""
+        result = {'target': self.hostname, 'reachable': self.reachable, 'latency': self.latency,
+                  'relay': self.relay}
+        if self.error is not None:
+            result['error'] = self.error
+        return result
+
+    def __repr__(self):
+        return 'OutletStatus({0!r}, reachable={1!r}, relay={2!r})'.format(self.hostname, self.reachable,
+                                                                          self.relay)
@@ -17,11 +17,19 @@ def print_error(msg):
 
 
 def print_help():
-    print(static_parser.get_help(), file=sys.stderr)
+    print(get_parser().get_help(), file=sys.stderr)
 
 
 def print_usage():
-    print(static_parser.get_usage(), file=sys.stderr)
+    print(get_parser().get_usage(), file=sys.stderr)
+
+
+def get_parser():
+    """Returns: The application's Parser, built on first use."""
+    global _parser
+    if _parser is None:
+        _parser = Parser()
+    return _parser
 
 
 class Parser(object):
@@ -30,6 +38,10 @@ class Parser(object):
         subparsers = self._parser.add_subparsers(dest='subcommand')
 
         _add_reset_parser(subparsers)
+        _add_status_parser(subparsers)
+        _add_power_parser(subparsers)
+        _add_serve_parser(subparsers)
+        _add_client_parser(subparsers)
         _add_version_parser(subparsers)
 
     def get_usage(self):
@@ -44,15 +56,193 @@ class Parser(object):
 
 def _add_reset_parser(subparsers):
     parser_reset = subparsers.add_parser('reset', help=constants.HELP_TEXT_RESET)
-    parser_reset.add_argument('target', help=constants.HELP_TEXT_TARGET_ARG)
+    parser_reset.add_argument('target', nargs='*', help=constants.HELP_TEXT_TARGET_ARG)
     parser_reset.add_argument(constants.RESET_TIME_ARG_LONG, constants.RESET_TIME_ARG_SHORT,
                               type=float,
-                              default=0,
                               help=constants.HELP_TEXT_RESET_TIME_ARG)
+    parser_reset.add_argument(constants.TARGETS_FILE_ARG_LONG, constants.TARGETS_FILE_ARG_SHORT,
+                              help=constants.HELP_TEXT_TARGETS_FILE_ARG)
+    _add_inventory_arg(parser_reset)
+    ready_group = parser_reset.add_mutually_exclusive_group()
+    ready_group.add_argument(constants.READY_TCP_ARG_LONG,
+                             metavar='HOST:PORT',
+                             help=constants.HELP_TEXT_READY_TCP_ARG)
+    ready_group.add_argument(constants.READY_HTTP_ARG_LONG,
+                             metavar='URL',
+                             help=constants.HELP_TEXT_READY_HTTP_ARG)
+    parser_reset.add_argument(constants.LEARN_INTERVALS_ARG_LONG,
+                              action='store_true',
+                              help=constants.HELP_TEXT_LEARN_INTERVALS_ARG)
+    parser_reset.add_argument(constants.INTERVAL_HISTORY_ARG_LONG,
+                              metavar='PATH',
+                              help=constants.HELP_TEXT_INTERVAL_HISTORY_ARG)
+    _add_lock_dir_arg(parser_reset)
+    parser_reset.add_argument(constants.CONNECT_TIMEOUT_ARG_LONG,
+                              type=float,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_CONNECT_TIMEOUT_ARG)
+    parser_reset.add_argument(constants.READ_TIMEOUT_ARG_LONG,
+                              type=float,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_READ_TIMEOUT_ARG)
+    parser_reset.add_argument(constants.DEADLINE_ARG_LONG,
+                              type=float,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_DEADLINE_ARG)
+    parser_reset.add_argument(constants.RETRIES_ARG_LONG,
+                              type=int,
+                              default=0,
+                              metavar='N',
+                              help=constants.HELP_TEXT_RETRIES_ARG)
+    parser_reset.add_argument(constants.RETRY_BACKOFF_ARG_LONG,
+                              type=float,
+                              default=constants.DEFAULT_RETRY_BACKOFF,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_RETRY_BACKOFF_ARG)
+    parser_reset.add_argument(constants.PARALLEL_ARG_LONG, constants.PARALLEL_ARG_SHORT,
+                              type=int,
+                              default=constants.DEFAULT_FLEET_MAX_WORKERS,
+                              help=constants.HELP_TEXT_PARALLEL_ARG)
+    parser_reset.add_argument(constants.PROCESSES_ARG_LONG,
+                              type=int,
+                              metavar='N',
+                              help=constants.HELP_TEXT_PROCESSES_ARG)
+    parser_reset.add_argument(constants.STREAM_ARG_LONG,
+                              action='store_true',
+                              help=constants.HELP_TEXT_STREAM_ARG)
+    parser_reset.add_argument(constants.RATE_ARG_LONG,
+                              type=float,
+                              metavar='RPS',
+                              help=constants.HELP_TEXT_RATE_ARG)
+    parser_reset.add_argument(constants.BURST_ARG_LONG,
+                              type=int,
+                              default=1,
+                              metavar='N',
+                              help=constants.HELP_TEXT_BURST_ARG)
+    parser_reset.add_argument(constants.STAGGER_ARG_LONG,
+                              type=float,
+                              default=0,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_RESET_STAGGER_ARG)
+    parser_reset.add_argument(constants.SUBNET_RATE_ARG_LONG,
+                              type=float,
+                              metavar='RPS',
+                              help=constants.HELP_TEXT_SUBNET_RATE_ARG)
+    parser_reset.add_argument(constants.GROUP_RATE_ARG_LONG,
+                              action='append',
+                              default=[],
+                              metavar='@GROUP=RPS',
+                              help=constants.HELP_TEXT_GROUP_RATE_ARG)
+
+
+def _add_status_parser(subparsers):
+    parser_status = subparsers.add_parser('status', help=constants.HELP_TEXT_STATUS)
+    parser_status.add_argument('target', nargs='*', help=constants.HELP_TEXT_STATUS_TARGET_ARG)
+    parser_status.add_argument(constants.TARGETS_FILE_ARG_LONG, constants.TARGETS_FILE_ARG_SHORT,
+                               help=constants.HELP_TEXT_TARGETS_FILE_ARG)
+    _add_inventory_arg(parser_status)
+    parser_status.add_argument(constants.STATUS_TIMEOUT_ARG_LONG,
+                               type=float,
+                               default=constants.DEFAULT_STATUS_TIMEOUT,
+                               metavar='SECONDS',
+                               help=constants.HELP_TEXT_STATUS_TIMEOUT_ARG)
+    parser_status.add_argument(constants.PARALLEL_ARG_LONG, constants.PARALLEL_ARG_SHORT,
+                               type=int,
+                               default=constants.DEFAULT_STATUS_MAX_WORKERS,
+                               help=constants.HELP_TEXT_STATUS_PARALLEL_ARG)
+
+
+def _add_power_parser(subparsers):
+    parser_power = subparsers.add_parser('power', help=constants.HELP_TEXT_POWER)
+    parser_power.add_argument('action', choices=constants.POWER_ACTIONS, help=constants.HELP_TEXT_POWER_ACTION_ARG)
+    parser_power.add_argument('target', nargs='*', help=constants.HELP_TEXT_POWER_TARGET_ARG)
+    parser_power.add_argument(constants.TARGETS_FILE_ARG_LONG, constants.TARGETS_FILE_ARG_SHORT,
+                              help=constants.HELP_TEXT_TARGETS_FILE_ARG)
+    _add_inventory_arg(parser_power)
+    parser_power.add_argument(constants.MAX_ON_ARG_LONG,
+                              type=int,
+                              metavar='N',
+                              help=constants.HELP_TEXT_MAX_ON_ARG)
+    parser_power.add_argument(constants.STAGGER_ARG_LONG,
+                              type=float,
+                              default=0,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_STAGGER_ARG)
+    parser_power.add_argument(constants.OFF_TIME_ARG_LONG,
+                              type=float,
+                              default=constants.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_OFF_TIME_ARG)
+    parser_power.add_argument(constants.PARALLEL_ARG_LONG, constants.PARALLEL_ARG_SHORT,
+                              type=int,
+                              default=constants.DEFAULT_FLEET_MAX_WORKERS,
+                              help=constants.HELP_TEXT_PARALLEL_ARG)
+
+
+def _add_serve_parser(subparsers):
+    parser_serve = subparsers.add_parser('serve', help=constants.HELP_TEXT_SERVE)
+    _add_daemon_address_args(parser_serve)
+    parser_serve.add_argument(constants.LEARN_INTERVALS_ARG_LONG,
+                              action='store_true',
+                              help=constants.HELP_TEXT_LEARN_INTERVALS_ARG)
+    parser_serve.add_argument(constants.INTERVAL_HISTORY_ARG_LONG,
+                              metavar='PATH',
+                              help=constants.HELP_TEXT_INTERVAL_HISTORY_ARG)
+    _add_lock_dir_arg(parser_serve)
+    parser_serve.add_argument(constants.INVENTORY_ARG_LONG,
+                              metavar='PATH',
+                              help=constants.HELP_TEXT_SERVE_INVENTORY_ARG)
+    parser_serve.add_argument(constants.DNS_TTL_ARG_LONG,
+                              type=float,
+                              default=constants.DEFAULT_DNS_TTL,
+                              metavar='SECONDS',
+                              help=constants.HELP_TEXT_DNS_TTL_ARG)
+
+
+def _add_client_parser(subparsers):
+    parser_client = subparsers.add_parser('client', help=constants.HELP_TEXT_CLIENT)
+    parser_client.add_argument('action', choices=constants.CLIENT_ACTIONS, help=constants.HELP_TEXT_CLIENT_ACTION_ARG)
+    parser_client.add_argument('target', nargs='*', help=constants.HELP_TEXT_TARGET_ARG)
+    _add_daemon_address_args(parser_client)
+    _add_inventory_arg(parser_client)
+    parser_client.add_argument(constants.RESET_TIME_ARG_LONG, constants.RESET_TIME_ARG_SHORT,
+                               type=float,
+                               default=0,
+                               help=constants.HELP_TEXT_RESET_TIME_ARG)
+    parser_client.add_argument(constants.STATUS_TIMEOUT_ARG_LONG,
+                               type=float,
+                               default=constants.DEFAULT_STATUS_TIMEOUT,
+                               help=constants.HELP_TEXT_CLIENT_STATUS_TIMEOUT_ARG)
+    parser_client.add_argument(constants.PARALLEL_ARG_LONG, constants.PARALLEL_ARG_SHORT,
+                               type=int,
+                               default=constants.DEFAULT_FLEET_MAX_WORKERS,
+                               help=constants.HELP_TEXT_PARALLEL_ARG)
+
+
+def _add_inventory_arg(parser):
+    parser.add_argument(constants.INVENTORY_ARG_LONG,
+                        metavar='PATH',
+                        help=constants.HELP_TEXT_INVENTORY_ARG)
+
+
+def _add_lock_dir_arg(parser):
+    parser.add_argument(constants.LOCK_DIR_ARG_LONG,
+                        metavar='DIR',
+                        help=constants.HELP_TEXT_LOCK_DIR_ARG)
+
+
+def _add_daemon_address_args(parser):
+    address_group = parser.add_mutually_exclusive_group()
+    address_group.add_argument(constants.SOCKET_ARG_LONG, constants.SOCKET_ARG_SHORT,
+                               metavar='PATH',
+                               help=constants.HELP_TEXT_SOCKET_ARG)
+    address_group.add_argument(constants.PORT_ARG_LONG,
+                               type=int,
+                               help=constants.HELP_TEXT_PORT_ARG)
 
 
 def _add_version_parser(subparsers):
     subparsers.add_parser('version', help=constants.HELP_TEXT_VERSION)
 
 
-static_parser = Parser()
+_parser = None
@@ -0,0 +1,246 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Fleet resets sharded across worker processes, for thousands of outlets.
+
+One process resetting thousands of outlets is limited by the CPU time of
+response handling and bookkeeping, and by its file descriptor limit.
+ProcessFleet splits the hosts into shards, one per worker process where
+possible, and each worker resets its shard with its own EzOutletFleet (its
+own threads, connection pool and single wait). Shard results are merged in
+the parent as each shard finishes.
+
+Each shard runs in a pool of its own, at most `processes` at a time, so a
+shard which fails as a whole (e.g. its worker raises, or dies and breaks
+its pool) maps only its own hosts to the error; other shards are
+unaffected. Failed shards are not retried, so no outlet is reset twice.
+
+Everything sent to workers must be picklable, so a ProcessFleet takes plain
+options rather than sessions, coordinators or policies: each worker has its
+own connections, retry policy and circuit state.
+
+iter_reset() yields results shard by shard, as each shard finishes.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import math
+import multiprocessing
+import pickle
+import time
+
+from concurrent import futures
+
+from . import constants
+from . import exceptions
+from . import ez_outlet
+from . import fleet
+from . import retry
+
+try:
+    import resource
+except ImportError:
+    # Windows has no resource module.
+    resource = None
+
+SHARD_FAILED_MSG = "Shard of {0} outlets failed: {1}"
+
+
+def size_pool(host_count, processes=None):
+    """Choose the number of worker processes and hosts per shard.
+
+    Processes default to one per CPU, but at most one per
+    DEFAULT_MIN_HOSTS_PER_PROCESS hosts. A shard keeps a connection open to
+    each of its hosts, so shards are also capped by the file descriptor
+    limit, less DEFAULT_FD_RESERVE; larger fleets get more shards than
+    processes.
+
+    Args:
+        host_count: Number of hosts to reset.
+        processes: Number of worker processes, or None to choose.
+
+    Returns: Tuple of number of processes and hosts per shard.
+    """
+    if processes is None:
+        processes = min(_cpu_count(), _ceil_div(host_count, constants.DEFAULT_MIN_HOSTS_PER_PROCESS))
+    processes = max(1, min(processes, host_count))
+    shard_size = min(_ceil_div(host_count, processes), max(_fd_limit() - constants.DEFAULT_FD_RESERVE, 1))
+    return processes, max(shard_size, 1)
+
+
+class ProcessFleet(object):
+    """Resets many ezOutlets from a pool of worker processes. See module docstring."""
+
+    def __init__(self, hostnames, processes=None, max_workers=constants.DEFAULT_FLEET_MAX_WORKERS,
+                 timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT, connect_timeout=None, read_timeout=None, retries=0,
+                 retry_backoff=constants.DEFAULT_RETRY_BACKOFF, outlet_options=None,
+                 executor_factory=futures.ProcessPoolExecutor):
+        """
+        Args:
+            hostnames: Hostnames or IP addresses of devices. Each is reset
+                once, however often it is given.
+            processes: Number of worker processes, or None to size the pool
+                from the CPU count and file descriptor limit. See
+                size_pool().
+            max_workers: Maximum number of reset requests in flight at once
+                in each worker process.
+            timeout: See EzOutlet.
+            connect_timeout: See EzOutlet.
+            read_timeout: See EzOutlet.
+            retries: Number of times each worker retries a failed request.
+                See retry.RetryPolicy.
+            retry_backoff: See retry.RetryPolicy.
+            outlet_options: See EzOutletFleet. Values must be picklable.
+            executor_factory: Callable taking max_workers and returning a
+                concurrent.futures Executor. One is created, with one
+                worker, for each shard.
+        """
+        self._hostnames = fleet.unique_hostnames(hostnames)
+        self._processes, self._shard_size = size_pool(len(self._hostnames), processes)
+        self._fleet_options = {
+            'max_workers': max_workers,
+            'timeout': timeout,
+            'connect_timeout': connect_timeout,
+            'read_timeout': read_timeout,
+            'outlet_options': outlet_options,
+        }
+        self._retry_options = {'max_attempts': retries + 1, 'backoff': retry_backoff}
+        self._executor_factory = executor_factory
+
+    @property
+    def hostnames(self):
+        return self._hostnames
+
+    @property
+    def processes(self):
+        """Number of worker processes used."""
+        return self._processes
+
+    @property
+    def shards(self):
+        """Lists of hostnames, each reset by one worker at a time."""
+        return [self._hostnames[i:i + self._shard_size] for i in range(0, len(self._hostnames), self._shard_size)]
+
+    def reset(self,
+              post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+              ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+              deadline=None, reset_options=None):
+        """Reset every outlet; each shard waits once, as EzOutletFleet.reset does.
+
+        Errors are not raised; they are returned in place of the response.
+
+        Args:
+            post_reset_delay: See EzOutletFleet.reset.
+            ez_outlet_reset_interval: See EzOutletFleet.reset.
+            deadline: Maximum time in seconds for the whole reset, counted
+                from this call (so shards started late get less), or None
+                for no limit.
+            reset_options: See EzOutletFleet.reset.
+
+        Returns: dict mapping each hostname to its HTTP response contents, or
+            to the exception raised while resetting it.
+        """
+        return dict(self.iter_reset(post_reset_delay=post_reset_delay,
+                                    ez_outlet_reset_interval=ez_outlet_reset_interval,
+                                    deadline=deadline, reset_options=reset_options))
+
+    def iter_reset(self,
+                   post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME,
+                   ez_outlet_reset_interval=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                   deadline=None, reset_options=None):
+        """Reset every outlet as reset() does, yielding results as each shard finishes.
+
+        Only one shard's results are held in the parent at a time.
+
+        Args: See reset().
+
+        Yields: Tuples of hostname and its HTTP response contents, or the
+            exception raised while resetting it.
+        """
+        for shard_results in self._iter_shards(post_reset_delay, ez_outlet_reset_interval, deadline, reset_options):
+            for result in shard_results.items():
+                yield result
+
+    def _iter_shards(self, post_reset_delay, ez_outlet_reset_interval, deadline, reset_options):
+        """Yields: dict of results for each shard, as it finishes."""
+        if not self._hostnames:
+            return
+        reset_args = {
+            'post_reset_delay': post_reset_delay,
+            'ez_outlet_reset_interval': ez_outlet_reset_interval,
+            'deadline_at': None if deadline is None else time.time() + deadline,
+            'reset_options': reset_options,
+        }
+        shards = iter(self.shards)
+        running = {}  # Future of each shard being reset: (shard, its executor)
+
+        def start_next():
+            shard = next(shards, None)
+            if shard is not None:
+                executor = self._executor_factory(max_workers=1)
+                future = executor.submit(_reset_shard, shard, self._fleet_options, self._retry_options, reset_args)
+                running[future] = (shard, executor)
+
+        try:
+            for _ in range(self._processes):
+                start_next()
+            while running:
+                for future in futures.wait(list(running), return_when=futures.FIRST_COMPLETED)[0]:
+                    shard, executor = running.pop(future)
+                    executor.shutdown()
+                    start_next()
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        error = exceptions.EzOutletError(SHARD_FAILED_MSG.format(len(shard), e))
+                        yield dict((hostname, error) for hostname in shard)
+        finally:
+            for _, executor in running.values():
+                executor.shutdown()
+
+
+def _reset_shard(hostnames, fleet_options, retry_options, reset_args):
+    """Reset one shard, in a worker process.
+
+    Returns: dict mapping each hostname to its response contents or a
+        picklable exception.
+    """
+    reset_args = dict(reset_args)
+    deadline_at = reset_args.pop('deadline_at')
+    if deadline_at is not None:
+        reset_args['deadline'] = max(deadline_at - time.time(), 0)
+    with fleet.EzOutletFleet(hostnames=hostnames, retry_policy=retry.RetryPolicy(**retry_options),
+                             **fleet_options) as ez_fleet:
+        results = ez_fleet.reset(**reset_args)
+    return dict((hostname, _picklable(result)) for hostname, result in results.items())
+
+
+def _picklable(result):
+    """Returns: result, or an EzOutletError with its message if it is an exception which cannot be pickled."""
+    if not isinstance(result, Exception):
+        return result
+    try:
+        pickle.loads(pickle.dumps(result))
+    except Exception:
+        return exceptions.EzOutletError(str(result))
+    return result
+
+
+def _cpu_count():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def _fd_limit():
+    if resource is None:
+        return constants.DEFAULT_FD_LIMIT
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return constants.DEFAULT_FD_LIMIT if soft == resource.RLIM_INFINITY else int(soft)
+
+
+def _ceil_div(a, b):
+    return int(math.ceil(float(a) / b))
@@ -0,0 +1,186 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Rate limiting: pace requests so a large fleet reset does not overload the network.
+
+A RateLimiter holds token buckets: optionally one for every request, one
+per subnet, and one per group of hosts added with add_group(). EzOutlets
+sharing a limiter call acquire() before each HTTP request, which waits
+until every bucket the host belongs to allows a request. Each bucket
+allows rate requests per second, in bursts of up to burst requests, and
+at least stagger seconds apart.
+
+Subnets are IPv4 networks of subnet_prefix bits. Hostnames are looked up
+with the limiter's resolver, if it has one; any other host is its own
+subnet.
+
+Callers claim their slot under the limiter's lock and sleep outside it, so
+many waiting threads are released in order, a slot apart, without polling.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import socket
+import struct
+import threading
+import time
+
+try:
+    import urlparse
+except ImportError:
+    # noinspection PyUnresolvedReferences
+    import urllib.parse as urlparse
+
+from . import constants
+from . import dns_cache
+from . import exceptions
+from . import instrumentation
+
+RATE_LIMIT_DEADLINE_MSG = "Rate limit allows the next request to {0} in {1:.3f} seconds, after the deadline."
+
+
+class TokenBucket(object):
+    """Limits the rate of requests, and spaces them apart. Not thread-safe; RateLimiter locks it.
+
+    The bucket is kept as the time at which it next holds a whole token
+    (the generic cell rate algorithm), so it needs no refill timer.
+    """
+
+    def __init__(self, rate=None, burst=1, stagger=0):
+        """
+        Args:
+            rate: Requests per second, or None for no limit.
+            burst: Number of requests allowed at once after the bucket has
+                been idle.
+            stagger: Minimum time in seconds between requests.
+        """
+        self._interval = 0.0 if rate is None else 1.0 / rate
+        self._tolerance = self._interval * (burst - 1)
+        self._stagger = stagger
+        self._full_at = None
+        self._last = None
+
+    def next_allowed(self, now):
+        """Returns: The earliest time, no earlier than now, at which a request is allowed."""
+        allowed = now
+        if self._full_at is not None:
+            allowed = max(allowed, self._full_at - self._tolerance)
+        if self._last is not None:
+            allowed = max(allowed, self._last + self._stagger)
+        return allowed
+
+    def take(self, at):
+        """Record a request sent at time at, which must be no earlier than next_allowed()."""
+        self._full_at = max(at if self._full_at is None else self._full_at, at) + self._interval
+        self._last = at
+
+
+class RateLimiter(object):
+    """Thread-safe limiter for requests to many hosts. See module docstring."""
+
+    def __init__(self, rate=None, burst=1, stagger=0, subnet_rate=None, subnet_burst=1,
+                 subnet_prefix=constants.DEFAULT_SUBNET_PREFIX, resolver=None):
+        """
+        Args:
+            rate: Requests per second to all hosts together, or None for no
+                limit.
+            burst: See TokenBucket.
+            stagger: Minimum time in seconds between any two requests.
+            subnet_rate: Requests per second to each subnet, or None for no
+                limit.
+            subnet_burst: See TokenBucket.
+            subnet_prefix: Number of bits in an IPv4 subnet's prefix.
+            resolver: CachingResolver to find the subnets of hostnames with,
+                or None to treat each hostname as its own subnet.
+        """
+        self._bucket = TokenBucket(rate, burst, stagger) if rate is not None or stagger > 0 else None
+        self._subnet_rate = subnet_rate
+        self._subnet_burst = subnet_burst
+        self._subnet_prefix = subnet_prefix
+        self._resolver = resolver
+        self._groups = []
+        self._subnet_buckets = {}
+        self._host_buckets = {}
+        self._lock = threading.Lock()
+
+    def add_group(self, hostnames, rate=None, burst=1, stagger=0):
+        """Limit requests to a group of hosts together, in addition to any other limits.
+
+        Args:
+            hostnames: Hostnames in the group.
+            rate: Requests per second to the group, or None for no limit.
+            burst: See TokenBucket.
+            stagger: Minimum time in seconds between requests to the group.
+
+        Returns: None
+        """
+        with self._lock:
+            self._groups.append((frozenset(hostnames), TokenBucket(rate, burst, stagger)))
+            self._host_buckets.clear()
+
+    def acquire(self, hostname, deadline_at=None):
+        """Wait until a request to hostname is allowed, and claim it.
+
+        Args:
+            hostname: Hostname or IP address of the ezOutlet, with its port
+                if any.
+            deadline_at: Time (as from time.time()) by which the request
+                must be sent, or None.
+
+        Returns: Time in seconds waited.
+
+        Raises:
+            EzOutletError: If the request would not be allowed before
+                deadline_at. Nothing is claimed.
+        """
+        buckets = self._buckets(hostname)
+        if not buckets:
+            return 0.0
+        with self._lock:
+            now = instrumentation.clock()
+            at = max(bucket.next_allowed(now) for bucket in buckets)
+            wait = at - now
+            if deadline_at is not None and time.time() + wait > deadline_at:
+                raise exceptions.EzOutletError(RATE_LIMIT_DEADLINE_MSG.format(hostname, wait))
+            for bucket in buckets:
+                bucket.take(at)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _buckets(self, hostname):
+        """Returns: List of the buckets limiting requests to hostname."""
+        with self._lock:
+            buckets = self._host_buckets.get(hostname)
+        if buckets is not None:
+            return buckets
+        # Looking the subnet up may take a while, so is done without the lock.
+        subnet = None if self._subnet_rate is None else self._subnet(hostname)
+        with self._lock:
+            buckets = [] if self._bucket is None else [self._bucket]
+            if subnet is not None:
+                if subnet not in self._subnet_buckets:
+                    self._subnet_buckets[subnet] = TokenBucket(self._subnet_rate, self._subnet_burst)
+                buckets.append(self._subnet_buckets[subnet])
+            buckets.extend(bucket for group, bucket in self._groups if hostname in group)
+            self._host_buckets[hostname] = buckets
+        return buckets
+
+    def _subnet(self, hostname):
+        """Returns: Key for hostname's subnet: its IPv4 network, else its address or name."""
+        host = urlparse.urlsplit('//' + hostname).hostname or hostname
+        address = host
+        if self._resolver is not None and not dns_cache._is_address(host):
+            try:
+                address = self._resolver.resolve(host)
+            except (socket.error, UnicodeError):
+                pass
+        try:
+            packed = socket.inet_aton(address)
+        except (socket.error, UnicodeError, ValueError):
+            return address
+        mask = (0xffffffff << (32 - self._subnet_prefix)) & 0xffffffff
+        network = socket.inet_ntoa(struct.pack(str('!I'), struct.unpack(str('!I'), packed)[0] & mask))
+        return '{0}/{1}'.format(network, self._subnet_prefix)
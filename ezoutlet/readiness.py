@@ -0,0 +1,113 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Readiness probes: detect when a device under test is back after a reset.
+
+A probe is any callable taking no arguments and returning True once the
+device is ready. Exceptions raised by a probe count as "not ready".
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import socket
+import time
+
+import requests
+
+from . import constants
+from . import exceptions
+
+NOT_READY_MSG = "Device not ready after {0} seconds."
+
+
+class TcpProbe(object):
+    """Ready when a TCP connection to host:port succeeds."""
+
+    def __init__(self, host, port, timeout=constants.DEFAULT_PROBE_TIMEOUT):
+        """
+        Args:
+            host: Hostname or IP address of the device under test.
+            port: TCP port to connect to.
+            timeout: Time in seconds to wait for each connection attempt.
+        """
+        self._address = (host, port)
+        self._timeout = timeout
+
+    def __call__(self):
+        try:
+            socket.create_connection(self._address, timeout=self._timeout).close()
+            return True
+        except (socket.error, socket.timeout):
+            return False
+
+    def __repr__(self):
+        return 'TcpProbe({0!r}, {1!r})'.format(*self._address)
+
+
+class HttpProbe(object):
+    """Ready when an HTTP GET to url gets a response.
+
+    If expected_status is given, the response must also have that status.
+    """
+
+    def __init__(self, url, expected_status=None, timeout=constants.DEFAULT_PROBE_TIMEOUT):
+        """
+        Args:
+            url: URL to GET.
+            expected_status: Required HTTP status code, or None to accept any.
+            timeout: Time in seconds to wait for each request.
+        """
+        self._url = url
+        self._expected_status = expected_status
+        self._timeout = timeout
+
+    def __call__(self):
+        try:
+            response = requests.get(self._url, timeout=self._timeout, proxies={"http": None, "https": None})
+        except requests.exceptions.RequestException:
+            return False
+        return self._expected_status is None or response.status_code == self._expected_status
+
+    def __repr__(self):
+        return 'HttpProbe({0!r})'.format(self._url)
+
+
+def wait_until_ready(probe, timeout,
+                     initial_interval=constants.DEFAULT_PROBE_INTERVAL,
+                     max_interval=constants.DEFAULT_PROBE_MAX_INTERVAL,
+                     backoff=constants.DEFAULT_PROBE_BACKOFF):
+    """Poll probe until it succeeds, backing off exponentially between tries.
+
+    The probe is always tried at least once, even if timeout is 0.
+
+    Args:
+        probe: Callable returning True when the device is ready.
+        timeout: Maximum time in seconds to keep polling.
+        initial_interval: Time in seconds between the first two tries.
+        max_interval: Maximum time in seconds between tries.
+        backoff: Factor the interval grows by after each failed try.
+
+    Returns: Time in seconds taken for the probe to succeed.
+
+    Raises:
+        EzOutletError: If the probe has not succeeded after timeout seconds.
+    """
+    start = time.time()
+    interval = initial_interval
+    while True:
+        if _try_probe(probe):
+            return time.time() - start
+        remaining = start + timeout - time.time()
+        if remaining <= 0:
+            raise exceptions.EzOutletError(NOT_READY_MSG.format(timeout))
+        time.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
+
+
+def _try_probe(probe):
+    try:
+        return bool(probe())
+    except Exception:
+        return False
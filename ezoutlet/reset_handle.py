@@ -0,0 +1,104 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+import time
+
+
+class ResetHandle(object):
+    """Completion handle for a reset started with EzOutlet.begin_reset().
+
+    The ezOutlet has already acknowledged the reset; the handle tracks when
+    the on/off cycle (plus any post-reset delay) is expected to be over.
+    """
+
+    def __init__(self, hostname, response, delay, coalesced=False):
+        """
+        Args:
+            hostname: Hostname or IP address of the device that was reset.
+            response: HTTP response contents of the reset request.
+            delay: Time in seconds from now until the reset is complete.
+            coalesced: True if this reset joined one already in progress
+                instead of sending its own request. See coordination module.
+        """
+        self._hostname = hostname
+        self._response = response
+        self._coalesced = coalesced
+        self._deadline = time.time() + delay
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._timer = None
+
+    @property
+    def hostname(self):
+        return self._hostname
+
+    @property
+    def response(self):
+        return self._response
+
+    @property
+    def coalesced(self):
+        return self._coalesced
+
+    @property
+    def deadline(self):
+        """Time (as from time.time()) at which the reset is complete."""
+        return self._deadline
+
+    def remaining(self):
+        """Returns: Seconds until the reset is complete; 0 if it is."""
+        return max(self._deadline - time.time(), 0)
+
+    def done(self):
+        """Returns: True if the reset is complete."""
+        return self.remaining() == 0
+
+    def wait(self, timeout=None):
+        """Block until the reset is complete, or for at most timeout seconds.
+
+        Args:
+            timeout: Maximum time in seconds to wait. None to wait for
+                completion.
+
+        Returns: True if the reset is complete.
+        """
+        delay = self.remaining()
+        if timeout is not None:
+            delay = min(delay, timeout)
+        if delay > 0:
+            time.sleep(delay)
+        return self.done()
+
+    def add_done_callback(self, fn):
+        """Call fn(handle) once the reset is complete.
+
+        If the reset is already complete, fn is called immediately in the
+        calling thread. Otherwise it is called from a timer thread.
+
+        Args:
+            fn: Callable taking this handle as its only argument.
+
+        Returns: None
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(fn)
+                if self._timer is None:
+                    self._timer = threading.Timer(self.remaining(), self._run_callbacks)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        fn(self)
+
+    def _run_callbacks(self):
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+            self._timer = None
+        for callback in callbacks:
+            callback(self)
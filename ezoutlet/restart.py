@@ -0,0 +1,253 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Restart callbacks for fuzzers such as boofuzz.
+
+EzOutlet.post_fail() resets the target and blocks for the whole power
+cycle. A RestartAdapter instead starts the reset (EzOutlet.begin_reset())
+and returns, so the fuzzer's own teardown and setup run while the outlet
+is off; it blocks only when the fuzzer is about to send the next test case
+(pre_send()) and the device is not back yet.
+
+With boofuzz, give the adapter as a restart callback and its pre_send as a
+pre-send callback::
+
+    restart = RestartAdapter(EzOutlet('192.168.1.12'), post_reset_delay=30,
+                             readiness_probe=readiness.TcpProbe('192.168.1.50', 22))
+    session = Session(target=target, restart_callbacks=[restart], pre_send_callbacks=[restart.pre_send])
+
+It also has the methods boofuzz calls on a target monitor (restart_target,
+pre_send, post_send, alive), so it may be given in Target(monitors=[...])
+instead.
+
+A restart is skipped if health_check says the target is fine, and a
+restart requested while a reset is pending joins it. With defer=True, the
+decision waits until the next pre_send(), giving the target time to
+recover by itself. stats records how much campaign time went to resets.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import threading
+
+from . import constants
+from . import instrumentation
+from . import readiness
+
+RESTART_STARTED_MSG = 'ezOutlet {0}: restarting target'
+RESTART_SKIPPED_MSG = 'ezOutlet {0}: target is healthy; restart skipped'
+RESTART_JOINED_MSG = 'ezOutlet {0}: restart already pending'
+RESTART_DONE_MSG = 'ezOutlet {0}: target back after {1:.3f}s ({2:.3f}s of it blocking)'
+
+
+class RestartStats(object):
+    """Where campaign time went to restarts. Times are in seconds."""
+
+    def __init__(self):
+        self.started_at = instrumentation.clock()
+        self.requested = 0
+        self.performed = 0
+        self.skipped = 0
+        self.joined = 0
+        self.failed = 0
+        self.reset_time = 0.0
+        self.blocked_time = 0.0
+
+    @property
+    def overlapped_time(self):
+        """Reset time during which the fuzzer was not blocked."""
+        return max(self.reset_time - self.blocked_time, 0.0)
+
+    def campaign_fraction(self):
+        """Returns: Fraction of the time since the stats were created which the fuzzer spent blocked on resets."""
+        elapsed = instrumentation.clock() - self.started_at
+        return self.blocked_time / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        """Returns: The stats as a JSON-serializable dict."""
+        return {
+            'requested': self.requested,
+            'performed': self.performed,
+            'skipped': self.skipped,
+            'joined': self.joined,
+            'failed': self.failed,
+            'reset_time': self.reset_time,
+            'blocked_time': self.blocked_time,
+            'overlapped_time': self.overlapped_time,
+            'campaign_fraction': self.campaign_fraction(),
+        }
+
+    def __repr__(self):
+        return 'RestartStats(performed={0}, skipped={1}, blocked_time={2:.3f})'.format(self.performed, self.skipped,
+                                                                                       self.blocked_time)
+
+
+class RestartAdapter(object):
+    """Fuzzer restart callback which power-cycles the target without blocking. See module docstring."""
+
+    def __init__(self, ez_outlet, post_reset_delay=0,
+                 ez_outlet_reset_interval=constants.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                 readiness_probe=None, health_check=None, defer=False):
+        """
+        Args:
+            ez_outlet: EzOutlet powering the target.
+            post_reset_delay: See EzOutlet.reset. With a readiness_probe,
+                the longest time to poll it.
+            ez_outlet_reset_interval: See EzOutlet.reset.
+            readiness_probe: Callable returning True once the target is up
+                after a reset, e.g. readiness.TcpProbe.
+            health_check: Callable returning True if the target is working,
+                so a restart is not needed. Exceptions count as unhealthy.
+            defer: If True, restart() only records the request; the next
+                pre_send() runs health_check, and resets (blocking) only if
+                the target is still unhealthy.
+        """
+        self._ez_outlet = ez_outlet
+        self._post_reset_delay = post_reset_delay
+        self._ez_outlet_reset_interval = ez_outlet_reset_interval
+        self._readiness_probe = readiness_probe
+        self._health_check = health_check
+        self._defer = defer
+        self._lock = threading.Lock()
+        # Held from checking for a pending reset until one is started, so concurrent restarts start only one.
+        self._start_lock = threading.Lock()
+        self._pending = None
+        self._deferred = False
+        self.stats = RestartStats()
+
+    def __call__(self, *args, **kwargs):
+        """Restart callback; see restart(). Arguments other than fuzz_data_logger are ignored."""
+        self.restart(fuzz_data_logger=kwargs.get('fuzz_data_logger'))
+
+    @property
+    def pending(self):
+        """True if a reset has been started and not yet waited for."""
+        return self._pending is not None
+
+    def restart(self, fuzz_data_logger=None):
+        """Start a reset of the target, unless it is healthy or a reset is already pending. Does not block
+        for the power cycle; see wait().
+
+        Args:
+            fuzz_data_logger: boofuzz logger to report to (log_info), or
+                None.
+
+        Returns: True if a reset was started or is pending, False if it was
+            skipped or deferred.
+
+        Raises:
+            EzOutletError: If the ezOutlet does not acknowledge the reset.
+        """
+        with self._start_lock:
+            with self._lock:
+                self.stats.requested += 1
+                if self._pending is not None:
+                    self.stats.joined += 1
+                    _log(fuzz_data_logger, RESTART_JOINED_MSG.format(self._ez_outlet.hostname))
+                    return True
+                if self._defer:
+                    self._deferred = True
+                    return False
+            return self._start(fuzz_data_logger)
+
+    def wait(self, fuzz_data_logger=None):
+        """Block until a pending reset is complete and the target is ready. Runs a deferred restart first.
+
+        Args:
+            fuzz_data_logger: boofuzz logger to report to, or None.
+
+        Returns: None
+
+        Raises:
+            EzOutletError: If the target does not become ready in time.
+        """
+        with self._start_lock:
+            with self._lock:
+                deferred, self._deferred = self._deferred, False
+                deferred = deferred and self._pending is None
+            if deferred:
+                self._start(fuzz_data_logger)
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        handle, reset_started = pending
+        start = instrumentation.clock()
+        try:
+            handle.wait()
+            if self._readiness_probe is not None:
+                ready_time = readiness.wait_until_ready(self._readiness_probe, timeout=self._post_reset_delay)
+                if not handle.coalesced:
+                    self._ez_outlet.record_reset_time(self._ez_outlet_reset_interval + ready_time)
+        except Exception:
+            with self._lock:
+                self.stats.failed += 1
+            raise
+        finally:
+            end = instrumentation.clock()
+            with self._lock:
+                self.stats.blocked_time += end - start
+                self.stats.reset_time += end - reset_started
+        _log(fuzz_data_logger, RESTART_DONE_MSG.format(self._ez_outlet.hostname, end - reset_started, end - start))
+
+    def _start(self, fuzz_data_logger):
+        """Start a reset unless health_check passes. Returns: True if started."""
+        if self._healthy():
+            with self._lock:
+                self.stats.skipped += 1
+            _log(fuzz_data_logger, RESTART_SKIPPED_MSG.format(self._ez_outlet.hostname))
+            return False
+        _log(fuzz_data_logger, RESTART_STARTED_MSG.format(self._ez_outlet.hostname))
+        post_reset_delay = 0 if self._readiness_probe is not None else self._post_reset_delay
+        start = instrumentation.clock()
+        try:
+            handle = self._ez_outlet.begin_reset(post_reset_delay=post_reset_delay,
+                                                 ez_outlet_reset_interval=self._ez_outlet_reset_interval)
+        except Exception:
+            with self._lock:
+                self.stats.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.stats.blocked_time += instrumentation.clock() - start
+        with self._lock:
+            self.stats.performed += 1
+            self._pending = (handle, start)
+        return True
+
+    def _healthy(self):
+        if self._health_check is None:
+            return False
+        try:
+            return bool(self._health_check())
+        except Exception:
+            return False
+
+    # boofuzz callback and monitor interface.
+
+    def pre_send(self, target=None, fuzz_data_logger=None, session=None, *args, **kwargs):
+        """Pre-send callback: wait() for any pending reset before the next test case."""
+        self.wait(fuzz_data_logger=fuzz_data_logger)
+
+    def restart_target(self, target=None, fuzz_data_logger=None, session=None, *args, **kwargs):
+        """Monitor interface: restart(). Returns: True, as the adapter handles restarts (skipped or not)."""
+        self.restart(fuzz_data_logger=fuzz_data_logger)
+        return True
+
+    def post_send(self, target=None, fuzz_data_logger=None, session=None, *args, **kwargs):
+        """Monitor interface. Returns: True; the adapter does not detect failures."""
+        return True
+
+    def post_start_target(self, target=None, fuzz_data_logger=None, session=None, *args, **kwargs):
+        """Monitor interface. Does nothing."""
+
+    def alive(self):
+        """Monitor interface. Returns: True."""
+        return True
+
+
+def _log(fuzz_data_logger, msg):
+    if fuzz_data_logger is not None:
+        fuzz_data_logger.log_info(msg)
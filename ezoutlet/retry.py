@@ -0,0 +1,143 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Retrying failed requests to an ezOutlet.
+
+A RetryPolicy decides whether, and after how long, a failed request is
+retried: up to max_attempts, with exponential backoff and random jitter so
+that many outlets retrying at once do not do so in lockstep. A RetryBudget,
+shared between policies or by one policy used for many outlets, caps the
+total rate of retries, so that an outage does not multiply the load on the
+network.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import random
+import threading
+import time
+
+import requests
+
+from . import constants
+
+# Connection failures and timeouts; ConnectTimeout and ReadTimeout are both.
+DEFAULT_RETRY_ON = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class RetryBudget(object):
+    """Thread-safe token bucket limiting how many retries may be made.
+
+    Up to max_retries retries may be made in a burst; after that, retries
+    are allowed at retries_per_second.
+    """
+
+    def __init__(self, max_retries=constants.DEFAULT_RETRY_BUDGET,
+                 retries_per_second=constants.DEFAULT_RETRY_BUDGET_RATE):
+        """
+        Args:
+            max_retries: Maximum number of retries in a burst.
+            retries_per_second: Rate at which retries become available again.
+        """
+        self._capacity = max_retries
+        self._rate = retries_per_second
+        self._tokens = float(max_retries)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take one retry from the budget.
+
+        Returns: True if a retry may be made; False if the budget is spent.
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    The default policy makes a single attempt.
+    """
+
+    def __init__(self, max_attempts=1, backoff=constants.DEFAULT_RETRY_BACKOFF,
+                 max_backoff=constants.DEFAULT_RETRY_MAX_BACKOFF, multiplier=constants.DEFAULT_RETRY_MULTIPLIER,
+                 jitter=constants.DEFAULT_RETRY_JITTER, retry_on=DEFAULT_RETRY_ON, budget=None, on_retry=None,
+                 seed=None):
+        """
+        Args:
+            max_attempts: Maximum number of attempts per request, including
+                the first.
+            backoff: Time in seconds to wait before the first retry.
+            max_backoff: Maximum time in seconds to wait before any retry.
+            multiplier: Factor the wait grows by after each retry.
+            jitter: Fraction (0-1) of each wait which is randomized: a wait of
+                w becomes uniformly distributed between w * (1 - jitter) and
+                w.
+            retry_on: Exception class, or tuple of classes, worth retrying.
+            budget: RetryBudget limiting retries; share one between policies
+                to limit them in total. None for no limit.
+            on_retry: Callable, called as on_retry(hostname, attempt, delay,
+                exception) before each retry, to report it.
+            seed: Seed for the jitter, for reproducible waits.
+        """
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._multiplier = multiplier
+        self._jitter = jitter
+        self._retry_on = retry_on
+        self._budget = budget
+        self._on_retry = on_retry
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def max_attempts(self):
+        return self._max_attempts
+
+    def backoff(self, attempt):
+        """Time in seconds to wait after a failed attempt.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 1.
+
+        Returns: Wait time, including jitter.
+        """
+        delay = min(self._backoff * self._multiplier ** (attempt - 1), self._max_backoff)
+        with self._random_lock:
+            return delay * (1 - self._jitter * self._random.random())
+
+    def next_delay(self, attempt, exception, hostname=None, max_delay=None):
+        """Decide whether to retry after a failed attempt.
+
+        A retry uses up one retry from the budget, and is reported to
+        on_retry. A retry given up for any reason does neither.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 1.
+            exception: Exception the attempt failed with.
+            hostname: Hostname of the ezOutlet, for on_retry.
+            max_delay: Time in seconds the wait must be shorter than, e.g.
+                the time left before a deadline; or None for no limit.
+
+        Returns: Time in seconds to wait before retrying, or None to give up.
+        """
+        if attempt >= self._max_attempts or not isinstance(exception, self._retry_on):
+            return None
+        delay = self.backoff(attempt)
+        if max_delay is not None and delay >= max_delay:
+            return None
+        if self._budget is not None and not self._budget.try_acquire():
+            return None
+        if self._on_retry is not None:
+            self._on_retry(hostname, attempt, delay, exception)
+        return delay
@@ -0,0 +1,298 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+"""Simulated ezOutlet EZ-11b devices, for testing without hardware.
+
+A SimulatedOutlet serves the ezOutlet CGI interface on 127.0.0.1, on a port
+of its own; pass its `hostname` to EzOutlet. A SimulatorFarm runs many of
+them in one process, sharing a single dispatcher thread.
+
+Faults can be injected per outlet: response latency, dropped connections,
+HTTP errors and malformed response bodies. The relay's off/on cycle is modelled, so
+tests can check how many power cycles a reset actually caused, and the status
+page reports the relay as off during a cycle. Outlets can also be switched
+off and on; turned_on_at records when each was switched back on.
+
+Run `python -m ezoutlet.simulator --count N` to serve N outlets until
+interrupted.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+try:
+    import selectors
+except ImportError:
+    # Python 2
+    # noinspection PyPackageRequirements
+    import selectors2 as selectors
+
+try:
+    # Python 2
+    import BaseHTTPServer as http_server
+    import SocketServer as socketserver
+except ImportError:
+    # Python 3
+    # noinspection PyUnresolvedReferences
+    import http.server as http_server
+    # noinspection PyUnresolvedReferences
+    import socketserver
+
+from . import ez_outlet
+from . import outlet_status
+
+MALFORMED_BODY = '<html>\x00garbage'
+DISPATCH_POLL_INTERVAL = 0.05
+
+
+class SimulatedOutlet(object):
+    """One simulated ezOutlet, serving on its own port."""
+
+    def __init__(self, relay_cycle_time=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                 latency=0, latency_jitter=0, drop_rate=0, error_rate=0, malformed_rate=0, seed=None):
+        """
+        Args:
+            relay_cycle_time: Time in seconds the relay stays off after a reset.
+            latency: Time in seconds to wait before answering each request.
+            latency_jitter: Extra random latency, uniform from 0 to this many
+                seconds.
+            drop_rate: Fraction (0-1) of requests whose connection is closed
+                without a response.
+            error_rate: Fraction (0-1) of requests answered with HTTP 500.
+            malformed_rate: Fraction (0-1) of requests answered with a
+                malformed body.
+            seed: Seed for fault injection, for reproducible runs.
+        """
+        self.relay_cycle_time = relay_cycle_time
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.requests_received = 0
+        self.resets_triggered = 0
+        self.resets_ignored = 0
+        self.turned_on_at = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._relay_on_at = 0
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(self))
+        self._dispatcher = None
+
+    @property
+    def hostname(self):
+        """Hostname (with port) to give EzOutlet."""
+        return '127.0.0.1:{0}'.format(self._server.server_address[1])
+
+    @property
+    def relay_on(self):
+        return time.time() >= self._relay_on_at
+
+    def start(self):
+        """Serve on a dispatcher thread of this outlet's own. Returns self."""
+        self._dispatcher = _Dispatcher([self])
+        self._dispatcher.start()
+        return self
+
+    def stop(self):
+        if self._dispatcher is not None:
+            self._dispatcher.stop()
+            self._dispatcher = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _handle_reset(self):
+        """Start a relay cycle, unless one is in progress.
+
+        Returns: Response status and body.
+        """
+        with self._lock:
+            if self.relay_on:
+                self._relay_on_at = time.time() + self.relay_cycle_time
+                self.resets_triggered += 1
+            else:
+                self.resets_ignored += 1
+        return 200, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+
+    def _handle_switch(self, on):
+        """Switch the relay on or off, ending any relay cycle.
+
+        Returns: Response status and body.
+        """
+        with self._lock:
+            if on:
+                if not self.relay_on:
+                    self.turned_on_at.append(time.time())
+                self._relay_on_at = 0
+            else:
+                self._relay_on_at = float('inf')
+        return 200, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+
+    def _handle(self, path):
+        """Handle one request.
+
+        Returns: Response status and body, or None to drop the connection.
+        """
+        with self._lock:
+            self.requests_received += 1
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            drop = self._random.random() < self.drop_rate
+            error = self._random.random() < self.error_rate
+            malformed = self._random.random() < self.malformed_rate
+        if delay:
+            time.sleep(delay)
+        if drop:
+            return None
+        if error:
+            return 500, 'Internal Server Error'
+        if path == ez_outlet.EzOutlet.RESET_URL_PATH:
+            status, body = self._handle_reset()
+        elif path in (ez_outlet.EzOutlet.TURN_ON_URL_PATH, ez_outlet.EzOutlet.TURN_OFF_URL_PATH):
+            status, body = self._handle_switch(on=path == ez_outlet.EzOutlet.TURN_ON_URL_PATH)
+        elif path == outlet_status.STATUS_URL_PATH:
+            status, body = 200, outlet_status.format_status_page(self.relay_on)
+        else:
+            status, body = 404, 'Not Found'
+        if malformed:
+            body = MALFORMED_BODY
+        return status, body
+
+
+class SimulatorFarm(object):
+    """Many simulated ezOutlets in one process, each on its own free port.
+
+    All outlets share one dispatcher thread; requests are then handled on
+    short-lived threads, as with a threading HTTP server.
+    """
+
+    def __init__(self, count, **outlet_options):
+        """
+        Args:
+            count: Number of outlets.
+            outlet_options: Keyword arguments for each SimulatedOutlet.
+        """
+        self.outlets = [SimulatedOutlet(**outlet_options) for _ in range(count)]
+        self._dispatcher = _Dispatcher(self.outlets)
+
+    @property
+    def hostnames(self):
+        return [outlet.hostname for outlet in self.outlets]
+
+    def start(self):
+        self._dispatcher.start()
+        return self
+
+    def stop(self):
+        self._dispatcher.stop()
+        for outlet in self.outlets:
+            outlet.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class _Dispatcher(object):
+    """Accepts connections for many servers from one thread."""
+
+    def __init__(self, outlets):
+        self._selector = selectors.DefaultSelector()
+        for outlet in outlets:
+            self._selector.register(outlet._server, selectors.EVENT_READ)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._selector.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            for key, _ in self._selector.select(timeout=DISPATCH_POLL_INTERVAL):
+                key.fileobj.handle_request()
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http_server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    # handle_request() is only called once select() reports a connection.
+    timeout = 0
+
+
+def _make_handler(outlet):
+    class Handler(http_server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; without this, Nagle's
+        # algorithm plus delayed ACKs add ~40 ms to every kept-alive request.
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            response = outlet._handle(self.path.split('?', 1)[0])
+            if response is None:
+                self.close_connection = True
+                return
+            status, body = response
+            body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Serve simulated ezOutlet EZ-11b devices on 127.0.0.1.')
+    parser.add_argument('--count', type=int, default=1, help='Number of outlets.')
+    parser.add_argument('--relay-cycle-time', type=float,
+                        default=ez_outlet.EzOutlet.DEFAULT_EZ_OUTLET_RESET_INTERVAL,
+                        help='Seconds the relay stays off after a reset.')
+    parser.add_argument('--latency', type=float, default=0, help='Seconds before answering each request.')
+    parser.add_argument('--drop-rate', type=float, default=0, help='Fraction of connections dropped.')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of HTTP 500 responses.')
+    parser.add_argument('--malformed-rate', type=float, default=0, help='Fraction of malformed responses.')
+    args = parser.parse_args(argv)
+
+    farm = SimulatorFarm(count=args.count,
+                         relay_cycle_time=args.relay_cycle_time,
+                         latency=args.latency,
+                         drop_rate=args.drop_rate,
+                         error_rate=args.error_rate,
+                         malformed_rate=args.malformed_rate)
+    with farm:
+        for hostname in farm.hostnames:
+            print(hostname)
+        sys.stdout.flush()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
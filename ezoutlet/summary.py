@@ -0,0 +1,64 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import json
+import sys
+
+from . import constants
+
+
+def summarize(target, result):
+    """Return a JSON-serializable summary of one target's result.
+
+    Args:
+        target: Hostname or IP address of the ezOutlet.
+        result: Response contents, or the exception raised.
+
+    Returns: dict
+    """
+    if isinstance(result, Exception):
+        return {'target': target, 'result': constants.FLEET_RESULT_ERROR, 'error': str(result)}
+    else:
+        return {'target': target, 'result': constants.FLEET_RESULT_OK, 'response': result}
+
+
+def print_statuses(statuses):
+    """Print one JSON line per outlet status.
+
+    Args:
+        statuses: Iterable of dicts, as from OutletStatus.as_dict().
+
+    Returns: EXIT_CODE_OK if every outlet is reachable, else EXIT_CODE_ERR.
+    """
+    exit_code = constants.EXIT_CODE_OK
+    for status in statuses:
+        if not status['reachable']:
+            exit_code = constants.EXIT_CODE_ERR
+        print(json.dumps(status, sort_keys=True))
+    return exit_code
+
+
+def print_summaries(summaries, flush=False):
+    """Print one JSON line per summary.
+
+    Args:
+        summaries: Iterable of summaries, each printed as soon as it is
+            produced.
+        flush: If True, flush STDOUT after each line, so that readers of a
+            pipe see it immediately.
+
+    Returns: EXIT_CODE_OK if every result is OK, else EXIT_CODE_ERR.
+    """
+    exit_code = constants.EXIT_CODE_OK
+    for s in summaries:
+        if s['result'] != constants.FLEET_RESULT_OK:
+            exit_code = constants.EXIT_CODE_ERR
+        print(json.dumps(s, sort_keys=True))
+        if flush:
+            sys.stdout.flush()
+    return exit_code
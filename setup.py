@@ -35,12 +35,14 @@ setup(
     url='https://github.com/jtpereyda/ezoutlet',
     description='Command line tool and Python API for ezOutlet EZ-11b',
     license='MIT',
-    packages=find_packages(exclude=['test']),
-    install_requires=['future', 'requests'],
+    packages=find_packages(exclude=['test', 'benchmarks']),
+    install_requires=['future', 'requests', 'futures; python_version < "3"',
+                      'selectors2; python_version < "3"'],
     extras_require={
         # This list is duplicated in tox.ini. Make sure to change both!
         # This can stop once tox supports installing package extras.
         'dev': ['mock', 'pytest'],
+        'prometheus': ['prometheus_client'],
     },
     classifiers=[
         'Development Status :: 4 - Beta',
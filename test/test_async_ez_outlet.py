@@ -0,0 +1,177 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+# Python 3.8+ only; see conftest.py.
+
+import asyncio
+import socket
+import unittest
+import unittest.mock as mock
+
+import ezoutlet.constants
+import ezoutlet.exceptions
+from ezoutlet import async_ez_outlet
+from ezoutlet import ez_outlet
+
+
+def _serve_and_run(body, coroutine_function, delay=0, status='200 OK'):
+    """Run coroutine_function(hostname) against a local server answering body with HTTP status.
+
+    Returns: Result of coroutine_function, and list of raw requests received.
+    """
+    requests_received = []
+
+    async def handle(reader, writer):
+        requests_received.append(await reader.readuntil(b'\r\n\r\n'))
+        await asyncio.sleep(delay)
+        writer.write('HTTP/1.0 {0}\r\nContent-Type: text/html\r\n\r\n{1}'.format(status, body).encode('ascii'))
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await coroutine_function('127.0.0.1:{0}'.format(port))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(main()), requests_received
+
+
+class TestAsyncEzOutlet(unittest.TestCase):
+    def setup_method(self, _):
+        self.post_reset_delay = 12.34
+        self.ez_outlet_reset_interval = 3.21
+
+    def test_reset_result(self):
+        """
+        Given: Local server answering EXPECTED_RESPONSE_CONTENTS.
+        When: Awaiting AsyncEzOutlet.reset(post_reset_delay, ez_outlet_reset_interval).
+        Then: A GET for RESET_URL_PATH is received.
+         and: Response contents are returned.
+         and: _wait_for_reset(post_reset_delay + ez_outlet_reset_interval) is awaited.
+        """
+        with mock.patch.object(async_ez_outlet.AsyncEzOutlet, '_wait_for_reset') as mock_wait:
+            result, received = _serve_and_run(
+                ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS,
+                lambda hostname: async_ez_outlet.AsyncEzOutlet(hostname).reset(
+                    post_reset_delay=self.post_reset_delay,
+                    ez_outlet_reset_interval=self.ez_outlet_reset_interval))
+
+        self.assertEqual(result, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertTrue(received[0].startswith(b'GET /reset.cgi HTTP/1.0\r\n'))
+        mock_wait.assert_awaited_once_with(self.post_reset_delay + self.ez_outlet_reset_interval)
+
+    def test_post_fail_awaits_reset(self):
+        """
+        Given: Local server answering EXPECTED_RESPONSE_CONTENTS.
+        When: Awaiting AsyncEzOutlet.post_fail() with fuzzer callback arguments.
+        Then: A GET for RESET_URL_PATH is received.
+         and: Response contents are returned, not a coroutine.
+        """
+        with mock.patch.object(async_ez_outlet.AsyncEzOutlet, '_wait_for_reset'):
+            result, received = _serve_and_run(
+                ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS,
+                lambda hostname: async_ez_outlet.AsyncEzOutlet(hostname).post_fail(target=None, session=None))
+
+        self.assertEqual(result, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertTrue(received[0].startswith(b'GET /reset.cgi HTTP/1.0\r\n'))
+
+    def test_reset_unexpected_response_raises(self):
+        """
+        Given: Local server answering '1,0'.
+        When: Awaiting AsyncEzOutlet.reset().
+        Then: EzOutletError is raised with EzOutlet.UNEXPECTED_RESPONSE_MSG.
+        """
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            _serve_and_run('1,0', lambda hostname: async_ez_outlet.AsyncEzOutlet(hostname).reset())
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG.format('1,0'))
+
+    def test_reset_http_error_raises(self):
+        """
+        Given: Local server answering EXPECTED_RESPONSE_CONTENTS with status 500.
+        When: Awaiting AsyncEzOutlet.reset().
+        Then: EzOutletError is raised with AsyncEzOutlet.HTTP_STATUS_MSG.
+        """
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            _serve_and_run(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS,
+                           lambda hostname: async_ez_outlet.AsyncEzOutlet(hostname).reset(),
+                           status='500 Internal Server Error')
+
+        self.assertEqual(str(e.exception),
+                         async_ez_outlet.AsyncEzOutlet.HTTP_STATUS_MSG.format('HTTP/1.0 500 Internal Server Error'))
+
+    def test_reset_no_response_raises(self):
+        """
+        Given: Local server which answers after the timeout.
+        When: Awaiting AsyncEzOutlet(timeout=0.05).reset().
+        Then: EzOutletError is raised with EzOutlet.NO_RESPONSE_MSG.
+        """
+        timeout = 0.05
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            _serve_and_run(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS,
+                           lambda hostname: async_ez_outlet.AsyncEzOutlet(hostname, timeout=timeout).reset(),
+                           delay=1)
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.NO_RESPONSE_MSG.format(timeout))
+
+    def test_reset_many_waits_once(self):
+        """
+        Given: Local server answering EXPECTED_RESPONSE_CONTENTS.
+        When: Awaiting reset_many() with several hostnames.
+        Then: Every hostname maps to the response contents.
+         and: _wait_for_reset is awaited once.
+        """
+        def reset_many(hostname):
+            return async_ez_outlet.reset_many([hostname, hostname.replace('127.0.0.1', 'localhost')],
+                                              max_concurrency=1)
+
+        with mock.patch.object(async_ez_outlet.AsyncEzOutlet, '_wait_for_reset') as mock_wait:
+            results, received = _serve_and_run(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS, reset_many)
+
+        self.assertEqual(set(results.values()), {ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS})
+        self.assertEqual(len(received), 2)
+        self.assertEqual(mock_wait.await_count, 1)
+
+    def test_reset_many_bounded_by_default(self):
+        """
+        Given: No max_concurrency.
+        When: Awaiting reset_many().
+        Then: Concurrent requests are limited to DEFAULT_FLEET_MAX_WORKERS.
+        """
+        with mock.patch('ezoutlet.async_ez_outlet.asyncio.Semaphore') as mock_semaphore:
+            asyncio.run(async_ez_outlet.reset_many([]))
+
+        mock_semaphore.assert_called_once_with(ezoutlet.constants.DEFAULT_FLEET_MAX_WORKERS)
+
+    def test_reset_connection_refused_raises(self):
+        """
+        Given: A local port nothing listens on.
+        When: Awaiting AsyncEzOutlet.reset() for it.
+        Then: EzOutletError is raised with EzOutlet.CONNECTION_ERROR_MSG.
+        """
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            asyncio.run(async_ez_outlet.AsyncEzOutlet('127.0.0.1:{0}'.format(port)).reset())
+
+        self.assertTrue(str(e.exception).startswith(ez_outlet.EzOutlet.CONNECTION_ERROR_MSG.format('')))
+
+    def test_unsupported_options_and_sync_api(self):
+        """
+        Given: Nothing.
+        When: Constructing AsyncEzOutlet with an EzOutlet-only option, and looking for EzOutlet's blocking methods.
+        Then: TypeError is raised, and the blocking methods do not exist.
+        """
+        with self.assertRaises(TypeError):
+            async_ez_outlet.AsyncEzOutlet('1.2.3.4', retry_policy=mock.MagicMock())
+        uut = async_ez_outlet.AsyncEzOutlet('1.2.3.4')
+        for name in ('turn_on', 'turn_off', 'cycle', 'status', 'begin_reset'):
+            self.assertFalse(hasattr(uut, name), name)
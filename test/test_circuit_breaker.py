@@ -0,0 +1,153 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+import ezoutlet.exceptions
+from ezoutlet import circuit_breaker
+
+
+@mock.patch('ezoutlet.circuit_breaker.time')
+class TestCircuitBreaker(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def make_open_breaker(self, mock_time):
+        mock_time.time.return_value = 100
+        uut = circuit_breaker.CircuitBreaker(self.hostname, failure_threshold=2, cool_down=30)
+        uut.record_failure()
+        uut.record_failure()
+        return uut
+
+    def test_opens_at_threshold(self, mock_time):
+        """
+        Given: A CircuitBreaker with failure_threshold=2.
+        When: Recording one failure, then another.
+        Then: It is closed after the first failure and open after the second.
+        """
+        mock_time.time.return_value = 100
+        uut = circuit_breaker.CircuitBreaker(self.hostname, failure_threshold=2)
+
+        uut.record_failure()
+        after_first = uut.state
+        uut.record_failure()
+
+        self.assertEqual(after_first, circuit_breaker.CLOSED)
+        self.assertEqual(uut.state, circuit_breaker.OPEN)
+
+    def test_success_resets_failures(self, mock_time):
+        """
+        Given: A CircuitBreaker with failure_threshold=2 and one failure recorded.
+        When: Recording a success, then a failure.
+        Then: It is closed.
+        """
+        mock_time.time.return_value = 100
+        uut = circuit_breaker.CircuitBreaker(self.hostname, failure_threshold=2)
+        uut.record_failure()
+
+        uut.record_success()
+        uut.record_failure()
+
+        self.assertEqual(uut.state, circuit_breaker.CLOSED)
+
+    def test_open_fails_fast(self, mock_time):
+        """
+        Given: An open CircuitBreaker, 10 seconds into a 30 second cool-down.
+        When: Calling before_request().
+        Then: CircuitOpenError is raised with CIRCUIT_OPEN_MSG.
+        """
+        uut = self.make_open_breaker(mock_time)
+        mock_time.time.return_value = 110
+
+        with self.assertRaises(ezoutlet.exceptions.CircuitOpenError) as e:
+            uut.before_request()
+
+        self.assertEqual(str(e.exception), circuit_breaker.CIRCUIT_OPEN_MSG.format(self.hostname, 2, 20))
+
+    def test_half_open_single_probe(self, mock_time):
+        """
+        Given: An open CircuitBreaker whose cool-down has passed.
+        When: Calling before_request() twice.
+        Then: It is half-open; the first call is allowed and the second raises CircuitOpenError.
+        """
+        uut = self.make_open_breaker(mock_time)
+        mock_time.time.return_value = 130
+
+        state = uut.state
+        uut.before_request()
+
+        self.assertEqual(state, circuit_breaker.HALF_OPEN)
+        with self.assertRaises(ezoutlet.exceptions.CircuitOpenError):
+            uut.before_request()
+
+    def test_probe_success_closes(self, mock_time):
+        """
+        Given: A half-open CircuitBreaker whose probe has been let through.
+        When: Recording a success.
+        Then: It is closed.
+        """
+        uut = self.make_open_breaker(mock_time)
+        mock_time.time.return_value = 130
+        uut.before_request()
+
+        uut.record_success()
+
+        self.assertEqual(uut.state, circuit_breaker.CLOSED)
+
+    def test_probe_failure_reopens(self, mock_time):
+        """
+        Given: A half-open CircuitBreaker whose probe has been let through.
+        When: Recording a failure.
+        Then: It is open for another cool-down.
+        """
+        uut = self.make_open_breaker(mock_time)
+        mock_time.time.return_value = 130
+        uut.before_request()
+
+        uut.record_failure()
+        mock_time.time.return_value = 159
+
+        self.assertEqual(uut.state, circuit_breaker.OPEN)
+
+
+class TestCircuitBreakerRegistry(unittest.TestCase):
+    def test_shared_breaker(self):
+        """
+        Given: A CircuitBreakerRegistry.
+        When: Getting the breaker for a hostname twice, and for another hostname.
+        Then: The same breaker is returned for the same hostname.
+         and: states() lists both hostnames.
+        """
+        uut = circuit_breaker.CircuitBreakerRegistry(failure_threshold=1)
+
+        first = uut.get('12.34.56.78')
+        first.record_failure()
+
+        self.assertIs(uut.get('12.34.56.78'), first)
+        self.assertEqual(uut.states(), {'12.34.56.78': circuit_breaker.OPEN})
+        uut.get('12.34.56.79')
+        self.assertEqual(uut.states(), {'12.34.56.78': circuit_breaker.OPEN, '12.34.56.79': circuit_breaker.CLOSED})
+
+    def test_reset(self):
+        """
+        Given: A CircuitBreakerRegistry with an open breaker.
+        When: Calling reset().
+        Then: The breaker is closed.
+        """
+        uut = circuit_breaker.CircuitBreakerRegistry(failure_threshold=1)
+        uut.get('12.34.56.78').record_failure()
+
+        uut.reset()
+
+        self.assertEqual(uut.states(), {'12.34.56.78': circuit_breaker.CLOSED})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import shutil
+import tempfile
+import threading
+import unittest
+
+import ezoutlet.exceptions
+from ezoutlet import coordination
+from ezoutlet import ez_outlet
+from ezoutlet import simulator
+
+
+class SlowReset(object):
+    """send_reset callable which blocks until released, counting calls."""
+
+    def __init__(self, response='0,0', exception=None):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self._response = response
+        self._exception = exception
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait()
+        if self._exception is not None:
+            raise self._exception
+        return self._response
+
+
+def run_in_thread(fn, results, key):
+    def target():
+        try:
+            results[key] = fn()
+        except Exception as e:
+            results[key] = e
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+class TestResetCoordinator(unittest.TestCase):
+    hostname = '255.254.253.252'
+
+    def test_concurrent_resets_coalesced(self):
+        """
+        Given: A ResetCoordinator.
+        When: Beginning a second reset of a hostname while its first reset request is in flight.
+        Then: Only one reset request is sent.
+         and: Both handles have its response.
+         and: Only the second handle is coalesced.
+        """
+        uut = coordination.ResetCoordinator()
+        send_reset = SlowReset()
+        results = {}
+
+        first = run_in_thread(lambda: uut.begin_reset(self.hostname, 60, send_reset), results, 'first')
+        send_reset.started.wait()
+        second = run_in_thread(lambda: uut.begin_reset(self.hostname, 60, send_reset), results, 'second')
+        send_reset.release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(send_reset.calls, 1)
+        self.assertEqual([results['first'].response, results['second'].response], ['0,0', '0,0'])
+        self.assertFalse(results['first'].coalesced)
+        self.assertTrue(results['second'].coalesced)
+
+    def test_join_during_wait(self):
+        """
+        Given: A ResetCoordinator with a reset of a hostname acknowledged and in progress.
+        When: Beginning another reset of that hostname, with a longer delay.
+        Then: No reset request is sent.
+         and: The handle is coalesced and completes after the longer delay.
+        """
+        uut = coordination.ResetCoordinator()
+        first = uut.begin_reset(self.hostname, 30, lambda: '0,0')
+
+        second = uut.begin_reset(self.hostname, 60, lambda: self.fail('reset sent'))
+
+        self.assertTrue(second.coalesced)
+        self.assertAlmostEqual(second.deadline, first.deadline + 30, delta=1)
+
+    def test_reset_after_cycle(self):
+        """
+        Given: A ResetCoordinator with a completed reset of a hostname.
+        When: Beginning another reset of that hostname.
+        Then: A new reset request is sent.
+        """
+        uut = coordination.ResetCoordinator()
+        uut.begin_reset(self.hostname, 0, lambda: '0,0')
+
+        handle = uut.begin_reset(self.hostname, 0, lambda: '1,1')
+
+        self.assertEqual(handle.response, '1,1')
+        self.assertFalse(handle.coalesced)
+
+    def test_other_hosts_independent(self):
+        """
+        Given: A ResetCoordinator with a reset of one hostname in progress.
+        When: Beginning a reset of another hostname.
+        Then: A reset request is sent for it.
+        """
+        uut = coordination.ResetCoordinator()
+        uut.begin_reset(self.hostname, 60, lambda: '0,0')
+
+        handle = uut.begin_reset('255.254.253.251', 60, lambda: '1,1')
+
+        self.assertEqual(handle.response, '1,1')
+        self.assertFalse(handle.coalesced)
+
+    def test_failure_shared_then_retried(self):
+        """
+        Given: A ResetCoordinator.
+        When: A reset request fails while a second caller is waiting to join it.
+        Then: Both callers get the exception.
+         and: The next reset sends a new request.
+        """
+        uut = coordination.ResetCoordinator()
+        error = ezoutlet.exceptions.EzOutletError('arbitrary message')
+        send_reset = SlowReset(exception=error)
+        results = {}
+
+        first = run_in_thread(lambda: uut.begin_reset(self.hostname, 60, send_reset), results, 'first')
+        send_reset.started.wait()
+        second = run_in_thread(lambda: uut.begin_reset(self.hostname, 60, send_reset), results, 'second')
+        send_reset.release.set()
+        first.join()
+        second.join()
+        handle = uut.begin_reset(self.hostname, 60, lambda: '0,0')
+
+        self.assertIs(results['first'], error)
+        self.assertIs(results['second'], error)
+        self.assertFalse(handle.coalesced)
+
+
+class TestFileResetCoordinator(unittest.TestCase):
+    hostname = '255.254.253.252:8080'
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_coalesced_across_coordinators(self):
+        """
+        Given: Two FileResetCoordinators on the same directory, as in two processes.
+        When: Beginning a reset with one, then with the other while the first is in progress.
+        Then: Only one reset request is sent.
+         and: The second handle is coalesced, with the first's response and deadline.
+        """
+        first = coordination.FileResetCoordinator(self.tmpdir).begin_reset(self.hostname, 60, lambda: '0,0')
+
+        second = coordination.FileResetCoordinator(self.tmpdir).begin_reset(self.hostname, 0,
+                                                                            lambda: self.fail('reset sent'))
+
+        self.assertTrue(second.coalesced)
+        self.assertEqual(second.response, '0,0')
+        self.assertAlmostEqual(second.deadline, first.deadline, places=3)
+
+    def test_reset_after_cycle(self):
+        """
+        Given: A FileResetCoordinator whose directory records a completed reset.
+        When: Beginning a reset with another FileResetCoordinator.
+        Then: A new reset request is sent.
+        """
+        coordination.FileResetCoordinator(self.tmpdir).begin_reset(self.hostname, 0, lambda: '0,0')
+
+        handle = coordination.FileResetCoordinator(self.tmpdir).begin_reset(self.hostname, 0, lambda: '1,1')
+
+        self.assertEqual(handle.response, '1,1')
+        self.assertFalse(handle.coalesced)
+
+
+class TestEzOutletCoordinated(unittest.TestCase):
+    def test_concurrent_resets_one_cycle(self):
+        """
+        Given: A running SimulatedOutlet.
+          and: Eight EzOutlets for it sharing a ResetCoordinator.
+        When: Calling reset() on all of them at once.
+        Then: The outlet receives one request and power-cycles once.
+         and: Every call returns EXPECTED_RESPONSE_CONTENTS.
+        """
+        coordinator = coordination.ResetCoordinator()
+        results = {}
+        with simulator.SimulatedOutlet(relay_cycle_time=0.2, latency=0.1) as outlet:
+            outlets = [ez_outlet.EzOutlet(hostname=outlet.hostname, coordinator=coordinator) for _ in range(8)]
+            threads = [run_in_thread(lambda o=o: o.reset(post_reset_delay=0, ez_outlet_reset_interval=0.2),
+                                     results, i)
+                       for i, o in enumerate(outlets)]
+            for thread in threads:
+                thread.join()
+            for o in outlets:
+                o.close()
+
+        self.assertEqual(outlet.requests_received, 1)
+        self.assertEqual(outlet.resets_triggered, 1)
+        self.assertEqual(set(results.values()), {ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+import pytest
+
+import ezoutlet
+import ezoutlet.constants
+import ezoutlet.exceptions
+from ezoutlet import circuit_breaker
+from ezoutlet import daemon
+from ezoutlet import daemon_client
+from ezoutlet import dns_cache
+from ezoutlet import ez_outlet
+from ezoutlet import simulator
+
+
+class RunningDaemon(object):
+    """Context manager running an EzOutletDaemon on a background thread."""
+
+    def __init__(self, address, **options):
+        self.daemon = daemon.EzOutletDaemon(address=address, **options)
+        self._thread = threading.Thread(target=self.daemon.serve_forever, kwargs={'poll_interval': 0.01})
+        self._thread.daemon = True
+
+    def __enter__(self):
+        self._thread.start()
+        return self.daemon
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.daemon.shutdown()
+        self._thread.join()
+        self.daemon.close()
+
+
+class TestEzOutletDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmpdir, 'daemon.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_ping_tcp(self):
+        """
+        Given: A daemon on a free local TCP port.
+        When: Sending ping from a DaemonClient.
+        Then: The daemon's version is returned.
+        """
+        with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+            response = daemon_client.DaemonClient(address=uut.address).ping()
+
+        self.assertEqual(response, {'version': ezoutlet.__version__})
+
+    def test_tcp_requires_token(self):
+        """
+        Given: A daemon on a free local TCP port.
+        When: Sending ping over a raw connection, without and with a wrong token.
+        Then: Both are rejected with DAEMON_TOKEN_REJECTED_MESSAGE.
+         and: The token file is readable only by its owner, and removed when the daemon closes.
+        """
+        with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+            token_path = daemon_client.get_token_path(uut.address)
+            responses = []
+            for request in ({'command': 'ping'}, {'command': 'ping', 'token': 'wrong'}):
+                sock = daemon_client.connect(uut.address, timeout=5)
+                try:
+                    sock.sendall(daemon_client.encode_message(request))
+                    responses.append(daemon_client.decode_message(sock.makefile('rb').readline()))
+                finally:
+                    sock.close()
+            if os.name == 'posix':
+                self.assertEqual(os.stat(token_path).st_mode & 0o777, 0o600)
+
+        self.assertEqual(responses, [{'error': ezoutlet.constants.DAEMON_TOKEN_REJECTED_MESSAGE}] * 2)
+        self.assertFalse(os.path.exists(token_path))
+
+    def test_tcp_token_missing(self):
+        """
+        Given: No token file for a TCP port.
+        When: Sending ping from a DaemonClient to that port.
+        Then: EzOutletError is raised with DAEMON_TOKEN_ERROR_MESSAGE, before connecting.
+        """
+        address = (ezoutlet.constants.DAEMON_HOST, 1)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            daemon_client.DaemonClient(address=address).ping()
+
+        self.assertTrue(str(e.exception).startswith(ezoutlet.constants.DAEMON_TOKEN_ERROR_MESSAGE.format(
+            daemon_client.get_token_path(address), '')))
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix domain sockets required")
+    def test_reset_unix_socket(self):
+        """
+        Given: A daemon on a Unix domain socket.
+          and: Two running SimulatedOutlets.
+        When: Sending reset for both from a DaemonClient, twice.
+        Then: Each outlet is reset twice.
+         and: One OK summary per target is returned each time, in order.
+         and: The socket file is removed when the daemon closes.
+        """
+        with simulator.SimulatorFarm(count=2, relay_cycle_time=0) as farm:
+            with RunningDaemon(address=self.socket_path):
+                client = daemon_client.DaemonClient(address=self.socket_path)
+                for _ in range(2):
+                    results = client.reset(targets=farm.hostnames, ez_outlet_reset_interval=0)
+
+                    self.assertEqual(results, [{'target': h,
+                                                'result': ezoutlet.constants.FLEET_RESULT_OK,
+                                                'response': ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS}
+                                               for h in farm.hostnames])
+
+        self.assertEqual([o.resets_triggered for o in farm.outlets], [2, 2])
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_status(self):
+        """
+        Given: A daemon on a free local TCP port.
+          and: A running SimulatedOutlet, and a local port nothing listens on.
+        When: Sending status for both from a DaemonClient.
+        Then: One status per target is returned, in order: the outlet reachable with its relay on, the other
+              unreachable.
+         and: The outlet is not reset.
+        """
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        dead = '127.0.0.1:{0}'.format(sock.getsockname()[1])
+        sock.close()
+        with simulator.SimulatedOutlet() as outlet:
+            with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+                results = daemon_client.DaemonClient(address=uut.address).status(targets=[outlet.hostname, dead],
+                                                                                 timeout=1)
+
+        self.assertEqual([(r['target'], r['reachable'], r['relay']) for r in results],
+                         [(outlet.hostname, True, 'on'), (dead, False, None)])
+        self.assertIn('error', results[1])
+        self.assertEqual(outlet.resets_triggered, 0)
+
+    def test_reset_failure_reported(self):
+        """
+        Given: A daemon on a free local TCP port.
+          and: A SimulatedOutlet with malformed_rate=1.
+        When: Sending reset from a DaemonClient.
+        Then: The target's summary has result 'error' and the error message.
+        """
+        with simulator.SimulatedOutlet(malformed_rate=1) as outlet:
+            with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+                results = daemon_client.DaemonClient(address=uut.address).reset(
+                    targets=[outlet.hostname], ez_outlet_reset_interval=0)
+
+        self.assertEqual(results, [{'target': outlet.hostname,
+                                    'result': ezoutlet.constants.FLEET_RESULT_ERROR,
+                                    'error': ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG.format(
+                                        simulator.MALFORMED_BODY)}])
+
+    def test_circuits(self):
+        """
+        Given: A daemon on a free local TCP port.
+        When: Sending reset for an address nothing listens on, then circuits, from a DaemonClient.
+        Then: The reset fails.
+         and: circuits lists the address, with its breaker still closed.
+        """
+        with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+            client = daemon_client.DaemonClient(address=uut.address)
+            results = client.reset(targets=['127.0.0.1:1'], ez_outlet_reset_interval=0)
+            circuits = client.circuits()
+
+        self.assertEqual(results[0]['result'], ezoutlet.constants.FLEET_RESULT_ERROR)
+        self.assertEqual(circuits, {'127.0.0.1:1': circuit_breaker.CLOSED})
+
+    def test_metrics(self):
+        """
+        Given: A daemon on a free local TCP port.
+          and: A running SimulatedOutlet.
+        When: Sending reset for the outlet, then metrics, from a DaemonClient.
+        Then: The metrics count one successful reset of the outlet, and have its request time histogram.
+        """
+        with simulator.SimulatedOutlet(relay_cycle_time=0) as outlet:
+            with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+                client = daemon_client.DaemonClient(address=uut.address)
+                client.reset(targets=[outlet.hostname], ez_outlet_reset_interval=0)
+                metrics = client.metrics()
+
+        self.assertIn('ezoutlet_resets_total{{host="{0}",outcome="ok"}} 1\n'.format(outlet.hostname), metrics)
+        self.assertIn('ezoutlet_reset_request_seconds_count{{host="{0}"}} 1\n'.format(outlet.hostname), metrics)
+
+    def test_reset_by_name(self):
+        """
+        Given: A SimulatedOutlet, and a name which only the daemon's resolver knows it by.
+          and: A daemon on a free local TCP port, having prefetched that name.
+        When: Sending reset for the name (with the outlet's port) from a DaemonClient.
+        Then: The outlet is reset, connecting to the prefetched address.
+        """
+        addresses = {'outlet.test': '127.0.0.1'}
+        resolver = dns_cache.CachingResolver(
+            getaddrinfo=lambda host, *_: [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (addresses[host], 0))])
+        with simulator.SimulatedOutlet(relay_cycle_time=0) as outlet:
+            target = 'outlet.test:{0}'.format(outlet.hostname.rsplit(':', 1)[1])
+            with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0), resolver=resolver) as uut:
+                self.assertEqual(uut.prefetch(['outlet.test']), {'outlet.test': '127.0.0.1'})
+                del addresses['outlet.test']
+                results = daemon_client.DaemonClient(address=uut.address).reset(targets=[target],
+                                                                                ez_outlet_reset_interval=0)
+
+            self.assertEqual([(r['target'], r['result']) for r in results],
+                             [(target, ezoutlet.constants.FLEET_RESULT_OK)])
+            self.assertEqual(outlet.resets_triggered, 1)
+
+    def test_unknown_command(self):
+        """
+        Given: A daemon on a free local TCP port.
+        When: Sending an unknown command from a DaemonClient.
+        Then: EzOutletError is raised with DAEMON_UNKNOWN_COMMAND_MESSAGE.
+        """
+        with RunningDaemon(address=(ezoutlet.constants.DAEMON_HOST, 0)) as uut:
+            with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+                daemon_client.DaemonClient(address=uut.address).request('frobnicate')
+
+        self.assertIn(ezoutlet.constants.DAEMON_UNKNOWN_COMMAND_MESSAGE.format('frobnicate'), str(e.exception))
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix domain sockets required")
+    def test_no_daemon(self):
+        """
+        Given: No daemon listening on a socket path.
+        When: Sending ping from a DaemonClient.
+        Then: EzOutletError is raised.
+        """
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError):
+            daemon_client.DaemonClient(address=self.socket_path).ping()
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix domain sockets required")
+    def test_stale_socket_replaced(self):
+        """
+        Given: A socket file left behind by a dead daemon.
+        When: Starting a daemon on the same path.
+        Then: The daemon starts and answers ping.
+        """
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+
+        with RunningDaemon(address=self.socket_path):
+            response = daemon_client.DaemonClient(address=self.socket_path).ping()
+
+        self.assertEqual(response, {'version': ezoutlet.__version__})
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix domain sockets required")
+    def test_already_running(self):
+        """
+        Given: A daemon running on a socket path.
+        When: Starting a second daemon on the same path.
+        Then: EzOutletError is raised with DAEMON_ALREADY_RUNNING_MESSAGE.
+        """
+        with RunningDaemon(address=self.socket_path):
+            with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+                daemon.EzOutletDaemon(address=self.socket_path)
+
+        self.assertEqual(str(e.exception), ezoutlet.constants.DAEMON_ALREADY_RUNNING_MESSAGE.format(self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import socket
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+import pytest
+
+from ezoutlet import dns_cache
+
+
+def _addrinfo(address):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 0))]
+
+
+@mock.patch('ezoutlet.dns_cache.time')
+class TestCachingResolver(unittest.TestCase):
+    hostname = 'outlet.example'
+
+    def setup_method(self, _):
+        self.getaddrinfo = mock.MagicMock(return_value=_addrinfo('10.0.0.1'))
+
+    def test_cached_until_ttl(self, mock_time):
+        """
+        Given: CachingResolver with ttl=60.
+        When: Resolving a hostname twice within 60 seconds, then again after.
+        Then: The first two give the address from a single lookup.
+         and: The third looks the hostname up again.
+        """
+        uut = dns_cache.CachingResolver(ttl=60, getaddrinfo=self.getaddrinfo)
+        mock_time.time.return_value = 100
+
+        assert uut.resolve(self.hostname) == '10.0.0.1'
+        mock_time.time.return_value = 159
+        assert uut.resolve(self.hostname) == '10.0.0.1'
+        assert self.getaddrinfo.call_count == 1
+
+        self.getaddrinfo.return_value = _addrinfo('10.0.0.2')
+        mock_time.time.return_value = 161
+        assert uut.resolve(self.hostname) == '10.0.0.2'
+        assert self.getaddrinfo.call_count == 2
+
+    def test_stale_fallback(self, mock_time):
+        """
+        Given: CachingResolver with ttl=60 and max_stale=100, which has resolved a hostname.
+        When: The ttl has passed and looking the hostname up fails.
+        Then: The last address is returned while within max_stale.
+         and: socket.gaierror is raised after that.
+        """
+        uut = dns_cache.CachingResolver(ttl=60, max_stale=100, getaddrinfo=self.getaddrinfo)
+        mock_time.time.return_value = 100
+        uut.resolve(self.hostname)
+        self.getaddrinfo.side_effect = socket.gaierror('DNS down')
+
+        mock_time.time.return_value = 200
+        assert uut.resolve(self.hostname) == '10.0.0.1'
+
+        mock_time.time.return_value = 261
+        with pytest.raises(socket.gaierror):
+            uut.resolve(self.hostname)
+
+    def test_unresolvable(self, mock_time):
+        """
+        Given: CachingResolver whose lookups fail.
+        When: Resolving a hostname it has never resolved.
+        Then: socket.gaierror is raised.
+        """
+        mock_time.time.return_value = 100
+        self.getaddrinfo.side_effect = socket.gaierror('DNS down')
+        uut = dns_cache.CachingResolver(getaddrinfo=self.getaddrinfo)
+
+        with pytest.raises(socket.gaierror):
+            uut.resolve(self.hostname)
+
+    def test_addresses_not_looked_up(self, mock_time):
+        """
+        Given: CachingResolver.
+        When: Resolving IPv4 and IPv6 addresses.
+        Then: They are returned unchanged, without a lookup.
+        """
+        _ = mock_time
+        uut = dns_cache.CachingResolver(getaddrinfo=self.getaddrinfo)
+
+        assert uut.resolve('192.168.1.12') == '192.168.1.12'
+        assert uut.resolve('::1') == '::1'
+        self.getaddrinfo.assert_not_called()
+
+    def test_prefetch(self, mock_time):
+        """
+        Given: CachingResolver whose lookups fail for one hostname.
+        When: Calling prefetch() with several hostnames.
+        Then: Each maps to its address, or to the exception for the failed one.
+         and: The resolved addresses are cached.
+        """
+        mock_time.time.return_value = 100
+
+        def getaddrinfo(hostname, *_):
+            if hostname == 'bad.example':
+                raise socket.gaierror('no such host')
+            return _addrinfo('10.0.0.{0}'.format(hostname[1]))
+        uut = dns_cache.CachingResolver(getaddrinfo=getaddrinfo)
+
+        results = uut.prefetch(['a1', 'a2', 'bad.example'])
+
+        assert results['a1'] == '10.0.0.1'
+        assert results['a2'] == '10.0.0.2'
+        assert isinstance(results['bad.example'], socket.gaierror)
+        assert uut.addresses() == {'a1': '10.0.0.1', 'a2': '10.0.0.2'}
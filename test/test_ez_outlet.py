@@ -2,12 +2,18 @@
 # This software may be modified and distributed under the terms
 # of the MIT license.  See the LICENSE file for details.
 
+import socket
 import unittest
 import requests
 
 import pytest
 
+import ezoutlet.circuit_breaker
+import ezoutlet.dns_cache
 import ezoutlet.exceptions
+import ezoutlet.instrumentation
+import ezoutlet.outlet_status
+import ezoutlet.retry
 
 try:
     import unittest.mock as mock
@@ -27,6 +33,13 @@ sample_url = 'DEAD STRINGS TELL NO TALES'
 PROXY_SETTINGS_NONE = {"http": None, "https": None}
 
 
+def _session_returning(*results):
+    """Return a mock Session whose get() yields results in order: exceptions are raised, strings are response texts."""
+    session = mock.MagicMock()
+    session.get.side_effect = [r if isinstance(r, Exception) else mock.MagicMock(text=r) for r in results]
+    return session
+
+
 # Suppress since PyCharm doesn't recognize @mock.patch.object
 # noinspection PyUnresolvedReferences
 @mock.patch.object(ez_outlet, '_get_url', return_value=sample_url)
@@ -49,7 +62,7 @@ class TestEzOutlet(unittest.TestCase):
 
     def configure_mock_requests(self, mock_requests):
         mock_requests.configure_mock(
-                **{'get.return_value': mock.MagicMock(
+                **{'Session.return_value.get.return_value': mock.MagicMock(
                         **{'text': self.expected_response_contents})})
 
     def test_reset_get(self, mock_time, mock_requests, mock_get_url):
@@ -58,7 +71,7 @@ class TestEzOutlet(unittest.TestCase):
           and: EzOutlet initialized with an IP address and timeout.
         When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
         Then: ez_outlet._get_url is called using the IP address with ez_outlet.RESET_URL_PATH.
-         and: requests.get(ez_outlet._get_url's result, timeout, proxies=PROXY_SETTINGS_NONE) is called.
+         and: Session.get(ez_outlet._get_url's result, timeout, proxies=PROXY_SETTINGS_NONE) is called.
         """
         _ = mock_time
 
@@ -71,7 +84,8 @@ class TestEzOutlet(unittest.TestCase):
 
         # Then
         mock_get_url.assert_called_with(self.hostname, ez_outlet.EzOutlet.RESET_URL_PATH)
-        mock_requests.get.assert_called_once_with(sample_url, timeout=self.timeout, proxies=PROXY_SETTINGS_NONE)
+        mock_requests.Session.return_value.get.assert_called_once_with(sample_url, timeout=self.timeout,
+                                                                       proxies=PROXY_SETTINGS_NONE)
 
     def test_reset_result(self, mock_time, mock_requests, mock_get_url):
         """
@@ -133,7 +147,8 @@ class TestEzOutletNoResponse(unittest.TestCase):
                                       timeout=self.timeout)
 
     def configure_mock_requests(self, mock_requests):
-        mock_requests.configure_mock(**{'get.side_effect': requests.exceptions.ConnectTimeout("Dummy reason")})
+        mock_requests.configure_mock(
+                **{'Session.return_value.get.side_effect': requests.exceptions.ConnectTimeout("Dummy reason")})
         mock_requests.exceptions = requests.exceptions  # Restore mocked-away exceptions
 
     def test_reset_no_response_get(self, mock_time, mock_requests, mock_get_url):
@@ -142,7 +157,7 @@ class TestEzOutletNoResponse(unittest.TestCase):
           and: EzOutlet initialized with an IP address and timeout.
         When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
         Then: ez_outlet._get_url is called using the IP address with ez_outlet.RESET_URL_PATH.
-         and: requests.get(ez_outlet._get_url's result, timeout, proxies=PROXY_SETTINGS_NONE) is called.
+         and: Session.get(ez_outlet._get_url's result, timeout, proxies=PROXY_SETTINGS_NONE) is called.
         """
         _ = mock_time
 
@@ -158,7 +173,8 @@ class TestEzOutletNoResponse(unittest.TestCase):
 
         # Then
         mock_get_url.assert_called_with(self.hostname, ez_outlet.EzOutlet.RESET_URL_PATH)
-        mock_requests.get.assert_called_once_with(sample_url, timeout=self.timeout, proxies=PROXY_SETTINGS_NONE)
+        mock_requests.Session.return_value.get.assert_called_once_with(sample_url, timeout=self.timeout,
+                                                                       proxies=PROXY_SETTINGS_NONE)
 
     def test_reset_no_response_raise(self, mock_time, mock_requests, mock_get_url):
         """
@@ -229,7 +245,7 @@ class TestEzOutletUnexpectedResponse(unittest.TestCase):
 
     def configure_mock_requests(self, mock_requests):
         mock_requests.configure_mock(
-                **{'get.return_value': mock.MagicMock(
+                **{'Session.return_value.get.return_value': mock.MagicMock(
                         **{'text': self.unexpected_response_contents})})
 
     def test_reset_unexpected_response_get(self, mock_time, mock_requests, mock_get_url):
@@ -238,7 +254,7 @@ class TestEzOutletUnexpectedResponse(unittest.TestCase):
           and: EzOutlet initialized with an IP address and timeout.
         When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
         Then: ez_outlet._get_url is called using the IP address with ez_outlet.RESET_URL_PATH.
-         and: requests.get(ez_outlet._get_url's result, timeout, proxies=PROXY_SETTINGS_NONE) is called.
+         and: Session.get(ez_outlet._get_url's result, timeout, proxies=PROXY_SETTINGS_NONE) is called.
         """
         _ = mock_time
 
@@ -254,7 +270,8 @@ class TestEzOutletUnexpectedResponse(unittest.TestCase):
 
         # Then
         mock_get_url.assert_called_with(self.hostname, ez_outlet.EzOutlet.RESET_URL_PATH)
-        mock_requests.get.assert_called_once_with(sample_url, timeout=self.timeout, proxies=PROXY_SETTINGS_NONE)
+        mock_requests.Session.return_value.get.assert_called_once_with(sample_url, timeout=self.timeout,
+                                                                       proxies=PROXY_SETTINGS_NONE)
 
     def test_reset_unexpected_response_raises(self, mock_time, mock_requests, mock_get_url):
         """
@@ -317,3 +334,676 @@ def test_url(hostname, expected_url):
     uut = ez_outlet.EzOutlet(hostname=hostname)
 
     assert expected_url == uut.url
+
+
+# Suppress since PyCharm doesn't recognize @mock.patch.object
+# noinspection PyUnresolvedReferences
+@mock.patch.object(ez_outlet, '_get_url', return_value=sample_url)
+@mock.patch('ezoutlet.ez_outlet.requests')
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletBeginReset(unittest.TestCase):
+    expected_response_contents = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+
+    def setup_method(self, _):
+        self.hostname = '12.34.56.78'
+        self.post_reset_delay = 12.34
+        self.ez_outlet_reset_interval = 3.21
+        self.uut = ez_outlet.EzOutlet(hostname=self.hostname)
+
+    @mock.patch('ezoutlet.reset_handle.time')
+    def test_begin_reset_handle(self, mock_handle_time, mock_time, mock_requests, mock_get_url):
+        """
+        Given: Mock requests module
+          and: EzOutlet initialized with an IP address.
+        When: Calling begin_reset(post_reset_delay, ez_outlet_reset_interval).
+        Then: A request is sent to the reset URL.
+         and: A ResetHandle is returned with the response and
+              deadline == now + post_reset_delay + ez_outlet_reset_interval.
+         and: time.sleep is not called.
+        """
+        _ = mock_get_url
+        mock_handle_time.time.return_value = 100
+        mock_requests.Session.return_value.get.return_value.text = self.expected_response_contents
+
+        handle = self.uut.begin_reset(post_reset_delay=self.post_reset_delay,
+                                      ez_outlet_reset_interval=self.ez_outlet_reset_interval)
+
+        mock_requests.Session.return_value.get.assert_called_once_with(
+            sample_url, timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT, proxies=PROXY_SETTINGS_NONE)
+        self.assertEqual(handle.hostname, self.hostname)
+        self.assertEqual(handle.response, self.expected_response_contents)
+        self.assertEqual(handle.deadline, 100 + self.post_reset_delay + self.ez_outlet_reset_interval)
+        mock_time.sleep.assert_not_called()
+        mock_handle_time.sleep.assert_not_called()
+
+    @mock.patch('ezoutlet.ez_outlet.readiness')
+    def test_reset_readiness_probe(self, mock_readiness, mock_time, mock_requests, mock_get_url):
+        """
+        Given: Mock requests module and mock readiness module.
+        When: Calling reset(post_reset_delay, ez_outlet_reset_interval, readiness_probe).
+        Then: time.sleep(ez_outlet_reset_interval) is called.
+         and: readiness.wait_until_ready(readiness_probe, timeout=post_reset_delay) is called.
+        """
+        _ = mock_get_url
+        mock_requests.Session.return_value.get.return_value.text = self.expected_response_contents
+        probe = mock.MagicMock()
+
+        self.uut.reset(post_reset_delay=self.post_reset_delay,
+                       ez_outlet_reset_interval=self.ez_outlet_reset_interval,
+                       readiness_probe=probe)
+
+        mock_time.sleep.assert_called_once_with(self.ez_outlet_reset_interval)
+        mock_readiness.wait_until_ready.assert_called_once_with(probe, timeout=self.post_reset_delay)
+
+    def test_begin_reset_unexpected_response_raises(self, mock_time, mock_requests, mock_get_url):
+        """
+        Given: Mock requests module configured to give an unexpected response.
+        When: Calling begin_reset().
+        Then: EzOutletError is raised.
+        """
+        _ = mock_time
+        _ = mock_get_url
+        mock_requests.Session.return_value.get.return_value.text = '1,0'
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError):
+            self.uut.begin_reset()
+
+
+@mock.patch('ezoutlet.ez_outlet.requests')
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletSession(unittest.TestCase):
+    def test_reuses_session(self, mock_time, mock_requests):
+        """
+        Given: Mock requests module.
+          and: EzOutlet without an explicit session.
+        When: Calling reset() twice.
+        Then: Only one Session is created, and both requests go through it.
+        """
+        _ = mock_time
+        mock_requests.Session.return_value.get.return_value.text = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+        uut = ez_outlet.EzOutlet(hostname='12.34.56.78')
+
+        uut.reset()
+        uut.reset()
+
+        mock_requests.Session.assert_called_once_with()
+        self.assertEqual(mock_requests.Session.return_value.get.call_count, 2)
+
+    def test_shared_session_not_closed(self, mock_time, mock_requests):
+        """
+        Given: A session passed to EzOutlet.
+        When: Calling reset() inside a `with` block.
+        Then: The given session is used.
+         and: The given session is not closed on exit.
+        """
+        _ = mock_time
+        session = mock.MagicMock()
+        session.get.return_value.text = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+
+        with ez_outlet.EzOutlet(hostname='12.34.56.78', session=session) as uut:
+            uut.reset()
+
+        session.get.assert_called_once_with(uut.url, timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT,
+                                            proxies=PROXY_SETTINGS_NONE)
+        session.close.assert_not_called()
+        mock_requests.Session.assert_not_called()
+
+    def test_owned_session_closed(self, mock_time, mock_requests):
+        """
+        Given: EzOutlet without an explicit session.
+        When: Calling reset() inside a `with` block.
+        Then: The EzOutlet's own session is closed on exit.
+        """
+        _ = mock_time
+        mock_requests.Session.return_value.get.return_value.text = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+
+        with ez_outlet.EzOutlet(hostname='12.34.56.78') as uut:
+            uut.reset()
+
+        mock_requests.Session.return_value.close.assert_called_once_with()
+
+
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletRetry(unittest.TestCase):
+    hostname = '12.34.56.78'
+    timeout = 11.12
+
+    def test_retry_then_succeed(self, mock_time):
+        """
+        Given: A session whose get raises ConnectTimeout, then ReadTimeout, then succeeds.
+          and: EzOutlet with a RetryPolicy of 3 attempts, backoff 0.5, no jitter, and an on_retry callback.
+        When: Calling reset(post_reset_delay=0, ez_outlet_reset_interval=0).
+        Then: EXPECTED_RESPONSE_CONTENTS is returned after 3 requests.
+         and: time.sleep is called with 0.5, then 1.0, before the requests are retried.
+         and: on_retry is called for attempts 1 and 2.
+        """
+        on_retry = mock.MagicMock()
+        session = _session_returning(requests.exceptions.ConnectTimeout(), requests.exceptions.ReadTimeout(),
+                                     ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session,
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=3, backoff=0.5, jitter=0,
+                                                                         on_retry=on_retry))
+
+        result = uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        self.assertEqual(result, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(mock_time.sleep.call_args_list, [mock.call(0.5), mock.call(1.0), mock.call(0)])
+        self.assertEqual([c[0][:3] for c in on_retry.call_args_list], [(self.hostname, 1, 0.5),
+                                                                       (self.hostname, 2, 1.0)])
+
+    def test_retries_exhausted(self, mock_time):
+        """
+        Given: A session whose get always raises ConnectTimeout.
+          and: EzOutlet with a RetryPolicy of 2 attempts.
+        When: Calling reset().
+        Then: EzOutletError is raised with NO_RESPONSE_MSG and the number of attempts.
+        """
+        _ = mock_time
+        session = _session_returning(requests.exceptions.ConnectTimeout(), requests.exceptions.ConnectTimeout())
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, timeout=self.timeout, session=session,
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=2))
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset()
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.RETRIES_EXHAUSTED_MSG.format(
+            ez_outlet.EzOutlet.NO_RESPONSE_MSG.format(self.timeout), 2))
+
+    def test_read_timeout_no_retry(self, mock_time):
+        """
+        Given: A session whose get raises ReadTimeout.
+          and: EzOutlet with the default RetryPolicy.
+        When: Calling reset().
+        Then: EzOutletError is raised with NO_RESPONSE_MSG, after one request.
+        """
+        session = _session_returning(requests.exceptions.ReadTimeout())
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, timeout=self.timeout, session=session)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset()
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.NO_RESPONSE_MSG.format(self.timeout))
+        session.get.assert_called_once()
+        mock_time.sleep.assert_not_called()
+
+    def test_connection_error(self, mock_time):
+        """
+        Given: A session whose get raises ConnectionError.
+          and: EzOutlet with the default RetryPolicy.
+        When: Calling reset().
+        Then: EzOutletError is raised with CONNECTION_ERROR_MSG.
+        """
+        _ = mock_time
+        error = requests.exceptions.ConnectionError('connection reset')
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=_session_returning(error))
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset()
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.CONNECTION_ERROR_MSG.format(error))
+
+
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletCircuitBreaker(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def test_fail_fast(self, mock_time):
+        """
+        Given: A session whose get always raises ConnectTimeout.
+          and: Two EzOutlets for the same hostname sharing a CircuitBreakerRegistry with failure_threshold=2.
+        When: Calling reset() on each, then once more.
+        Then: The first two calls raise EzOutletError after a request.
+         and: The third raises CircuitOpenError without a request.
+        """
+        _ = mock_time
+        session = mock.MagicMock()
+        session.get.side_effect = requests.exceptions.ConnectTimeout()
+        registry = ezoutlet.circuit_breaker.CircuitBreakerRegistry(failure_threshold=2)
+        uuts = [ez_outlet.EzOutlet(hostname=self.hostname, session=session, circuit_breakers=registry)
+                for _ in range(2)]
+
+        for uut in uuts:
+            with self.assertRaises(ezoutlet.exceptions.EzOutletError):
+                uut.reset()
+        with self.assertRaises(ezoutlet.exceptions.CircuitOpenError):
+            uuts[0].reset()
+
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(registry.states(), {self.hostname: ezoutlet.circuit_breaker.OPEN})
+
+    def test_success_keeps_closed(self, mock_time):
+        """
+        Given: A session whose get raises ConnectTimeout, then succeeds, then raises ConnectTimeout.
+          and: EzOutlet with a CircuitBreakerRegistry with failure_threshold=2.
+        When: Calling reset() three times.
+        Then: The breaker is still closed.
+        """
+        _ = mock_time
+        session = mock.MagicMock()
+        session.get.side_effect = [requests.exceptions.ConnectTimeout(),
+                                   mock.MagicMock(text=ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS),
+                                   requests.exceptions.ConnectTimeout()]
+        registry = ezoutlet.circuit_breaker.CircuitBreakerRegistry(failure_threshold=2)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, circuit_breakers=registry)
+
+        for _ in range(3):
+            try:
+                uut.reset()
+            except ezoutlet.exceptions.EzOutletError:
+                pass
+
+        self.assertEqual(registry.states(), {self.hostname: ezoutlet.circuit_breaker.CLOSED})
+
+    def test_half_open_probe_kept_on_rate_limit_deadline(self, mock_time):
+        """
+        Given: A session whose get raises ConnectTimeout, then succeeds.
+          and: EzOutlet with a CircuitBreakerRegistry (failure_threshold=1, cool_down=0) and a rate limiter which
+               fails the second request for its deadline.
+        When: Calling reset() three times: failing, timed out by the rate limiter while half-open, then again.
+        Then: The third call sends its request as the half-open probe, and closes the breaker.
+        """
+        _ = mock_time
+        session = mock.MagicMock()
+        session.get.side_effect = [requests.exceptions.ConnectTimeout(),
+                                   mock.MagicMock(text=ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)]
+        rate_limiter = mock.MagicMock()
+        rate_limiter.acquire.side_effect = [0, ezoutlet.exceptions.EzOutletError('rate limited'), 0]
+        registry = ezoutlet.circuit_breaker.CircuitBreakerRegistry(failure_threshold=1, cool_down=0)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, circuit_breakers=registry,
+                                 rate_limiter=rate_limiter)
+
+        for _ in range(2):
+            with self.assertRaises(ezoutlet.exceptions.EzOutletError):
+                uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+        uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        self.assertEqual(session.get.call_count, 2)
+        self.assertEqual(registry.states(), {self.hostname: ezoutlet.circuit_breaker.CLOSED})
+
+
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletTimeouts(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def test_split_timeouts(self, mock_time):
+        """
+        Given: EzOutlet with connect_timeout=0.2 and read_timeout=5.
+        When: Calling reset().
+        Then: Session.get is called with timeout=(0.2, 5).
+        """
+        _ = mock_time
+        session = _session_returning(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, connect_timeout=0.2, read_timeout=5)
+
+        uut.reset()
+
+        self.assertEqual(session.get.call_args[1]['timeout'], (0.2, 5))
+
+    def test_connect_timeout_default_read(self, mock_time):
+        """
+        Given: EzOutlet with timeout=7 and connect_timeout=0.2.
+        When: Calling reset().
+        Then: Session.get is called with timeout=(0.2, 7).
+        """
+        _ = mock_time
+        session = _session_returning(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, timeout=7, connect_timeout=0.2)
+
+        uut.reset()
+
+        self.assertEqual(session.get.call_args[1]['timeout'], (0.2, 7))
+
+    def test_connect_timeout_message(self, mock_time):
+        """
+        Given: A session whose get raises ConnectTimeout.
+          and: EzOutlet with connect_timeout=0.2.
+        When: Calling reset().
+        Then: EzOutletError is raised with NO_RESPONSE_MSG for the connect timeout.
+        """
+        _ = mock_time
+        session = _session_returning(requests.exceptions.ConnectTimeout())
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, connect_timeout=0.2)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset()
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.NO_RESPONSE_MSG.format(0.2))
+
+    def test_deadline_caps_request_timeout(self, mock_time):
+        """
+        Given: EzOutlet with the default timeout, with the clock stopped.
+        When: Calling reset(post_reset_delay=0, ez_outlet_reset_interval=1, deadline=3).
+        Then: Session.get is called with timeout=(2, 2), leaving time for the wait.
+         and: time.sleep(1) is called.
+        """
+        mock_time.time.return_value = 100
+        session = _session_returning(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        uut.reset(post_reset_delay=0, ez_outlet_reset_interval=1, deadline=3)
+
+        self.assertEqual(session.get.call_args[1]['timeout'], (2, 2))
+        mock_time.sleep.assert_called_once_with(1)
+
+    def test_deadline_too_short_for_wait(self, mock_time):
+        """
+        Given: EzOutlet, with the clock stopped.
+        When: Calling reset(post_reset_delay=10, ez_outlet_reset_interval=3, deadline=5).
+        Then: EzOutletError is raised with DEADLINE_EXCEEDED_MSG, without sleeping.
+         and: No request is sent, so the outlet is not power-cycled.
+        """
+        mock_time.time.return_value = 100
+        session = _session_returning(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset(post_reset_delay=10, ez_outlet_reset_interval=3, deadline=5)
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.DEADLINE_EXCEEDED_MSG.format(5))
+        mock_time.sleep.assert_not_called()
+        session.get.assert_not_called()
+
+    def test_deadline_stops_retries(self, mock_time):
+        """
+        Given: A session whose get always raises ConnectTimeout, with the clock stopped.
+          and: EzOutlet with a RetryPolicy of 5 attempts with a 2 second backoff.
+        When: Calling reset() with no wait and deadline=1.
+        Then: Only one request is sent.
+        """
+        mock_time.time.return_value = 100
+        session = _session_returning(requests.exceptions.ConnectTimeout())
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session,
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=5, backoff=2, jitter=0))
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError):
+            uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0, deadline=1)
+
+        session.get.assert_called_once()
+
+    def test_deadline_retry_not_reported(self, mock_time):
+        """
+        Given: A session whose get always raises ConnectTimeout, with the clock stopped.
+          and: EzOutlet with a RetryPolicy of 5 attempts with a 2 second backoff, a RetryBudget and on_retry.
+        When: Calling reset() with no wait and deadline=1.
+        Then: Neither the budget nor on_retry is used, since the retry would end after the deadline.
+        """
+        mock_time.time.return_value = 100
+        session = _session_returning(requests.exceptions.ConnectTimeout())
+        budget = mock.MagicMock()
+        on_retry = mock.MagicMock()
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session,
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=5, backoff=2, jitter=0,
+                                                                         budget=budget, on_retry=on_retry))
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError):
+            uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0, deadline=1)
+
+        budget.try_acquire.assert_not_called()
+        on_retry.assert_not_called()
+
+
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletInstrumentation(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def test_observer_after_retry(self, mock_time):
+        """
+        Given: A session whose get raises ConnectTimeout, then succeeds.
+          and: EzOutlet with a RetryPolicy of 2 attempts, backoff 0.5, no jitter, and an observer.
+        When: Calling reset(post_reset_delay=0, ez_outlet_reset_interval=0).
+        Then: The observer is called once, with a ResetTiming for the hostname.
+         and: The ResetTiming has outcome 'ok', 2 attempts and retry_wait_time 0.5.
+        """
+        _ = mock_time
+        observer = mock.MagicMock()
+        session = _session_returning(requests.exceptions.ConnectTimeout(),
+                                     ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, observers=[observer],
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=2, backoff=0.5, jitter=0))
+
+        uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        observer.assert_called_once()
+        timing = observer.call_args[0][0]
+        self.assertIsInstance(timing, ezoutlet.instrumentation.ResetTiming)
+        self.assertEqual((timing.hostname, timing.outcome, timing.error, timing.attempts, timing.retry_wait_time),
+                         (self.hostname, ezoutlet.instrumentation.OUTCOME_OK, None, 2, 0.5))
+        self.assertFalse(timing.coalesced)
+        self.assertGreaterEqual(timing.total_time, timing.request_time)
+
+    def test_rate_limit_wait_recorded(self, mock_time):
+        """
+        Given: A session whose get raises ConnectTimeout, then succeeds.
+          and: EzOutlet with a RetryPolicy of 2 attempts, an observer, and a rate limiter which waits 0.25s.
+        When: Calling reset(post_reset_delay=0, ez_outlet_reset_interval=0).
+        Then: The rate limiter is asked before each attempt, with the hostname and no deadline.
+         and: The ResetTiming has rate_limit_wait_time 0.5.
+        """
+        _ = mock_time
+        observer = mock.MagicMock()
+        rate_limiter = mock.MagicMock(**{'acquire.return_value': 0.25})
+        session = _session_returning(requests.exceptions.ConnectTimeout(),
+                                     ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, observers=[observer],
+                                 rate_limiter=rate_limiter,
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=2, backoff=0.5, jitter=0))
+
+        uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        self.assertEqual(rate_limiter.acquire.call_args_list, [mock.call(self.hostname, deadline_at=None)] * 2)
+        self.assertEqual(observer.call_args[0][0].rate_limit_wait_time, 0.5)
+
+    def test_observer_on_failure(self, mock_time):
+        """
+        Given: A session returning an unexpected response.
+          and: EzOutlet with an observer which raises, then a second observer.
+        When: Calling reset().
+        Then: EzOutletError is raised with UNEXPECTED_RESPONSE_MSG.
+         and: The second observer is called with outcome 'error', the error message and 1 attempt.
+        """
+        _ = mock_time
+        failing_observer = mock.MagicMock(side_effect=ValueError('observer bug'))
+        observer = mock.MagicMock()
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=_session_returning('bad'),
+                                 observers=[failing_observer, observer])
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset()
+
+        timing = observer.call_args[0][0]
+        self.assertEqual((timing.outcome, timing.error, timing.attempts),
+                         (ezoutlet.instrumentation.OUTCOME_ERROR, str(e.exception), 1))
+
+    def test_logs_request(self, mock_time):
+        """
+        Given: EzOutlet with a session returning the expected response.
+        When: Calling reset() with DEBUG logging captured.
+        Then: LOG_REQUEST_MSG is logged with the reset URL.
+        """
+        _ = mock_time
+        uut = ez_outlet.EzOutlet(hostname=self.hostname,
+                                 session=_session_returning(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS))
+
+        with mock.patch.object(ez_outlet, 'logger') as mock_logger:
+            uut.reset()
+
+        mock_logger.debug.assert_called_once_with(ez_outlet.EzOutlet.LOG_REQUEST_MSG.format(uut.url))
+
+
+class TestEzOutletStatus(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def test_status_relay_off(self):
+        """
+        Given: A session returning the status page with the relay off.
+        When: Calling status(timeout=1).
+        Then: Session.get is called once for STATUS_URL_PATH with timeout=1.
+         and: The OutletStatus is reachable, with relay 'off', a latency and no error.
+        """
+        session = mock.MagicMock()
+        session.get.return_value.status_code = 200
+        session.get.return_value.text = ezoutlet.outlet_status.format_status_page(relay_on=False)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        result = uut.status(timeout=1)
+
+        session.get.assert_called_once_with(
+            'http://{0}{1}'.format(self.hostname, ezoutlet.outlet_status.STATUS_URL_PATH),
+            timeout=1, proxies=PROXY_SETTINGS_NONE)
+        self.assertEqual(result.as_dict(), {'target': self.hostname, 'reachable': True, 'latency': result.latency,
+                                            'relay': ezoutlet.outlet_status.RELAY_OFF})
+        self.assertGreaterEqual(result.latency, 0)
+
+    def test_status_page_missing(self):
+        """
+        Given: A session answering HTTP 404.
+        When: Calling status().
+        Then: The OutletStatus is reachable, with an unknown relay state.
+        """
+        session = mock.MagicMock()
+        session.get.return_value.status_code = 404
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        result = uut.status()
+
+        self.assertEqual((result.reachable, result.relay, result.error), (True, None, None))
+
+    def test_status_timeout(self):
+        """
+        Given: A session whose get raises ConnectTimeout.
+          and: EzOutlet with a circuit breaker registry and a RetryPolicy of 3 attempts.
+        When: Calling status(timeout=0.5).
+        Then: The OutletStatus is unreachable, with NO_RESPONSE_MSG, and no latency.
+         and: Only one request is sent, and the breaker records no failure.
+        """
+        session = mock.MagicMock()
+        session.get.side_effect = requests.exceptions.ConnectTimeout()
+        breakers = ezoutlet.circuit_breaker.CircuitBreakerRegistry()
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, circuit_breakers=breakers,
+                                 retry_policy=ezoutlet.retry.RetryPolicy(max_attempts=3))
+
+        result = uut.status(timeout=0.5)
+
+        self.assertEqual((result.reachable, result.latency, result.error),
+                         (False, None, ez_outlet.EzOutlet.NO_RESPONSE_MSG.format(0.5)))
+        session.get.assert_called_once()
+        self.assertEqual(breakers.get(self.hostname).failures, 0)
+
+
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletPower(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def test_cycle(self, mock_time):
+        """
+        Given: EzOutlet with a session returning EXPECTED_RESPONSE_CONTENTS.
+        When: Calling cycle(off_duration=5).
+        Then: TURN_OFF_URL_PATH is requested, then time.sleep(5) is called, then TURN_ON_URL_PATH is requested.
+         and: EXPECTED_RESPONSE_CONTENTS is returned.
+        """
+        events = []
+        session = mock.MagicMock()
+        session.get.side_effect = lambda url, **_: events.append(url) or mock.MagicMock(
+            text=ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        mock_time.sleep.side_effect = lambda seconds: events.append(seconds)
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        result = uut.cycle(off_duration=5)
+
+        self.assertEqual(events, ['http://{0}{1}'.format(self.hostname, ez_outlet.EzOutlet.TURN_OFF_URL_PATH), 5,
+                                  'http://{0}{1}'.format(self.hostname, ez_outlet.EzOutlet.TURN_ON_URL_PATH)])
+        self.assertEqual(result, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+
+    def test_cycle_turn_off_fails(self, mock_time):
+        """
+        Given: EzOutlet with a session returning an unexpected response.
+        When: Calling cycle().
+        Then: EzOutletError is raised with UNEXPECTED_RESPONSE_MSG.
+         and: The outlet is not switched on, and time.sleep is not called.
+        """
+        session = _session_returning('1,0')
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.cycle()
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG.format('1,0'))
+        session.get.assert_called_once()
+        mock_time.sleep.assert_not_called()
+
+    def test_cycle_turn_on_fails(self, mock_time):
+        """
+        Given: EzOutlet with a session returning EXPECTED_RESPONSE_CONTENTS, then an unexpected response.
+        When: Calling cycle().
+        Then: EzOutletError is raised with LEFT_OFF_MSG, giving the reason.
+        """
+        _ = mock_time
+        session = _session_returning(ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS, '1,0')
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.cycle()
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.LEFT_OFF_MSG.format(
+            ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG.format('1,0')))
+
+
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletResolver(unittest.TestCase):
+    hostname = 'outlet.example'
+
+    def test_request_to_resolved_address(self, mock_time):
+        """
+        Given: EzOutlet with a resolver giving an address for its hostname.
+        When: Calling reset().
+        Then: Session.get is called with the address in the URL and the hostname in the Host header.
+        """
+        _ = mock_time
+        session = mock.MagicMock()
+        session.get.return_value.text = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+        resolver = mock.MagicMock()
+        resolver.resolve.return_value = '10.0.0.1'
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, resolver=resolver)
+
+        uut.reset()
+
+        resolver.resolve.assert_called_once_with(self.hostname)
+        session.get.assert_called_once_with('http://10.0.0.1' + ez_outlet.EzOutlet.RESET_URL_PATH,
+                                            timeout=ez_outlet.EzOutlet.DEFAULT_TIMEOUT,
+                                            proxies=PROXY_SETTINGS_NONE, headers={'Host': self.hostname})
+
+    def test_unresolvable(self, mock_time):
+        """
+        Given: EzOutlet with a CachingResolver whose lookups fail.
+        When: Calling reset().
+        Then: EzOutletError is raised with CONNECTION_ERROR_MSG, without sending a request.
+        """
+        _ = mock_time
+        session = mock.MagicMock()
+        resolver = ezoutlet.dns_cache.CachingResolver(
+            getaddrinfo=mock.MagicMock(side_effect=socket.gaierror('no such host')))
+        uut = ez_outlet.EzOutlet(hostname=self.hostname, session=session, resolver=resolver)
+
+        with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+            uut.reset()
+
+        self.assertIn('no such host', str(e.exception))
+        self.assertTrue(str(e.exception).startswith(ez_outlet.EzOutlet.CONNECTION_ERROR_MSG.format('')))
+        session.get.assert_not_called()
+
+
+class TestEzOutletPostFail(unittest.TestCase):
+    def test_post_fail(self):
+        """
+        Given: EzOutlet.
+        When: Calling post_fail() with a fuzzing Session's restart callback arguments.
+        Then: reset() is called with default arguments, and its result returned.
+        """
+        uut = ez_outlet.EzOutlet(hostname='12.34.56.78')
+
+        with mock.patch.object(uut, 'reset', return_value=ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) as reset:
+            result = uut.post_fail(target=None, fuzz_data_logger=None, session=None, sock=None)
+
+        reset.assert_called_once_with()
+        self.assertEqual(result, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
@@ -0,0 +1,349 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import time
+import unittest
+
+import pytest
+import requests
+
+import ezoutlet.exceptions
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import ez_outlet
+from ezoutlet import fleet
+from ezoutlet import simulator
+
+
+def _response_for_url(url, **_):
+    if '0.0.0.2' in url:
+        raise requests.exceptions.ConnectTimeout("Dummy reason")
+    elif '0.0.0.3' in url:
+        return mock.MagicMock(text='1,0')
+    else:
+        return mock.MagicMock(text=ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+
+
+# Suppress since PyCharm doesn't recognize @mock.patch.object
+# noinspection PyUnresolvedReferences
+@mock.patch('ezoutlet.ez_outlet.requests')
+@mock.patch('ezoutlet.ez_outlet.time')
+@mock.patch('ezoutlet.reset_handle.time')
+class TestEzOutletFleet(unittest.TestCase):
+    def setup_method(self, _):
+        self.hostnames = ['0.0.0.1', '0.0.0.2', '0.0.0.3', '0.0.0.4']
+        self.post_reset_delay = 12.34
+        self.ez_outlet_reset_interval = 3.21
+        self.timeout = 11.12
+
+    def make_uut(self):
+        # Constructed inside each test so the shared session comes from the mocked requests module.
+        return fleet.EzOutletFleet(hostnames=self.hostnames, timeout=self.timeout, max_workers=2)
+
+    @staticmethod
+    def configure_mock_requests(mock_requests):
+        mock_requests.configure_mock(**{'Session.return_value.get.side_effect': _response_for_url})
+        mock_requests.exceptions = requests.exceptions  # Restore mocked-away exceptions
+
+    def test_reset_requests_every_host(self, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module.
+          and: EzOutletFleet initialized with several hostnames.
+        When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
+        Then: Session.get is called once per hostname.
+        """
+        _ = mock_time
+        mock_handle_time.time.return_value = 100
+
+        # Given
+        self.configure_mock_requests(mock_requests=mock_requests)
+
+        # When
+        self.make_uut().reset(post_reset_delay=self.post_reset_delay,
+                              ez_outlet_reset_interval=self.ez_outlet_reset_interval)
+
+        # Then
+        requested_urls = sorted(c[0][0] for c in mock_requests.Session.return_value.get.call_args_list)
+        self.assertEqual(requested_urls, sorted(ez_outlet.EzOutlet(h).url for h in self.hostnames))
+
+    def test_duplicate_hostnames_reset_once(self, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module.
+          and: EzOutletFleet initialized with a hostname given twice.
+        When: Calling reset().
+        Then: Session.get is called once for that hostname.
+         and: hostnames and the results list it once, in the order first given.
+        """
+        _ = mock_time
+        mock_handle_time.time.return_value = 100
+        self.configure_mock_requests(mock_requests=mock_requests)
+        uut = fleet.EzOutletFleet(hostnames=['0.0.0.4', '0.0.0.1', '0.0.0.4'], timeout=self.timeout)
+
+        results = uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        self.assertEqual(mock_requests.Session.return_value.get.call_count, 2)
+        self.assertEqual(uut.hostnames, ['0.0.0.4', '0.0.0.1'])
+        self.assertEqual(sorted(results), ['0.0.0.1', '0.0.0.4'])
+
+    def test_reset_results(self, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module, configured so that one host times out and
+               one gives an unexpected response.
+        When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
+        Then: Successful hosts map to the response contents.
+         and: Failed hosts map to an EzOutletError.
+        """
+        _ = mock_time
+        mock_handle_time.time.return_value = 100
+
+        # Given
+        self.configure_mock_requests(mock_requests=mock_requests)
+
+        # When
+        results = self.make_uut().reset(post_reset_delay=self.post_reset_delay,
+                                        ez_outlet_reset_interval=self.ez_outlet_reset_interval)
+
+        # Then
+        self.assertEqual(set(results), set(self.hostnames))
+        self.assertEqual(results['0.0.0.1'], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertEqual(results['0.0.0.4'], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertIsInstance(results['0.0.0.2'], ezoutlet.exceptions.EzOutletError)
+        self.assertIsInstance(results['0.0.0.3'], ezoutlet.exceptions.EzOutletError)
+
+    def test_reset_sleeps_once(self, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module.
+          and: EzOutletFleet initialized with several hostnames.
+        When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
+        Then: The fleet sleeps once for post_reset_delay + ez_outlet_reset_interval.
+         and: The individual outlets do not wait.
+        """
+        mock_handle_time.time.return_value = 100
+
+        # Given
+        self.configure_mock_requests(mock_requests=mock_requests)
+
+        # When
+        self.make_uut().reset(post_reset_delay=self.post_reset_delay,
+                              ez_outlet_reset_interval=self.ez_outlet_reset_interval)
+
+        # Then
+        self.assertEqual(mock_handle_time.sleep.call_count, 1)
+        self.assertAlmostEqual(mock_handle_time.sleep.call_args[0][0],
+                               self.post_reset_delay + self.ez_outlet_reset_interval)
+        mock_time.sleep.assert_not_called()
+
+    @mock.patch('ezoutlet.fleet.time')
+    def test_reset_deadline(self, mock_fleet_time, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module, with the clock stopped.
+        When: Calling reset() with a deadline shorter than post_reset_delay + ez_outlet_reset_interval.
+        Then: No request is sent, so no outlet is power-cycled.
+         and: Every host maps to an EzOutletError with DEADLINE_EXCEEDED_MSG.
+         and: The fleet does not sleep.
+        """
+        for t in (mock_fleet_time, mock_handle_time, mock_time):
+            t.time.return_value = 100
+        self.configure_mock_requests(mock_requests=mock_requests)
+
+        results = self.make_uut().reset(post_reset_delay=self.post_reset_delay,
+                                        ez_outlet_reset_interval=self.ez_outlet_reset_interval,
+                                        deadline=5)
+
+        mock_requests.Session.return_value.get.assert_not_called()
+        for hostname in self.hostnames:
+            self.assertEqual(str(results[hostname]), ez_outlet.EzOutlet.DEADLINE_EXCEEDED_MSG.format(5))
+        mock_handle_time.sleep.assert_not_called()
+
+    @mock.patch('ezoutlet.fleet.time')
+    def test_reset_deadline_leaves_time_to_wait(self, mock_fleet_time, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module, with the clock stopped.
+        When: Calling reset() with a deadline 5 seconds longer than post_reset_delay + ez_outlet_reset_interval.
+        Then: Requests are sent with connect and read timeouts cut to those 5 seconds.
+         and: Hosts which were reset map to their responses.
+        """
+        for t in (mock_fleet_time, mock_handle_time, mock_time):
+            t.time.return_value = 100
+        self.configure_mock_requests(mock_requests=mock_requests)
+        deadline = self.post_reset_delay + self.ez_outlet_reset_interval + 5
+
+        results = self.make_uut().reset(post_reset_delay=self.post_reset_delay,
+                                        ez_outlet_reset_interval=self.ez_outlet_reset_interval,
+                                        deadline=deadline)
+
+        timeout = mock_requests.Session.return_value.get.call_args[1]['timeout']
+        self.assertEqual(timeout, (pytest.approx(5), pytest.approx(5)))
+        self.assertEqual(results['0.0.0.1'], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+
+    def test_reset_per_host_options(self, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests module.
+          and: EzOutletFleet with outlet_options giving one host its own timeout.
+        When: Calling reset() with reset_options giving one host a longer post_reset_delay.
+        Then: That host's request uses its own timeout; the others use the fleet's.
+         and: The fleet sleeps once, until the longest host is done.
+        """
+        _ = mock_time
+        mock_handle_time.time.return_value = 100
+        self.configure_mock_requests(mock_requests=mock_requests)
+        uut = fleet.EzOutletFleet(hostnames=self.hostnames, timeout=self.timeout, max_workers=2,
+                                  outlet_options={'0.0.0.4': {'timeout': 1}})
+
+        uut.reset(post_reset_delay=self.post_reset_delay, ez_outlet_reset_interval=self.ez_outlet_reset_interval,
+                  reset_options={'0.0.0.4': {'post_reset_delay': 100}})
+
+        timeouts = dict((c[0][0], c[1]['timeout']) for c in mock_requests.Session.return_value.get.call_args_list)
+        self.assertEqual(timeouts[ez_outlet.EzOutlet('0.0.0.4').url], 1)
+        self.assertEqual(timeouts[ez_outlet.EzOutlet('0.0.0.1').url], self.timeout)
+        self.assertEqual(mock_handle_time.sleep.call_count, 1)
+        self.assertAlmostEqual(mock_handle_time.sleep.call_args[0][0], 100 + self.ez_outlet_reset_interval)
+
+    def test_reset_all_fail_no_sleep(self, mock_handle_time, mock_time, mock_requests):
+        """
+        Given: Mock requests configured to raise requests.exceptions.ConnectTimeout on get.
+        When: Calling reset(post_reset_delay, ez_outlet_reset_interval).
+        Then: The fleet does not sleep.
+        """
+        _ = mock_time
+
+        # Given
+        mock_requests.configure_mock(
+            **{'Session.return_value.get.side_effect': requests.exceptions.ConnectTimeout("Dummy reason")})
+        mock_requests.exceptions = requests.exceptions
+
+        # When
+        results = self.make_uut().reset(post_reset_delay=self.post_reset_delay,
+                                        ez_outlet_reset_interval=self.ez_outlet_reset_interval)
+
+        # Then
+        mock_handle_time.sleep.assert_not_called()
+        for result in results.values():
+            self.assertIsInstance(result, ezoutlet.exceptions.EzOutletError)
+
+
+# noinspection PyUnresolvedReferences
+@mock.patch('ezoutlet.ez_outlet.requests')
+@mock.patch('ezoutlet.fleet.time')
+class TestEzOutletFleetPower(unittest.TestCase):
+    hostnames = ['0.0.0.1', '0.0.0.2', '0.0.0.3', '0.0.0.4', '0.0.0.5']
+
+    def setup_events(self, mock_fleet_time, mock_requests):
+        """Record requested paths and fleet sleeps, in order, in self.events."""
+        self.events = []
+
+        def get(url, **_):
+            self.events.append(url.split('//', 1)[1])
+            return _response_for_url(url)
+
+        mock_requests.configure_mock(**{'Session.return_value.get.side_effect': get})
+        mock_requests.exceptions = requests.exceptions
+        mock_fleet_time.sleep.side_effect = lambda seconds: self.events.append(('sleep', seconds))
+
+    def test_turn_on_staggered(self, mock_fleet_time, mock_requests):
+        """
+        Given: EzOutletFleet of 5 hosts, with max_workers=1.
+        When: Calling turn_on(max_simultaneous_on=2, stagger=1.5).
+        Then: Hosts are switched on in batches of 2, 2 and 1, with a 1.5 second sleep between batches.
+         and: Each host maps to its result.
+        """
+        self.setup_events(mock_fleet_time, mock_requests)
+        uut = fleet.EzOutletFleet(hostnames=self.hostnames, max_workers=1)
+
+        results = uut.turn_on(max_simultaneous_on=2, stagger=1.5)
+
+        path = ez_outlet.EzOutlet.TURN_ON_URL_PATH
+        self.assertEqual(self.events, ['0.0.0.1' + path, '0.0.0.2' + path, ('sleep', 1.5),
+                                       '0.0.0.3' + path, '0.0.0.4' + path, ('sleep', 1.5),
+                                       '0.0.0.5' + path])
+        self.assertEqual(results['0.0.0.1'], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertIsInstance(results['0.0.0.2'], ezoutlet.exceptions.EzOutletError)
+        self.assertIsInstance(results['0.0.0.3'], ezoutlet.exceptions.EzOutletError)
+
+    def test_turn_off_single_batch(self, mock_fleet_time, mock_requests):
+        """
+        Given: EzOutletFleet of 5 hosts.
+        When: Calling turn_off().
+        Then: Every host is switched off, without sleeping.
+        """
+        self.setup_events(mock_fleet_time, mock_requests)
+        uut = fleet.EzOutletFleet(hostnames=self.hostnames)
+
+        uut.turn_off()
+
+        self.assertEqual(sorted(self.events), sorted(h + ez_outlet.EzOutlet.TURN_OFF_URL_PATH for h in self.hostnames))
+
+    def test_cycle(self, mock_fleet_time, mock_requests):
+        """
+        Given: EzOutletFleet of 5 hosts, with max_workers=1, one of which times out and one of which gives an
+               unexpected response.
+        When: Calling cycle(off_duration=7, max_simultaneous_on=2, stagger=2).
+        Then: Every host is switched off, then the fleet sleeps 7 seconds.
+         and: Hosts which switched off are switched on in batches of 2 and 1, 2 seconds apart.
+         and: The failed hosts are not switched on, and map to an EzOutletError.
+        """
+        self.setup_events(mock_fleet_time, mock_requests)
+        uut = fleet.EzOutletFleet(hostnames=self.hostnames, max_workers=1)
+
+        results = uut.cycle(off_duration=7, max_simultaneous_on=2, stagger=2)
+
+        on, off = ez_outlet.EzOutlet.TURN_ON_URL_PATH, ez_outlet.EzOutlet.TURN_OFF_URL_PATH
+        self.assertEqual(self.events, [h + off for h in self.hostnames] + [
+            ('sleep', 7), '0.0.0.1' + on, '0.0.0.4' + on, ('sleep', 2), '0.0.0.5' + on])
+        self.assertIsInstance(results['0.0.0.2'], ezoutlet.exceptions.EzOutletError)
+        self.assertIsInstance(results['0.0.0.3'], ezoutlet.exceptions.EzOutletError)
+
+    def test_cycle_turn_on_fails(self, mock_fleet_time, mock_requests):
+        """
+        Given: EzOutletFleet of 2 hosts, one of which switches off but gives an unexpected response switching on.
+        When: Calling cycle().
+        Then: That host maps to an EzOutletError with LEFT_OFF_MSG, giving the reason.
+         and: The other host maps to EXPECTED_RESPONSE_CONTENTS.
+        """
+        _ = mock_fleet_time
+
+        def get(url, **_):
+            failed = url.endswith('0.0.0.3' + ez_outlet.EzOutlet.TURN_ON_URL_PATH)
+            return mock.MagicMock(text='1,0' if failed else ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+
+        mock_requests.configure_mock(**{'Session.return_value.get.side_effect': get})
+        mock_requests.exceptions = requests.exceptions
+        uut = fleet.EzOutletFleet(hostnames=['0.0.0.1', '0.0.0.3'])
+
+        results = uut.cycle(off_duration=0)
+
+        self.assertEqual(results['0.0.0.1'], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+        self.assertEqual(str(results['0.0.0.3']), ez_outlet.EzOutlet.LEFT_OFF_MSG.format(
+            ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG.format('1,0')))
+
+
+class TestEzOutletFleetIterReset(unittest.TestCase):
+    def test_iter_reset_yields_as_done(self):
+        """
+        Given: A SimulatorFarm of 3 outlets.
+        When: Calling iter_reset() with reset_options giving each outlet a different post_reset_delay.
+        Then: Each outlet is yielded with EXPECTED_RESPONSE_CONTENTS, shortest delay first.
+         and: The first outlet is yielded before the last one's delay has passed.
+        """
+        with simulator.SimulatorFarm(count=3, relay_cycle_time=0) as farm:
+            slow, fast, medium = farm.hostnames
+            reset_options = {slow: {'post_reset_delay': 0.6}, fast: {'post_reset_delay': 0},
+                             medium: {'post_reset_delay': 0.3}}
+            with fleet.EzOutletFleet(hostnames=farm.hostnames) as uut:
+                start = time.time()
+                yielded = []
+                for hostname, result in uut.iter_reset(post_reset_delay=0, ez_outlet_reset_interval=0,
+                                                       reset_options=reset_options):
+                    yielded.append((hostname, result, time.time() - start))
+
+        self.assertEqual([(h, r) for h, r, _ in yielded],
+                         [(h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in (fast, medium, slow)])
+        self.assertLess(yielded[0][2], 0.6)
+        self.assertGreaterEqual(yielded[2][2], 0.6)
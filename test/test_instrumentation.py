@@ -0,0 +1,158 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import logging
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import instrumentation
+
+
+def make_timing(hostname='10.0.0.1', outcome=instrumentation.OUTCOME_OK, attempts=1, request_time=0.02,
+                wait_time=3, total_time=3.03, coalesced=False):
+    timing = instrumentation.ResetTiming(hostname)
+    timing.outcome = outcome
+    timing.attempts = attempts
+    timing.request_time = request_time
+    timing.wait_time = wait_time
+    timing.total_time = total_time
+    timing.coalesced = coalesced
+    return timing
+
+
+class TestResetTiming(unittest.TestCase):
+    @mock.patch.object(instrumentation, 'clock', side_effect=[10.0, 10.5])
+    def test_success(self, _):
+        """
+        Given: A ResetTiming with an observer, started at clock 10.
+        When: Leaving its context without an exception, at clock 10.5.
+        Then: The observer is called with the ResetTiming.
+         and: Its outcome is 'ok', its error None and its total_time 0.5.
+        """
+        observer = mock.MagicMock()
+
+        with instrumentation.ResetTiming('10.0.0.1', observers=[observer]) as uut:
+            uut.add_attempt(0.25)
+
+        observer.assert_called_once_with(uut)
+        self.assertEqual((uut.outcome, uut.error, uut.total_time, uut.attempts, uut.request_time),
+                         (instrumentation.OUTCOME_OK, None, 0.5, 1, 0.25))
+
+    def test_failure(self):
+        """
+        Given: A ResetTiming with an observer.
+        When: An exception leaves its context.
+        Then: The exception propagates.
+         and: The observer is called with outcome 'error' and the exception's message.
+        """
+        observer = mock.MagicMock()
+
+        with self.assertRaises(ValueError):
+            with instrumentation.ResetTiming('10.0.0.1', observers=[observer]):
+                raise ValueError('boom')
+
+        timing = observer.call_args[0][0]
+        self.assertEqual((timing.outcome, timing.error), (instrumentation.OUTCOME_ERROR, 'boom'))
+
+    def test_observer_exception_logged(self):
+        """
+        Given: Two observers, the first of which raises.
+        When: Calling notify().
+        Then: The second observer is still called.
+         and: The exception is logged.
+        """
+        failing_observer = mock.MagicMock(side_effect=ValueError('observer bug'))
+        observer = mock.MagicMock()
+        timing = make_timing()
+
+        with mock.patch.object(instrumentation, 'logger') as mock_logger:
+            instrumentation.notify([failing_observer, observer], timing)
+
+        observer.assert_called_once_with(timing)
+        mock_logger.exception.assert_called_once()
+
+
+class TestLoggingObserver(unittest.TestCase):
+    def test_levels(self):
+        """
+        Given: A LoggingObserver with level DEBUG.
+        When: Calling it with a successful, then a failed ResetTiming.
+        Then: The first is logged at DEBUG, the second at WARNING with its error.
+        """
+        log = mock.MagicMock()
+        uut = instrumentation.LoggingObserver(log=log, level=logging.DEBUG)
+        failed = make_timing(outcome=instrumentation.OUTCOME_ERROR)
+        failed.error = 'No response'
+
+        uut(make_timing())
+        uut(failed)
+
+        self.assertEqual([c[0][0] for c in log.log.call_args_list], [logging.DEBUG, logging.WARNING])
+        self.assertTrue(log.log.call_args[0][1].endswith(': No response'))
+
+
+class TestResetMetrics(unittest.TestCase):
+    def test_render(self):
+        """
+        Given: ResetMetrics with buckets (0.1, 1).
+        When: Recording a successful reset with 2 attempts, a failed one, and a coalesced one, for one host.
+        Then: render() gives counters by host and outcome, and cumulative histogram buckets, in Prometheus
+              text format.
+        """
+        uut = instrumentation.ResetMetrics(buckets=(0.1, 1))
+        uut(make_timing(attempts=2, request_time=0.05, wait_time=0, total_time=0.05))
+        uut(make_timing(outcome=instrumentation.OUTCOME_ERROR, request_time=0.5, wait_time=0, total_time=0.5))
+        uut(make_timing(attempts=0, request_time=0, wait_time=2, total_time=2, coalesced=True))
+
+        text = uut.render()
+
+        self.assertIn('# TYPE ezoutlet_resets_total counter\n', text)
+        self.assertIn('ezoutlet_resets_total{host="10.0.0.1",outcome="ok"} 2\n', text)
+        self.assertIn('ezoutlet_resets_total{host="10.0.0.1",outcome="error"} 1\n', text)
+        self.assertIn('ezoutlet_reset_attempts_total{host="10.0.0.1"} 3\n', text)
+        self.assertIn('ezoutlet_reset_coalesced_total{host="10.0.0.1"} 1\n', text)
+        self.assertIn('# TYPE ezoutlet_reset_request_seconds histogram\n', text)
+        self.assertIn('ezoutlet_reset_request_seconds_bucket{host="10.0.0.1",le="0.1"} 2\n', text)
+        self.assertIn('ezoutlet_reset_request_seconds_bucket{host="10.0.0.1",le="1.0"} 3\n', text)
+        self.assertIn('ezoutlet_reset_request_seconds_bucket{host="10.0.0.1",le="+Inf"} 3\n', text)
+        self.assertIn('ezoutlet_reset_request_seconds_count{host="10.0.0.1"} 3\n', text)
+        self.assertIn('ezoutlet_reset_duration_seconds_bucket{host="10.0.0.1",le="1.0"} 2\n', text)
+        self.assertIn('ezoutlet_reset_duration_seconds_sum{host="10.0.0.1"} 2.55\n', text)
+
+    def test_label_escaping(self):
+        """
+        Given: ResetMetrics.
+        When: Recording a reset for a hostname containing a quote and a backslash.
+        Then: render() escapes them in the host label.
+        """
+        uut = instrumentation.ResetMetrics()
+        uut(make_timing(hostname='a"b\\c'))
+
+        self.assertIn('host="a\\"b\\\\c"', uut.render())
+
+    def test_snapshot(self):
+        """
+        Given: ResetMetrics with buckets (0.1, 1).
+        When: Recording two successful resets for each of two hosts.
+        Then: snapshot() counts 2 resets per host, and each host's request histogram has count 2.
+        """
+        uut = instrumentation.ResetMetrics(buckets=(0.1, 1))
+        for hostname in ('a', 'b', 'a', 'b'):
+            uut(make_timing(hostname=hostname))
+
+        snapshot = uut.snapshot()
+
+        self.assertEqual(snapshot['counters']['resets_total'], {('a', 'ok'): 2, ('b', 'ok'): 2})
+        self.assertEqual(snapshot['histograms']['reset_request_seconds']['a']['count'], 2)
+        self.assertEqual(snapshot['histograms']['reset_request_seconds']['a']['buckets'], {0.1: 2, 1: 0, '+Inf': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
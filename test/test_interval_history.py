@@ -0,0 +1,141 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import ez_outlet
+from ezoutlet import interval_history
+
+
+class TestIntervalHistory(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def setup_method(self, _):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'sub', 'history.json')
+
+    def teardown_method(self, _):
+        shutil.rmtree(self.directory)
+
+    def test_estimate_needs_min_samples(self):
+        """
+        Given: IntervalHistory with min_samples=3.
+        When: Recording two samples.
+        Then: estimate() returns the default.
+        """
+        uut = interval_history.IntervalHistory(path=self.path, min_samples=3)
+
+        uut.record(self.hostname, 5)
+        uut.record(self.hostname, 6)
+
+        self.assertEqual(uut.estimate(self.hostname, default=99), 99)
+
+    def test_estimate_percentile(self):
+        """
+        Given: IntervalHistory with percentile=90.
+        When: Recording samples 1..10.
+        Then: estimate() returns 9.
+         and: Other hosts still get the default.
+        """
+        uut = interval_history.IntervalHistory(path=self.path, percentile=90)
+
+        for seconds in range(10, 0, -1):
+            uut.record(self.hostname, seconds)
+
+        self.assertEqual(uut.estimate(self.hostname), 9)
+        self.assertIsNone(uut.estimate('other'))
+
+    def test_persisted_and_trimmed(self):
+        """
+        Given: IntervalHistory with max_samples=2.
+        When: Recording three samples, then loading a new IntervalHistory from the same file.
+        Then: The new history has the last two samples.
+        """
+        interval_history.IntervalHistory(path=self.path, max_samples=2).record(self.hostname, 1)
+        interval_history.IntervalHistory(path=self.path, max_samples=2).record(self.hostname, 2)
+        interval_history.IntervalHistory(path=self.path, max_samples=2).record(self.hostname, 3)
+
+        self.assertEqual(interval_history.IntervalHistory(path=self.path).samples(self.hostname), [2, 3])
+
+    def test_concurrent_records_kept(self):
+        """
+        Given: Several IntervalHistory objects sharing one file, as separate processes would.
+        When: Each records samples for its own host from its own thread at the same time.
+        Then: Every sample is in the file.
+        """
+        histories = [interval_history.IntervalHistory(path=self.path) for _ in range(4)]
+
+        def record(i):
+            for j in range(10):
+                histories[i].record('host{0}'.format(i), j)
+
+        threads = [threading.Thread(target=record, args=(i,)) for i in range(len(histories))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        uut = interval_history.IntervalHistory(path=self.path)
+        for i in range(len(histories)):
+            self.assertEqual(uut.samples('host{0}'.format(i)), list(range(10)))
+
+
+# Suppress since PyCharm doesn't recognize @mock.patch.object
+# noinspection PyUnresolvedReferences
+@mock.patch('ezoutlet.ez_outlet.readiness')
+@mock.patch('ezoutlet.ez_outlet.requests')
+@mock.patch('ezoutlet.ez_outlet.time')
+class TestEzOutletIntervalHistory(unittest.TestCase):
+    hostname = '12.34.56.78'
+
+    def setup_method(self, _):
+        self.history = mock.MagicMock()
+        self.uut = ez_outlet.EzOutlet(hostname=self.hostname, interval_history=self.history)
+
+    @staticmethod
+    def configure_mock_requests(mock_requests):
+        mock_requests.Session.return_value.get.return_value.text = ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS
+
+    def test_learned_wait(self, mock_time, mock_requests, mock_readiness):
+        """
+        Given: EzOutlet with an interval history whose estimate is 7.5.
+        When: Calling reset(post_reset_delay=30, ez_outlet_reset_interval=3) without a readiness probe.
+        Then: The estimate is requested with default == 33.
+         and: time.sleep(7.5) is called.
+        """
+        _ = mock_readiness
+        self.configure_mock_requests(mock_requests)
+        self.history.estimate.return_value = 7.5
+
+        self.uut.reset(post_reset_delay=30, ez_outlet_reset_interval=3)
+
+        self.history.estimate.assert_called_once_with(self.hostname, default=33)
+        mock_time.sleep.assert_called_once_with(7.5)
+
+    def test_probe_records(self, mock_time, mock_requests, mock_readiness):
+        """
+        Given: EzOutlet with an interval history.
+          and: Mock readiness.wait_until_ready taking 4 seconds.
+        When: Calling reset(post_reset_delay=30, ez_outlet_reset_interval=3, readiness_probe).
+        Then: time.sleep(3) is called.
+         and: A reset time of 7 seconds is recorded.
+        """
+        self.configure_mock_requests(mock_requests)
+        mock_readiness.wait_until_ready.return_value = 4
+
+        self.uut.reset(post_reset_delay=30, ez_outlet_reset_interval=3, readiness_probe=mock.MagicMock())
+
+        mock_time.sleep.assert_called_once_with(3)
+        self.history.record.assert_called_once_with(self.hostname, 7)
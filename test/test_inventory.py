@@ -0,0 +1,196 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+import pytest
+
+from ezoutlet import exceptions
+from ezoutlet import inventory
+
+INVENTORY = {
+    'defaults': {'timeout': 5},
+    'outlets': {
+        'dut1': {'host': '10.0.0.1', 'reset_interval': 2, 'post_reset_delay': 60, 'ready_tcp': '10.0.1.1:22'},
+        'dut2': '10.0.0.2',
+        'dut3': {'host': '10.0.0.3', 'timeout': 1},
+    },
+    'groups': {
+        'rack': ['dut1', 'dut2'],
+        'lab': ['@rack', 'dut3', '10.0.0.9'],
+    },
+}
+
+
+class TestInventory(unittest.TestCase):
+    def test_resolve_names_hosts_and_defaults(self):
+        """
+        Given: Inventory with defaults and outlets.
+        When: Resolving an outlet name, an outlet's host and an unknown host.
+        Then: Each resolves to one OutletConfig with its own options over the defaults.
+        """
+        uut = inventory.Inventory.from_dict(INVENTORY)
+
+        dut1, dut3, other = uut.resolve(['dut1', '10.0.0.3', '10.0.0.9'])
+
+        assert (dut1.host, dut1.name) == ('10.0.0.1', 'dut1')
+        assert dut1.outlet_options() == {'timeout': 5}
+        assert dut1.reset_options() == {'post_reset_delay': 60, 'ez_outlet_reset_interval': 2}
+        assert dut3.outlet_options() == {'timeout': 1}
+        assert (other.host, other.name) == ('10.0.0.9', None)
+        assert other.outlet_options() == {'timeout': 5}
+        assert other.reset_options() == {}
+
+    def test_resolve_nested_groups(self):
+        """
+        Given: Inventory with a group containing another group.
+        When: Resolving the outer group and an outlet already in it.
+        Then: Every outlet is returned once, in group order.
+        """
+        uut = inventory.Inventory.from_dict(INVENTORY)
+
+        outlets = uut.resolve(['@lab', 'dut2'])
+
+        assert [o.host for o in outlets] == ['10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.9']
+
+    def test_resolve_unknown_group(self):
+        """
+        Given: Inventory.
+        When: Resolving a group it does not have.
+        Then: EzOutletError is raised naming the group.
+        """
+        uut = inventory.Inventory.from_dict(INVENTORY)
+
+        with pytest.raises(exceptions.EzOutletError) as e:
+            uut.resolve(['@nope'])
+        assert e.value.args[0] == inventory.UNKNOWN_GROUP_MSG.format('@nope')
+
+    def test_resolve_group_cycle(self):
+        """
+        Given: Inventory whose groups contain each other.
+        When: Resolving one of them.
+        Then: EzOutletError is raised.
+        """
+        uut = inventory.Inventory.from_dict({'groups': {'a': ['@b'], 'b': ['x', '@a']}})
+
+        with pytest.raises(exceptions.EzOutletError) as e:
+            uut.resolve(['@a'])
+        assert e.value.args[0] == inventory.GROUP_CYCLE_MSG.format('@a')
+
+    def test_from_dict_probe_window_from_defaults(self):
+        """
+        Given: An inventory whose defaults set post_reset_delay=30, with an outlet setting only ready_tcp.
+        When: Calling from_dict.
+        Then: The outlet has the probe and post_reset_delay 30.
+        """
+        uut = inventory.Inventory.from_dict({'defaults': {'post_reset_delay': 30},
+                                             'outlets': {'a': {'host': 'h', 'ready_tcp': 'h:22'}}})
+
+        assert uut.outlets['a'].options == {'post_reset_delay': 30, 'ready_tcp': 'h:22'}
+
+    def test_from_dict_invalid(self):
+        """
+        Given: Invalid inventories.
+        When: Calling from_dict.
+        Then: EzOutletError is raised for each.
+        """
+        for data in ([], {'outlet': {}}, {'outlets': {'a': {}}}, {'outlets': {'a': {'host': 'h', 'colour': 1}}},
+                     {'defaults': {'timeout': -1}}, {'defaults': {'timeout': True}},
+                     {'outlets': {'a': {'host': 'h', 'ready_tcp': 22}}}, {'groups': {'g': 'a'}},
+                     {'outlets': {'a': {'host': 'h', 'ready_tcp': 'h:22'}}},
+                     {'outlets': {'a': {'host': 'h', 'ready_http': 'http://h/', 'post_reset_delay': 0}}},
+                     {'defaults': {'ready_tcp': 'h:22'}}):
+            with pytest.raises(exceptions.EzOutletError):
+                inventory.Inventory.from_dict(data)
+
+
+class TestInventoryLoad(unittest.TestCase):
+    def setup_method(self, _):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'inventory.json')
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self._write(INVENTORY)
+
+    def teardown_method(self, _):
+        shutil.rmtree(self.directory)
+
+    def _write(self, data):
+        with io.open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data))
+
+    def test_load_cached(self):
+        """
+        Given: An inventory file.
+        When: Loading it twice with a cache_dir.
+        Then: The second load is served from the cache without parsing JSON.
+        """
+        first = inventory.load(self.path, cache_dir=self.cache_dir)
+
+        with mock.patch('ezoutlet.inventory.json.load') as mock_json_load:
+            second = inventory.load(self.path, cache_dir=self.cache_dir)
+
+        assert mock_json_load.call_count == 0
+        assert sorted(second.outlets) == sorted(first.outlets)
+        assert second.groups == first.groups
+
+    def test_load_cache_invalidated(self):
+        """
+        Given: An inventory file, loaded once with a cache_dir.
+        When: Changing the file and loading it again.
+        Then: The changed contents are returned.
+        """
+        inventory.load(self.path, cache_dir=self.cache_dir)
+        self._write({'outlets': {'only': '10.9.9.9'}})
+        os.utime(self.path, (0, 0))
+
+        uut = inventory.load(self.path, cache_dir=self.cache_dir)
+
+        assert [o.host for o in uut.resolve(['only'])] == ['10.9.9.9']
+
+    def test_load_cache_is_json(self):
+        """
+        Given: An inventory file, loaded once with a cache_dir.
+        When: Reading the cache file, then replacing it with a pickle and loading again.
+        Then: The cache file is JSON.
+         and: The pickle is ignored, and the inventory file is parsed instead.
+        """
+        inventory.load(self.path, cache_dir=self.cache_dir)
+        cache_path = os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])
+        with io.open(cache_path, 'rb') as f:
+            json.loads(f.read().decode('utf-8'))
+        with io.open(cache_path, 'wb') as f:
+            f.write(pickle.dumps(('key', 'inventory')))
+
+        uut = inventory.load(self.path, cache_dir=self.cache_dir)
+
+        assert sorted(uut.outlets) == sorted(INVENTORY['outlets'])
+
+    def test_load_errors(self):
+        """
+        Given: A missing file, a file which cannot be read (a directory), and a file which is not JSON.
+        When: Loading each.
+        Then: EzOutletUsageError is raised for the missing and unreadable files.
+         and: EzOutletError is raised for the file which is not JSON.
+        """
+        with pytest.raises(exceptions.EzOutletUsageError):
+            inventory.load(os.path.join(self.directory, 'missing.json'), cache_dir=None)
+        with pytest.raises(exceptions.EzOutletUsageError):
+            inventory.load(self.directory, cache_dir=None)
+        with io.open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{')
+        with pytest.raises(exceptions.EzOutletError):
+            inventory.load(self.path, cache_dir=None)
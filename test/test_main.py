@@ -7,15 +7,23 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import io
+import json
+import os
 import re
+import shutil
+import subprocess
+import tempfile
 import unittest
 
 import sys
 
 import ezoutlet
 import ezoutlet.constants
+import ezoutlet.coordination
 import ezoutlet.exceptions
 import ezoutlet.parser
+import ezoutlet.rate_limit
+import ezoutlet.readiness
 
 try:
     # mock in Python 2, unittest.mock in Python 3
@@ -39,6 +47,7 @@ except ImportError:
 import pytest
 
 from ezoutlet import ez_outlet
+from ezoutlet import simulator
 
 EXIT_CODE_OK = 0
 EXIT_CODE_ERR = 1
@@ -64,10 +73,12 @@ class TestMainReset(unittest.TestCase):
         Then: EzOutlet constructor is called with hostname == given value
               and wait_time == ez_outlet.DEFAULT_WAIT_TIME.
          and: EzOutlet.reset is called
+         and: EzOutlet is closed.
          and: STDOUT is silent.
          and: STDERR is silent.
          and: EXIT_CODE_OK is returned
         """
+        mock_ez_outlet.return_value.__enter__.return_value = mock_ez_outlet.return_value
         hostname = '255.254.253.252'
         args = ['ez_outlet.py', 'reset', hostname]
 
@@ -78,6 +89,7 @@ class TestMainReset(unittest.TestCase):
         # we mocked away EzOutlet.
         mock_ez_outlet.return_value.reset.assert_called_once_with(
             post_reset_delay=EZ_OUTLET_RESET_DEFAULT_WAIT_TIME)
+        mock_ez_outlet.return_value.__exit__.assert_called_once_with(None, None, None)
         assert ez_outlet.sys.stdout.getvalue() == ''
         assert ez_outlet.sys.stderr.getvalue() == ''
         assert exit_code == EXIT_CODE_OK
@@ -96,6 +108,7 @@ class TestMainReset(unittest.TestCase):
          and: STDERR is silent.
          and: EXIT_CODE_OK is returned
         """
+        mock_ez_outlet.return_value.__enter__.return_value = mock_ez_outlet.return_value
         hostname = '255.254.253.252'
         wait_time = 77
         args = ['ez_outlet.py', 'reset', hostname, ezoutlet.constants.RESET_TIME_ARG_LONG, str(wait_time)]
@@ -122,6 +135,7 @@ class TestMainReset(unittest.TestCase):
          and: STDERR is silent.
          and: EXIT_CODE_OK is returned
         """
+        mock_ez_outlet.return_value.__enter__.return_value = mock_ez_outlet.return_value
         hostname = '255.254.253.252'
         wait_time = 1
         args = ['ez_outlet.py', 'reset', hostname, ezoutlet.constants.RESET_TIME_ARG_SHORT, str(wait_time)]
@@ -296,6 +310,691 @@ class TestMainReset(unittest.TestCase):
 
         mock_ez_outlet.assert_called_with(post_reset_delay=ez_outlet.EzOutlet.DEFAULT_WAIT_TIME)
 
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.EzOutlet')
+    def test_reset_cmd_lock_dir(self, mock_ez_outlet):
+        """
+        Given: Mock EzOutlet.
+        When: Calling main() with a target and --lock-dir DIR.
+        Then: EzOutlet constructor is called with a FileResetCoordinator on DIR.
+         and: EXIT_CODE_OK is returned
+        """
+        args = ['ez_outlet.py', 'reset', '255.254.253.252', ezoutlet.constants.LOCK_DIR_ARG_LONG, 'locks']
+
+        exit_code = ezoutlet.main(args)
+
+        _, kwargs = mock_ez_outlet.call_args
+        assert isinstance(kwargs['coordinator'], ezoutlet.coordination.FileResetCoordinator)
+        assert kwargs['coordinator'].directory == 'locks'
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.EzOutlet')
+    def test_reset_cmd_retries(self, mock_ez_outlet):
+        """
+        Given: Mock EzOutlet.
+        When: Calling main() with a target and --retries 2.
+        Then: EzOutlet constructor is called with a RetryPolicy of 3 attempts.
+         and: EXIT_CODE_OK is returned
+        """
+        args = ['ez_outlet.py', 'reset', '255.254.253.252', ezoutlet.constants.RETRIES_ARG_LONG, '2']
+
+        exit_code = ezoutlet.main(args)
+
+        _, kwargs = mock_ez_outlet.call_args
+        assert kwargs['retry_policy'].max_attempts == 3
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.EzOutlet')
+    def test_reset_cmd_timeouts_and_deadline(self, mock_ez_outlet):
+        """
+        Given: Mock EzOutlet.
+        When: Calling main() with a target, --connect-timeout, --read-timeout and --deadline.
+        Then: EzOutlet constructor is called with connect_timeout and read_timeout == given values.
+         and: EzOutlet.reset is called with deadline == given value.
+         and: EXIT_CODE_OK is returned
+        """
+        mock_ez_outlet.return_value.__enter__.return_value = mock_ez_outlet.return_value
+        args = ['ez_outlet.py', 'reset', '255.254.253.252',
+                ezoutlet.constants.CONNECT_TIMEOUT_ARG_LONG, '0.2',
+                ezoutlet.constants.READ_TIMEOUT_ARG_LONG, '5',
+                ezoutlet.constants.DEADLINE_ARG_LONG, '30']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_ez_outlet.assert_called_once_with(hostname='255.254.253.252', connect_timeout=0.2, read_timeout=5)
+        mock_ez_outlet.return_value.reset.assert_called_once_with(
+            post_reset_delay=EZ_OUTLET_RESET_DEFAULT_WAIT_TIME, deadline=30)
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_deadline_zero(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --deadline 0.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE for --deadline.
+        """
+        args = ['ez_outlet.py', 'reset', '255.254.253.252', ezoutlet.constants.DEADLINE_ARG_LONG, '0']
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE.format(
+            ezoutlet.constants.DEADLINE_ARG_LONG) in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_retries_negative(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --retries -1.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes RETRIES_NEGATIVE_ERROR_MESSAGE.
+        """
+        args = ['ez_outlet.py', 'reset', '255.254.253.252', ezoutlet.constants.RETRIES_ARG_LONG, '-1']
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.RETRIES_NEGATIVE_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
+
+class TestMainResetReadiness(unittest.TestCase):
+    hostname = '255.254.253.252'
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.EzOutlet')
+    def test_reset_cmd_ready_tcp(self, mock_ez_outlet):
+        """
+        Given: Mock EzOutlet.
+        When: Calling main() with a target, --reset-time and --ready-tcp HOST:PORT.
+        Then: EzOutlet.reset is called with a TcpProbe for HOST:PORT.
+         and: EXIT_CODE_OK is returned
+        """
+        mock_ez_outlet.return_value.__enter__.return_value = mock_ez_outlet.return_value
+        args = ['ez_outlet.py', 'reset', self.hostname, '-t', '60',
+                ezoutlet.constants.READY_TCP_ARG_LONG, '10.0.0.5:22']
+
+        exit_code = ezoutlet.main(args)
+
+        _, kwargs = mock_ez_outlet.return_value.reset.call_args
+        assert kwargs['post_reset_delay'] == 60
+        assert repr(kwargs['readiness_probe']) == repr(ezoutlet.readiness.TcpProbe('10.0.0.5', 22))
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_ready_without_reset_time(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --ready-http but no --reset-time.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes READY_PROBE_NEEDS_RESET_TIME_ERROR_MESSAGE.
+        """
+        args = ['ez_outlet.py', 'reset', self.hostname, ezoutlet.constants.READY_HTTP_ARG_LONG, 'http://10.0.0.5/']
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.READY_PROBE_NEEDS_RESET_TIME_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_ready_tcp_bad_format(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --ready-tcp lacking a port.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes READY_TCP_FORMAT_ERROR_MESSAGE.
+        """
+        args = ['ez_outlet.py', 'reset', self.hostname, '-t', '60', ezoutlet.constants.READY_TCP_ARG_LONG, '10.0.0.5']
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.READY_TCP_FORMAT_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
+
+class TestMainResetFleet(unittest.TestCase):
+    hostnames = ['255.254.253.252', '255.254.253.251', '255.254.253.250']
+    arbitrary_msg = 'arbitrary message'
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_reset_cmd_many_targets(self, mock_fleet):
+        """
+        Given: Mock EzOutletFleet which resets every target successfully.
+        When: Calling main() with several targets and --parallel.
+        Then: EzOutletFleet is constructed with all targets and max_workers == given value.
+         and: EzOutletFleet.reset is called with post_reset_delay == given value.
+         and: STDOUT has one JSON summary line per target, in order.
+         and: EXIT_CODE_OK is returned
+        """
+        mock_fleet.return_value.__enter__.return_value = mock_fleet.return_value
+        mock_fleet.return_value.reset.return_value = dict(
+            (h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in self.hostnames)
+        args = ['ez_outlet.py', 'reset'] + self.hostnames + [ezoutlet.constants.PARALLEL_ARG_LONG, '5', '-t', '2']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_fleet.assert_called_once_with(hostnames=self.hostnames, max_workers=5)
+        mock_fleet.return_value.reset.assert_called_once_with(post_reset_delay=2)
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [line['target'] for line in lines] == self.hostnames
+        assert all(line['result'] == ezoutlet.constants.FLEET_RESULT_OK for line in lines)
+        assert ez_outlet.sys.stderr.getvalue() == ''
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_reset_cmd_many_targets_partial_failure(self, mock_fleet):
+        """
+        Given: Mock EzOutletFleet which fails to reset one target.
+        When: Calling main() with several targets.
+        Then: The failed target's summary line has result 'error' and the error message.
+         and: EXIT_CODE_ERR is returned
+        """
+        results = dict((h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in self.hostnames)
+        results[self.hostnames[1]] = ezoutlet.exceptions.EzOutletError(self.arbitrary_msg)
+        mock_fleet.return_value.__enter__.return_value = mock_fleet.return_value
+        mock_fleet.return_value.reset.return_value = results
+        args = ['ez_outlet.py', 'reset'] + self.hostnames
+
+        exit_code = ezoutlet.main(args)
+
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert lines[1] == {'target': self.hostnames[1],
+                            'result': ezoutlet.constants.FLEET_RESULT_ERROR,
+                            'error': self.arbitrary_msg}
+        assert exit_code == EXIT_CODE_ERR
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stdin')
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_reset_cmd_targets_stdin(self, mock_fleet, mock_stdin):
+        """
+        Given: Mock EzOutletFleet.
+          and: Mock STDIN listing targets, with comments and blank lines.
+        When: Calling main() with --targets-file -.
+        Then: EzOutletFleet is constructed with the listed targets.
+        """
+        mock_stdin.__iter__.return_value = iter(['# rack 1\n', self.hostnames[0] + '\n', '\n',
+                                                 self.hostnames[1] + '\n'])
+        mock_fleet.return_value.__enter__.return_value = mock_fleet.return_value
+        mock_fleet.return_value.reset.return_value = dict(
+            (h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in self.hostnames[:2])
+        args = ['ez_outlet.py', 'reset', ezoutlet.constants.TARGETS_FILE_ARG_LONG, '-']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_fleet.assert_called_once_with(hostnames=self.hostnames[:2],
+                                           max_workers=ezoutlet.constants.DEFAULT_FLEET_MAX_WORKERS)
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_parallel_zero(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --parallel 0.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes PARALLEL_NOT_POSITIVE_ERROR_MESSAGE.
+        """
+        args = ['ez_outlet.py', 'reset', '1.2.3.4', ezoutlet.constants.PARALLEL_ARG_LONG, '0']
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.PARALLEL_NOT_POSITIVE_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    @mock.patch('ezoutlet.process_fleet.ProcessFleet')
+    def test_reset_cmd_processes(self, mock_process_fleet, mock_fleet):
+        """
+        Given: Mock ProcessFleet which resets every target successfully.
+        When: Calling main() with several targets, --processes, --parallel and --retries.
+        Then: ProcessFleet is constructed with all targets and the given options; EzOutletFleet is not used.
+         and: ProcessFleet.reset is called with post_reset_delay == given value.
+         and: STDOUT has one JSON summary line per target, in order.
+         and: EXIT_CODE_OK is returned
+        """
+        mock_process_fleet.return_value.reset.return_value = dict(
+            (h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in self.hostnames)
+        args = ['ez_outlet.py', 'reset'] + self.hostnames + [ezoutlet.constants.PROCESSES_ARG_LONG, '2',
+                                                             ezoutlet.constants.PARALLEL_ARG_LONG, '5',
+                                                             ezoutlet.constants.RETRIES_ARG_LONG, '1', '-t', '2']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_process_fleet.assert_called_once_with(hostnames=self.hostnames, processes=2, max_workers=5,
+                                                   connect_timeout=None, read_timeout=None, retries=1,
+                                                   retry_backoff=ezoutlet.constants.DEFAULT_RETRY_BACKOFF,
+                                                   outlet_options=None)
+        mock_process_fleet.return_value.reset.assert_called_once_with(post_reset_delay=2)
+        assert mock_fleet.call_count == 0
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [line['target'] for line in lines] == self.hostnames
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_reset_cmd_stream(self, mock_fleet):
+        """
+        Given: Mock EzOutletFleet whose iter_reset yields the targets out of order, one failed.
+        When: Calling main() with several targets and --stream.
+        Then: EzOutletFleet.iter_reset is called with post_reset_delay == given value; reset is not.
+         and: STDOUT has one JSON summary line per target, in the order yielded.
+         and: EXIT_CODE_ERR is returned
+        """
+        yielded = [(self.hostnames[2], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS),
+                   (self.hostnames[0], ezoutlet.exceptions.EzOutletError(self.arbitrary_msg)),
+                   (self.hostnames[1], ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)]
+        mock_fleet.return_value.__enter__.return_value = mock_fleet.return_value
+        mock_fleet.return_value.iter_reset.return_value = iter(yielded)
+        args = ['ez_outlet.py', 'reset'] + self.hostnames + [ezoutlet.constants.STREAM_ARG_LONG, '-t', '2']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_fleet.return_value.iter_reset.assert_called_once_with(post_reset_delay=2)
+        assert mock_fleet.return_value.reset.call_count == 0
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [(line['target'], line['result']) for line in lines] == [
+            (self.hostnames[2], ezoutlet.constants.FLEET_RESULT_OK),
+            (self.hostnames[0], ezoutlet.constants.FLEET_RESULT_ERROR),
+            (self.hostnames[1], ezoutlet.constants.FLEET_RESULT_OK)]
+        assert exit_code == EXIT_CODE_ERR
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_reset_cmd_rate_limited(self, mock_fleet):
+        """
+        Given: Mock EzOutletFleet.
+        When: Calling main() with several targets, --rate, --stagger and --group-rate for two of them.
+        Then: EzOutletFleet is constructed with a RateLimiter.
+         and: The group's hosts share a limit which the third host does not.
+        """
+        mock_fleet.return_value.__enter__.return_value = mock_fleet.return_value
+        mock_fleet.return_value.reset.return_value = dict(
+            (h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in self.hostnames)
+        args = ['ez_outlet.py', 'reset'] + self.hostnames + [
+            ezoutlet.constants.RATE_ARG_LONG, '1000', ezoutlet.constants.STAGGER_ARG_LONG, '0',
+            ezoutlet.constants.GROUP_RATE_ARG_LONG, self.hostnames[0] + '=1',
+            ezoutlet.constants.GROUP_RATE_ARG_LONG, self.hostnames[1] + '=1']
+
+        exit_code = ezoutlet.main(args)
+
+        rate_limiter = mock_fleet.call_args[1]['rate_limiter']
+        assert isinstance(rate_limiter, ezoutlet.rate_limit.RateLimiter)
+        assert [len(rate_limiter._buckets(h)) for h in self.hostnames] == [2, 2, 1]
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_rate_invalid(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --rate 0, --burst 0, and a --group-rate without a rate.
+        Then: EXIT_CODE_PARSER_ERR is returned each time
+         and: STDERR includes the matching error messages.
+        """
+        base_args = ['ez_outlet.py', 'reset'] + self.hostnames
+
+        exit_codes = [ezoutlet.main(base_args + extra_args) for extra_args in (
+            [ezoutlet.constants.RATE_ARG_LONG, '0'],
+            [ezoutlet.constants.BURST_ARG_LONG, '0'],
+            [ezoutlet.constants.GROUP_RATE_ARG_LONG, '@rack'])]
+
+        assert exit_codes == [EXIT_CODE_PARSER_ERR] * 3
+        stderr = ez_outlet.sys.stderr.getvalue()
+        assert ezoutlet.constants.RATE_NOT_POSITIVE_ERROR_MESSAGE.format(ezoutlet.constants.RATE_ARG_LONG) in stderr
+        assert ezoutlet.constants.BURST_NOT_POSITIVE_ERROR_MESSAGE in stderr
+        assert ezoutlet.constants.GROUP_RATE_FORMAT_ERROR_MESSAGE in stderr
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_cmd_processes_not_allowed(self):
+        """
+        Given: Nothing.
+        When: Calling main() with --processes and --lock-dir, and with --processes -1.
+        Then: EXIT_CODE_PARSER_ERR is returned each time
+         and: STDERR includes PROCESSES_NOT_ALLOWED_ERROR_MESSAGE and PROCESSES_NEGATIVE_ERROR_MESSAGE.
+        """
+        base_args = ['ez_outlet.py', 'reset'] + self.hostnames
+
+        lock_dir_exit_code = ezoutlet.main(base_args + [ezoutlet.constants.PROCESSES_ARG_LONG, '0',
+                                                        ezoutlet.constants.LOCK_DIR_ARG_LONG, '/tmp'])
+        negative_exit_code = ezoutlet.main(base_args + [ezoutlet.constants.PROCESSES_ARG_LONG, '-1'])
+
+        assert lock_dir_exit_code == EXIT_CODE_PARSER_ERR
+        assert negative_exit_code == EXIT_CODE_PARSER_ERR
+        stderr = ez_outlet.sys.stderr.getvalue()
+        assert ezoutlet.constants.PROCESSES_NOT_ALLOWED_ERROR_MESSAGE.format(
+            ezoutlet.constants.LOCK_DIR_ARG_LONG) in stderr
+        assert ezoutlet.constants.PROCESSES_NEGATIVE_ERROR_MESSAGE in stderr
+
+
+class TestMainResetInventory(unittest.TestCase):
+    inventory = {
+        'outlets': {
+            'dut1': {'host': '10.0.0.1', 'post_reset_delay': 30, 'ready_tcp': '10.0.1.1:22', 'timeout': 1},
+            'dut2': {'host': '10.0.0.2', 'reset_interval': 5},
+        },
+        'groups': {'rack': ['dut1', 'dut2']},
+    }
+
+    def setup_method(self, _):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'inventory.json')
+        with io.open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.inventory))
+        # Keep the inventory cache out of the real home directory.
+        self.environ = mock.patch.dict(os.environ, {'HOME': self.directory})
+        self.environ.start()
+        os.environ.pop(ezoutlet.constants.INVENTORY_ENV_VAR, None)
+
+    def teardown_method(self, _):
+        self.environ.stop()
+        shutil.rmtree(self.directory)
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_reset_group(self, mock_fleet):
+        """
+        Given: Mock EzOutletFleet.
+          and: Inventory file with a group of two outlets with their own options.
+        When: Calling main() with @group and --inventory.
+        Then: EzOutletFleet is constructed with the group's hosts and their timeouts.
+         and: EzOutletFleet.reset is called with their reset options and readiness probe.
+         and: EXIT_CODE_OK is returned
+        """
+        hosts = ['10.0.0.1', '10.0.0.2']
+        mock_fleet.return_value.__enter__.return_value = mock_fleet.return_value
+        mock_fleet.return_value.reset.return_value = dict(
+            (h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in hosts)
+        args = ['ez_outlet.py', 'reset', '@rack', ezoutlet.constants.INVENTORY_ARG_LONG, self.path]
+
+        exit_code = ezoutlet.main(args)
+
+        mock_fleet.assert_called_once_with(hostnames=hosts,
+                                           max_workers=ezoutlet.constants.DEFAULT_FLEET_MAX_WORKERS,
+                                           outlet_options={'10.0.0.1': {'timeout': 1}})
+        kwargs = mock_fleet.return_value.reset.call_args[1]
+        assert kwargs['post_reset_delay'] == 0
+        assert kwargs['reset_options'] == {'10.0.0.1': {'post_reset_delay': 30},
+                                           '10.0.0.2': {'ez_outlet_reset_interval': 5}}
+        probe = kwargs['readiness_probes']['10.0.0.1']
+        assert isinstance(probe, ezoutlet.readiness.TcpProbe)
+        assert sorted(kwargs['readiness_probes']) == ['10.0.0.1']
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=io.StringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=io.StringIO())
+    @mock.patch('ezoutlet.ez_outlet.EzOutlet')
+    def test_reset_name_options_overridden(self, mock_ez_outlet):
+        """
+        Given: Mock EzOutlet.
+          and: Inventory file set through the environment.
+        When: Calling main() with one outlet name, -t and --read-timeout.
+        Then: EzOutlet is constructed with the outlet's host, its timeout and the given read timeout.
+         and: EzOutlet.reset is called with the given post_reset_delay and the outlet's readiness probe.
+        """
+        mock_ez_outlet.return_value.__enter__.return_value = mock_ez_outlet.return_value
+        os.environ[ezoutlet.constants.INVENTORY_ENV_VAR] = self.path
+        args = ['ez_outlet.py', 'reset', 'dut1', '-t', '7', ezoutlet.constants.READ_TIMEOUT_ARG_LONG, '3']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_ez_outlet.assert_called_once_with(hostname='10.0.0.1', timeout=1, read_timeout=3)
+        kwargs = mock_ez_outlet.return_value.reset.call_args[1]
+        assert kwargs['post_reset_delay'] == 7
+        assert isinstance(kwargs['readiness_probe'], ezoutlet.readiness.TcpProbe)
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_group_without_inventory(self):
+        """
+        Given: No inventory.
+        When: Calling main() with @group.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR explains that groups need an inventory.
+        """
+        args = ['ez_outlet.py', 'reset', '@rack']
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.NO_INVENTORY_GROUP_ERROR_MESSAGE.format(
+            '@rack', ezoutlet.constants.INVENTORY_ARG_LONG,
+            ezoutlet.constants.INVENTORY_ENV_VAR) in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_reset_unknown_group(self):
+        """
+        Given: Inventory file.
+        When: Calling main() with a group it does not have.
+        Then: EXIT_CODE_ERR is returned
+        """
+        args = ['ez_outlet.py', 'reset', '@nope', ezoutlet.constants.INVENTORY_ARG_LONG, self.path]
+
+        exit_code = ezoutlet.main(args)
+
+        assert exit_code == EXIT_CODE_ERR
+
+
+class TestMainClient(unittest.TestCase):
+    hostnames = ['255.254.253.252', '255.254.253.251']
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.daemon_client.DaemonClient')
+    def test_client_reset(self, mock_client):
+        """
+        Given: Mock DaemonClient which resets every target successfully.
+        When: Calling main() with 'client reset', targets, --port and -t.
+        Then: DaemonClient is constructed with address == (DAEMON_HOST, given port).
+         and: DaemonClient.reset is called with the targets and post_reset_delay == given value.
+         and: STDOUT has one JSON summary line per target.
+         and: EXIT_CODE_OK is returned
+        """
+        mock_client.return_value.reset.return_value = [
+            {'target': h, 'result': ezoutlet.constants.FLEET_RESULT_OK, 'response': '0,0'} for h in self.hostnames]
+        args = ['ez_outlet.py', 'client', 'reset'] + self.hostnames + [ezoutlet.constants.PORT_ARG_LONG, '7000',
+                                                                       '-t', '2']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_client.assert_called_once_with(address=(ezoutlet.constants.DAEMON_HOST, 7000))
+        mock_client.return_value.reset.assert_called_once_with(
+            targets=self.hostnames, post_reset_delay=2, max_workers=ezoutlet.constants.DEFAULT_FLEET_MAX_WORKERS)
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [line['target'] for line in lines] == self.hostnames
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.daemon_client.DaemonClient')
+    def test_client_status(self, mock_client):
+        """
+        Given: Mock DaemonClient reporting the first target reachable and the rest unreachable.
+        When: Calling main() with 'client status', targets and --timeout.
+        Then: DaemonClient.status is called with the targets and timeout == given value.
+         and: STDOUT has one JSON status line per target.
+         and: EXIT_CODE_ERR is returned
+        """
+        mock_client.return_value.status.return_value = [
+            {'target': h, 'reachable': i == 0, 'latency': None, 'relay': None} for i, h in enumerate(self.hostnames)]
+        args = ['ez_outlet.py', 'client', 'status'] + self.hostnames + [ezoutlet.constants.STATUS_TIMEOUT_ARG_LONG,
+                                                                        '0.5']
+
+        exit_code = ezoutlet.main(args)
+
+        mock_client.return_value.status.assert_called_once_with(
+            targets=self.hostnames, timeout=0.5, max_workers=ezoutlet.constants.DEFAULT_FLEET_MAX_WORKERS)
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [(line['target'], line['reachable']) for line in lines] == [
+            (h, i == 0) for i, h in enumerate(self.hostnames)]
+        assert exit_code == EXIT_CODE_ERR
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_client_reset_missing_target(self):
+        """
+        Given: Nothing.
+        When: Calling main() with 'client reset' and no targets.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes TARGET_MISSING_ERROR_MESSAGE.
+        """
+        exit_code = ezoutlet.main(['ez_outlet.py', 'client', 'reset'])
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.TARGET_MISSING_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.daemon_client.DaemonClient')
+    def test_client_daemon_error(self, mock_client):
+        """
+        Given: Mock DaemonClient which raises EzOutletError.
+        When: Calling main() with 'client ping'.
+        Then: EXIT_CODE_ERR is returned
+         and: STDERR includes the error message.
+        """
+        mock_client.return_value.ping.side_effect = ezoutlet.exceptions.EzOutletError('arbitrary message')
+
+        exit_code = ezoutlet.main(['ez_outlet.py', 'client', 'ping'])
+
+        assert exit_code == EXIT_CODE_ERR
+        assert 'arbitrary message' in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.daemon_client.DaemonClient')
+    def test_client_metrics(self, mock_client):
+        """
+        Given: Mock DaemonClient whose metrics() returns Prometheus text.
+        When: Calling main() with 'client metrics'.
+        Then: STDOUT is the metrics text, unchanged.
+         and: EXIT_CODE_OK is returned
+        """
+        text = 'ezoutlet_resets_total{host="255.254.253.252",outcome="ok"} 1\n'
+        mock_client.return_value.metrics.return_value = text
+
+        exit_code = ezoutlet.main(['ez_outlet.py', 'client', 'metrics'])
+
+        assert ez_outlet.sys.stdout.getvalue() == text
+        assert exit_code == EXIT_CODE_OK
+
+
+class TestMainStatus(unittest.TestCase):
+    dead_hostname = '127.0.0.1:1'
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_status(self):
+        """
+        Given: Two running SimulatedOutlets, and an address nothing listens on.
+        When: Calling main() with 'status', all three targets and --timeout 1.
+        Then: STDOUT has one JSON line per target, in order.
+         and: The outlets are reachable with relay 'on'; the address is unreachable.
+         and: EXIT_CODE_ERR is returned
+        """
+        with simulator.SimulatorFarm(count=2) as farm:
+            targets = farm.hostnames + [self.dead_hostname]
+
+            exit_code = ezoutlet.main(['ez_outlet.py', 'status'] + targets +
+                                      [ezoutlet.constants.STATUS_TIMEOUT_ARG_LONG, '1'])
+
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [line['target'] for line in lines] == targets
+        assert [(line['reachable'], line['relay']) for line in lines] == [(True, 'on'), (True, 'on'), (False, None)]
+        assert exit_code == EXIT_CODE_ERR
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_status_timeout_not_positive(self):
+        """
+        Given: Nothing.
+        When: Calling main() with 'status', a target and --timeout 0.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE for --timeout.
+        """
+        exit_code = ezoutlet.main(['ez_outlet.py', 'status', self.dead_hostname,
+                                   ezoutlet.constants.STATUS_TIMEOUT_ARG_LONG, '0'])
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.TIMEOUT_NOT_POSITIVE_ERROR_MESSAGE.format(
+            ezoutlet.constants.STATUS_TIMEOUT_ARG_LONG) in ez_outlet.sys.stderr.getvalue()
+
+
+class TestMainPower(unittest.TestCase):
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_power_cycle(self):
+        """
+        Given: Two running SimulatedOutlets.
+        When: Calling main() with 'power cycle', both targets, --off-time 0 and --max-on 1.
+        Then: Each outlet is switched back on once.
+         and: STDOUT has one OK JSON summary line per target, in order.
+         and: EXIT_CODE_OK is returned
+        """
+        with simulator.SimulatorFarm(count=2) as farm:
+            exit_code = ezoutlet.main(['ez_outlet.py', 'power', 'cycle'] + farm.hostnames +
+                                      [ezoutlet.constants.OFF_TIME_ARG_LONG, '0',
+                                       ezoutlet.constants.MAX_ON_ARG_LONG, '1'])
+
+        lines = [json.loads(line) for line in ez_outlet.sys.stdout.getvalue().splitlines()]
+        assert [(line['target'], line['result']) for line in lines] == [
+            (h, ezoutlet.constants.FLEET_RESULT_OK) for h in farm.hostnames]
+        assert [len(o.turned_on_at) for o in farm.outlets] == [1, 1]
+        assert exit_code == EXIT_CODE_OK
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_power_max_on_not_positive(self):
+        """
+        Given: Nothing.
+        When: Calling main() with 'power on', a target and --max-on 0.
+        Then: EXIT_CODE_PARSER_ERR is returned
+         and: STDERR includes MAX_ON_NOT_POSITIVE_ERROR_MESSAGE.
+        """
+        exit_code = ezoutlet.main(['ez_outlet.py', 'power', 'on', '127.0.0.1:1', ezoutlet.constants.MAX_ON_ARG_LONG,
+                                   '0'])
+
+        assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.MAX_ON_NOT_POSITIVE_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
+    @mock.patch('ezoutlet.ez_outlet.sys.stdout', new=Py23FlexibleStringIO())
+    @mock.patch('ezoutlet.ez_outlet.sys.stderr', new=Py23FlexibleStringIO())
+    def test_power_off_rejects_on_options(self):
+        """
+        Given: Nothing.
+        When: Calling main() with 'power off', a target and --max-on 2, and again with --stagger 1.
+        Then: EXIT_CODE_PARSER_ERR is returned both times.
+         and: STDERR includes POWER_OFF_OPTIONS_ERROR_MESSAGE.
+        """
+        for option, value in ((ezoutlet.constants.MAX_ON_ARG_LONG, '2'), (ezoutlet.constants.STAGGER_ARG_LONG, '1')):
+            exit_code = ezoutlet.main(['ez_outlet.py', 'power', 'off', '127.0.0.1:1', option, value])
+
+            assert exit_code == EXIT_CODE_PARSER_ERR
+        assert ezoutlet.constants.POWER_OFF_OPTIONS_ERROR_MESSAGE in ez_outlet.sys.stderr.getvalue()
+
 
 class TestMainVersion(unittest.TestCase):
 
@@ -321,6 +1020,62 @@ class TestMainVersion(unittest.TestCase):
         assert ez_outlet.sys.stderr.getvalue() == ''
 
 
+class TestMainStartup(unittest.TestCase):
+    def test_version_does_not_import_requests(self):
+        """
+        Given: A fresh interpreter.
+        When: Importing ezoutlet and calling main() with 'version' argument.
+        Then: requests has not been imported.
+        """
+        code = ("import sys, ezoutlet; ezoutlet.main(['ez_outlet.py', 'version']);"
+                " sys.exit('requests' in sys.modules)")
+
+        exit_code = subprocess.call([sys.executable, '-c', code], stdout=subprocess.PIPE)
+
+        assert exit_code == 0
+
+    def test_client_does_not_import_requests(self):
+        """
+        Given: A fresh interpreter.
+        When: Calling main() with 'client ping' (no daemon is reachable on port 1).
+        Then: requests has not been imported.
+        """
+        code = ("import sys, ezoutlet; ezoutlet.main(['ez_outlet.py', 'client', 'ping', '--port', '1']);"
+                " sys.exit('requests' in sys.modules)")
+
+        exit_code = subprocess.call([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        assert exit_code == 0
+
+    def test_lazy_public_names(self):
+        """
+        Given: ezoutlet imported.
+        When: Accessing ezoutlet.EzOutlet.
+        Then: It is ez_outlet.EzOutlet.
+        """
+        assert ezoutlet.EzOutlet is ez_outlet.EzOutlet
+
+    def test_lazy_submodules(self):
+        """
+        Given: A fresh interpreter.
+        When: Importing ezoutlet and accessing ezoutlet.ez_outlet and ezoutlet.no_such_module.
+        Then: ezoutlet.ez_outlet is the ez_outlet module.
+         and: ezoutlet.no_such_module raises AttributeError.
+        """
+        code = ("import ezoutlet\n"
+                "assert ezoutlet.ez_outlet.EzOutlet is ezoutlet.EzOutlet\n"
+                "try:\n"
+                "    ezoutlet.no_such_module\n"
+                "except AttributeError:\n"
+                "    pass\n"
+                "else:\n"
+                "    raise SystemExit(1)\n")
+
+        exit_code = subprocess.call([sys.executable, '-c', code])
+
+        assert exit_code == 0
+
+
 class TestMainNoCommand(unittest.TestCase):
     @pytest.mark.skipif(sys.version_info >= (3, 3),
                         reason="Behavior differs based on version.")
@@ -0,0 +1,133 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import threading
+import time
+import unittest
+
+from concurrent import futures
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import ez_outlet
+from ezoutlet import outlet_pool
+from ezoutlet import simulator
+
+
+class InFlightSession(object):
+    """Fake session answering every GET after a short delay, tracking requests in flight per host."""
+
+    def __init__(self, delay):
+        self._delay = delay
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.max_in_flight = {}
+        self.max_total_in_flight = 0
+
+    def get(self, url, **_):
+        host = url.split('/')[2]
+        with self._lock:
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self._in_flight[host])
+            self.max_total_in_flight = max(self.max_total_in_flight, sum(self._in_flight.values()))
+        time.sleep(self._delay)
+        with self._lock:
+            self._in_flight[host] -= 1
+        return mock.MagicMock(text=ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+
+    def close(self):
+        pass
+
+
+class TestEzOutletPool(unittest.TestCase):
+    def test_one_outlet_per_host(self):
+        """
+        Given: EzOutletPool.
+        When: Getting the outlet for two hosts, one of them twice.
+        Then: The same EzOutlet is returned for the same host, and hostnames lists both hosts.
+        """
+        with outlet_pool.EzOutletPool(session=mock.MagicMock()) as uut:
+            first = uut.outlet('10.0.0.1')
+
+            self.assertIs(uut.outlet('10.0.0.1'), first)
+            self.assertIsNot(uut.outlet('10.0.0.2'), first)
+            self.assertEqual(sorted(uut.hostnames), ['10.0.0.1', '10.0.0.2'])
+
+    def test_power_operations_serialized_per_host(self):
+        """
+        Given: EzOutletPool with a session which takes a while to answer.
+        When: 8 threads reset and switch 2 hosts, 24 times in all.
+        Then: No host ever has two requests in flight at once.
+         and: Different hosts do have requests in flight at once.
+        """
+        session = InFlightSession(delay=0.01)
+        hosts = ['10.0.0.1', '10.0.0.2']
+        uut = outlet_pool.EzOutletPool(session=session)
+
+        def work(i):
+            host = hosts[i % len(hosts)]
+            if i % 3 == 0:
+                return uut.turn_off(host)
+            return uut.reset(host, post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(work, range(24)))
+
+        self.assertEqual(results, [ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS] * 24)
+        self.assertEqual(session.max_in_flight, dict((h, 1) for h in hosts))
+        self.assertGreater(session.max_total_in_flight, 1)
+
+    def test_lock_held_across_operations(self):
+        """
+        Given: EzOutletPool.
+        When: One thread holds a host's lock while another resets the host.
+        Then: The reset waits for the lock; the lock is reentrant for its holder.
+        """
+        session = InFlightSession(delay=0)
+        uut = outlet_pool.EzOutletPool(session=session)
+        done = threading.Event()
+
+        with uut.lock('10.0.0.1'):
+            uut.turn_off('10.0.0.1')
+            thread = threading.Thread(target=lambda: uut.reset('10.0.0.1', ez_outlet_reset_interval=0) and done.set())
+            thread.start()
+            self.assertFalse(done.wait(0.05))
+        thread.join()
+
+        self.assertTrue(done.is_set())
+
+
+class TestEzOutletPoolStress(unittest.TestCase):
+    outlets = 16
+    operations = 32
+    latency = 0.02
+
+    def run_resets(self, farm, threads):
+        """Returns: Resets per second, resetting farm's outlets round-robin from threads threads."""
+        hostnames = farm.hostnames
+        with outlet_pool.EzOutletPool() as uut:
+            start = time.time()
+            with futures.ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(lambda i: uut.reset(hostnames[i % len(hostnames)], ez_outlet_reset_interval=0),
+                                  range(self.operations)))
+            return self.operations / (time.time() - start)
+
+    def test_throughput_scales_with_threads(self):
+        """
+        Given: A SimulatorFarm of 16 outlets, each answering after 20 ms.
+        When: Resetting them 32 times through one shared EzOutletPool, from 1 and then 8 threads.
+        Then: Every reset reaches its outlet.
+         and: 8 threads get at least 3 times the throughput of 1.
+        """
+        with simulator.SimulatorFarm(count=self.outlets, relay_cycle_time=0, latency=self.latency) as farm:
+            single = self.run_resets(farm, threads=1)
+            parallel = self.run_resets(farm, threads=8)
+
+            self.assertEqual(sum(o.resets_triggered for o in farm.outlets), 2 * self.operations)
+        self.assertGreaterEqual(parallel, 3 * single)
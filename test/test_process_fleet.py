@@ -0,0 +1,173 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import functools
+import multiprocessing
+import os
+import sys
+import unittest
+
+from concurrent import futures
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+import ezoutlet.exceptions
+from ezoutlet import ez_outlet
+from ezoutlet import fleet
+from ezoutlet import process_fleet
+from ezoutlet import simulator
+
+
+CRASHING_HOST = 'crash.invalid'
+
+
+def _crash_on_crashing_host():
+    """Worker initializer: make the worker process die abruptly when asked to reset CRASHING_HOST."""
+    make_fleet = fleet.EzOutletFleet
+
+    def crash_or_make_fleet(hostnames, **kwargs):
+        if CRASHING_HOST in hostnames:
+            os._exit(1)
+        return make_fleet(hostnames=hostnames, **kwargs)
+
+    fleet.EzOutletFleet = crash_or_make_fleet
+
+
+@mock.patch('ezoutlet.process_fleet._fd_limit', return_value=1000)
+@mock.patch('ezoutlet.process_fleet._cpu_count', return_value=8)
+class TestSizePool(unittest.TestCase):
+    def test_small_fleet_one_process(self, mock_cpu_count, mock_fd_limit):
+        """
+        Given: 8 CPUs and a file descriptor limit of 1000.
+        When: Sizing the pool for 100 hosts.
+        Then: One process resets all of them as one shard.
+        """
+        self.assertEqual(process_fleet.size_pool(100), (1, 100))
+
+    def test_one_process_per_cpu(self, mock_cpu_count, mock_fd_limit):
+        """
+        Given: 8 CPUs and a file descriptor limit of 1000.
+        When: Sizing the pool for 4000 hosts.
+        Then: 8 processes each reset a shard of 500.
+        """
+        self.assertEqual(process_fleet.size_pool(4000), (8, 500))
+
+    def test_shards_capped_by_fd_limit(self, mock_cpu_count, mock_fd_limit):
+        """
+        Given: 8 CPUs and a file descriptor limit of 1000.
+        When: Sizing the pool for 20000 hosts.
+        Then: 8 processes reset shards small enough to leave DEFAULT_FD_RESERVE descriptors free.
+        """
+        self.assertEqual(process_fleet.size_pool(20000), (8, 1000 - ezoutlet.constants.DEFAULT_FD_RESERVE))
+
+    def test_processes_given(self, mock_cpu_count, mock_fd_limit):
+        """
+        Given: 8 CPUs.
+        When: Sizing the pool for 2 hosts with processes=3.
+        Then: Only 2 processes are used, one host each.
+        """
+        self.assertEqual(process_fleet.size_pool(2, processes=3), (2, 1))
+
+
+class TestProcessFleet(unittest.TestCase):
+    def test_reset_in_processes(self):
+        """
+        Given: A SimulatorFarm of 6 outlets.
+        When: Resetting them with a ProcessFleet of 2 processes.
+        Then: There are 2 shards of 3 hosts.
+         and: Every outlet is reset once, and maps to EXPECTED_RESPONSE_CONTENTS.
+        """
+        with simulator.SimulatorFarm(count=6, relay_cycle_time=0) as farm:
+            uut = process_fleet.ProcessFleet(hostnames=farm.hostnames, processes=2)
+
+            results = uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+            self.assertEqual([len(shard) for shard in uut.shards], [3, 3])
+            self.assertEqual(results, dict((h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in farm.hostnames))
+            self.assertEqual([o.resets_triggered for o in farm.outlets], [1] * 6)
+
+    @unittest.skipIf(sys.version_info < (3, 7) or 'fork' not in multiprocessing.get_all_start_methods(),
+                     'needs ProcessPoolExecutor(initializer=...) and the fork start method')
+    def test_dead_worker_isolated(self):
+        """
+        Given: A SimulatorFarm of 3 outlets, and a host whose worker process dies abruptly.
+        When: Resetting all 4 with a ProcessFleet of 4 real worker processes.
+        Then: Only the dying host maps to an EzOutletError with SHARD_FAILED_MSG.
+         and: Every simulated outlet is reset once, and maps to EXPECTED_RESPONSE_CONTENTS.
+        """
+        executor_factory = functools.partial(futures.ProcessPoolExecutor, initializer=_crash_on_crashing_host,
+                                             mp_context=multiprocessing.get_context('fork'))
+        with simulator.SimulatorFarm(count=3, relay_cycle_time=0) as farm:
+            hostnames = farm.hostnames[:2] + [CRASHING_HOST] + farm.hostnames[2:]
+            uut = process_fleet.ProcessFleet(hostnames=hostnames, processes=4, executor_factory=executor_factory)
+
+            results = uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+            error = results.pop(CRASHING_HOST)
+            self.assertIsInstance(error, ezoutlet.exceptions.EzOutletError)
+            self.assertTrue(str(error).startswith(process_fleet.SHARD_FAILED_MSG.format(1, '')))
+            self.assertEqual(results, dict((h, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS) for h in farm.hostnames))
+            self.assertEqual([o.resets_triggered for o in farm.outlets], [1] * 3)
+
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_failed_shard_isolated(self, mock_fleet):
+        """
+        Given: ProcessFleet of 2 processes over 4 hosts, run in threads.
+          and: Mock EzOutletFleet which fails to start for the shard containing host 'bad'.
+        When: Calling reset().
+        Then: The failed shard's hosts map to an EzOutletError with SHARD_FAILED_MSG.
+         and: The other shard's hosts map to their responses.
+        """
+        def make_fleet(hostnames, **_):
+            if 'bad' in hostnames:
+                raise RuntimeError('worker crashed')
+            ez_fleet = mock.MagicMock()
+            ez_fleet.__enter__.return_value.reset.return_value = dict((h, 'ok') for h in hostnames)
+            return ez_fleet
+        mock_fleet.side_effect = make_fleet
+        uut = process_fleet.ProcessFleet(hostnames=['a', 'b', 'bad', 'c'], processes=2,
+                                         executor_factory=futures.ThreadPoolExecutor)
+
+        results = uut.reset()
+
+        self.assertEqual((results['a'], results['b']), ('ok', 'ok'))
+        for hostname in ('bad', 'c'):
+            self.assertIsInstance(results[hostname], ezoutlet.exceptions.EzOutletError)
+            self.assertEqual(str(results[hostname]), process_fleet.SHARD_FAILED_MSG.format(2, 'worker crashed'))
+
+    @mock.patch('ezoutlet.fleet.EzOutletFleet')
+    def test_iter_reset_by_shard(self, mock_fleet):
+        """
+        Given: ProcessFleet of 2 processes over 4 hosts, run in threads, with mock EzOutletFleets.
+        When: Iterating over iter_reset().
+        Then: Each host is yielded once with its shard's result.
+        """
+        mock_fleet.side_effect = lambda hostnames, **_: mock.MagicMock(**{
+            '__enter__.return_value.reset.return_value': dict((h, 'ok ' + h) for h in hostnames)})
+        uut = process_fleet.ProcessFleet(hostnames=['a', 'b', 'c', 'd'], processes=2,
+                                         executor_factory=futures.ThreadPoolExecutor)
+
+        results = list(uut.iter_reset())
+
+        self.assertEqual(sorted(results), [(h, 'ok ' + h) for h in ('a', 'b', 'c', 'd')])
+
+    def test_unpicklable_exception_replaced(self):
+        """
+        Given: An exception which cannot be pickled.
+        When: Preparing it to be sent from a worker.
+        Then: It is replaced by an EzOutletError with the same message; responses are unchanged.
+        """
+        class LocalError(Exception):
+            pass
+
+        result = process_fleet._picklable(LocalError('boom'))
+
+        self.assertIsInstance(result, ezoutlet.exceptions.EzOutletError)
+        self.assertEqual(str(result), 'boom')
+        self.assertEqual(process_fleet._picklable('0,0'), '0,0')
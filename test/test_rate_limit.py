@@ -0,0 +1,171 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import threading
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+import pytest
+
+from ezoutlet import exceptions
+from ezoutlet import fleet
+from ezoutlet import rate_limit
+from ezoutlet import simulator
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate_and_burst(self):
+        """
+        Given: TokenBucket of 10 requests per second with a burst of 2.
+        When: Taking requests as soon as they are allowed, at time 0.
+        Then: Two requests are allowed at once, then one every 0.1 seconds.
+        """
+        uut = rate_limit.TokenBucket(rate=10, burst=2)
+
+        allowed = []
+        for _ in range(4):
+            allowed.append(uut.next_allowed(0))
+            uut.take(allowed[-1])
+
+        self.assertEqual(allowed, pytest.approx([0, 0, 0.1, 0.2]))
+
+    def test_stagger(self):
+        """
+        Given: TokenBucket with no rate and a stagger of 0.5 seconds.
+        When: Taking a request at time 1.
+        Then: The next request is allowed at time 1.5, or later if asked later.
+        """
+        uut = rate_limit.TokenBucket(stagger=0.5)
+
+        uut.take(1)
+
+        self.assertEqual(uut.next_allowed(1.1), 1.5)
+        self.assertEqual(uut.next_allowed(2), 2)
+
+
+@mock.patch('ezoutlet.rate_limit.time')
+@mock.patch('ezoutlet.rate_limit.instrumentation.clock', return_value=100)
+class TestRateLimiter(unittest.TestCase):
+    def test_rate(self, mock_clock, mock_time):
+        """
+        Given: RateLimiter of 10 requests per second, with the clock stopped.
+        When: Acquiring 3 requests to different hosts.
+        Then: They wait 0, 0.1 and 0.2 seconds, sleeping for each wait.
+        """
+        uut = rate_limit.RateLimiter(rate=10)
+
+        waits = [uut.acquire(host) for host in ('a', 'b', 'c')]
+
+        self.assertEqual(waits, pytest.approx([0, 0.1, 0.2]))
+        self.assertEqual([c[0][0] for c in mock_time.sleep.call_args_list], pytest.approx([0.1, 0.2]))
+
+    def test_subnet_rate(self, mock_clock, mock_time):
+        """
+        Given: RateLimiter of 10 requests per second per subnet, with the clock stopped.
+        When: Acquiring requests to hosts in one /24 (one with a port), and to a host in another.
+        Then: Requests to the same subnet are spaced apart; the other subnet does not wait.
+        """
+        uut = rate_limit.RateLimiter(subnet_rate=10)
+
+        waits = [uut.acquire(host) for host in ('10.0.0.1', '10.0.0.2', '10.0.1.1', '10.0.0.3:8080')]
+
+        self.assertEqual(waits, pytest.approx([0, 0.1, 0, 0.2]))
+
+    def test_subnet_of_hostname_resolved(self, mock_clock, mock_time):
+        """
+        Given: RateLimiter per subnet, with a resolver mapping two names into one /24.
+        When: Acquiring a request to each name.
+        Then: The second waits.
+        """
+        resolver = mock.MagicMock(**{'resolve.side_effect': {'a.lab': '10.0.0.1', 'b.lab': '10.0.0.2'}.get})
+        uut = rate_limit.RateLimiter(subnet_rate=10, resolver=resolver)
+
+        waits = [uut.acquire(host) for host in ('a.lab', 'b.lab')]
+
+        self.assertEqual(waits, pytest.approx([0, 0.1]))
+
+    def test_group_rate(self, mock_clock, mock_time):
+        """
+        Given: RateLimiter with a group of hosts a and b limited to 5 requests per second.
+        When: Acquiring requests to a, b and c.
+        Then: b waits for a; c, outside the group, does not wait.
+        """
+        uut = rate_limit.RateLimiter()
+        uut.add_group(['a', 'b'], rate=5)
+
+        waits = [uut.acquire(host) for host in ('a', 'b', 'c')]
+
+        self.assertEqual(waits, pytest.approx([0, 0.2, 0]))
+
+    def test_deadline(self, mock_clock, mock_time):
+        """
+        Given: RateLimiter of 1 request per second, with one request already sent.
+        When: Acquiring a request which must be sent within 0.5 seconds.
+        Then: EzOutletError is raised, without claiming the slot.
+        """
+        mock_time.time.return_value = 1000
+        uut = rate_limit.RateLimiter(rate=1)
+        uut.acquire('a')
+
+        with pytest.raises(exceptions.EzOutletError):
+            uut.acquire('a', deadline_at=1000.5)
+        self.assertEqual(uut.acquire('a'), pytest.approx(1))
+
+    def test_no_limits(self, mock_clock, mock_time):
+        """
+        Given: RateLimiter with no limits.
+        When: Acquiring requests.
+        Then: None waits.
+        """
+        uut = rate_limit.RateLimiter()
+
+        self.assertEqual([uut.acquire('a') for _ in range(3)], [0, 0, 0])
+        mock_time.sleep.assert_not_called()
+
+
+class TestRateLimiterThreads(unittest.TestCase):
+    def test_threads_paced(self):
+        """
+        Given: RateLimiter of 50 requests per second.
+        When: 10 threads acquire a request each.
+        Then: The last is released at least 0.18 seconds after the first.
+        """
+        uut = rate_limit.RateLimiter(rate=50)
+        released = []
+
+        def acquire():
+            uut.acquire('a')
+            released.append(time.time())
+
+        threads = [threading.Thread(target=acquire) for _ in range(10)]
+
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertGreaterEqual(max(released) - min(released), 0.18)
+
+    def test_fleet_status_staggered(self):
+        """
+        Given: A SimulatorFarm of 4 outlets.
+        When: Querying their status with an EzOutletFleet sharing a RateLimiter with a stagger of 0.1 seconds.
+        Then: Every outlet answers, and the sweep takes at least 0.3 seconds.
+        """
+        with simulator.SimulatorFarm(count=4) as farm:
+            with fleet.EzOutletFleet(hostnames=farm.hostnames,
+                                     rate_limiter=rate_limit.RateLimiter(stagger=0.1)) as uut:
+                start = time.time()
+                statuses = uut.status()
+                elapsed = time.time() - start
+
+        self.assertTrue(all(s.reachable for s in statuses.values()))
+        self.assertGreaterEqual(elapsed, 0.3)
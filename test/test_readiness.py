@@ -0,0 +1,102 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import socket
+import unittest
+
+import ezoutlet.exceptions
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import readiness
+
+
+class FakeClock(object):
+    """Stands in for the time module; sleep() advances time()."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestWaitUntilReady(unittest.TestCase):
+    def test_ready_immediately(self):
+        """
+        Given: Probe which succeeds on the first try.
+        When: Calling wait_until_ready(probe, timeout).
+        Then: The probe is called once.
+         and: No sleep occurs.
+        """
+        clock = FakeClock()
+        probe = mock.MagicMock(return_value=True)
+
+        with mock.patch('ezoutlet.readiness.time', new=clock):
+            elapsed = readiness.wait_until_ready(probe, timeout=10)
+
+        probe.assert_called_once_with()
+        self.assertEqual(clock.sleeps, [])
+        self.assertEqual(elapsed, 0)
+
+    def test_backoff(self):
+        """
+        Given: Probe which fails three times (once by raising), then succeeds.
+        When: Calling wait_until_ready(probe, timeout, initial_interval=1, backoff=2).
+        Then: Sleeps between tries grow as 1, 2, 4.
+         and: The elapsed time is returned.
+        """
+        clock = FakeClock()
+        probe = mock.MagicMock(side_effect=[False, socket.error(), False, True])
+
+        with mock.patch('ezoutlet.readiness.time', new=clock):
+            elapsed = readiness.wait_until_ready(probe, timeout=60, initial_interval=1, backoff=2)
+
+        self.assertEqual(clock.sleeps, [1, 2, 4])
+        self.assertEqual(elapsed, 7)
+
+    def test_timeout(self):
+        """
+        Given: Probe which never succeeds.
+        When: Calling wait_until_ready(probe, timeout=5, initial_interval=1, backoff=2).
+        Then: Sleeps never go past the timeout.
+         and: EzOutletError is raised with NOT_READY_MSG.
+        """
+        clock = FakeClock()
+        probe = mock.MagicMock(return_value=False)
+
+        with mock.patch('ezoutlet.readiness.time', new=clock):
+            with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+                readiness.wait_until_ready(probe, timeout=5, initial_interval=1, backoff=2)
+
+        self.assertEqual(clock.sleeps, [1, 2, 2])
+        self.assertEqual(str(e.exception), readiness.NOT_READY_MSG.format(5))
+
+
+class TestTcpProbe(unittest.TestCase):
+    def test_listening_port(self):
+        """
+        Given: A local listening TCP socket.
+        When: Calling TcpProbe for its port, then after closing it.
+        Then: True, then False is returned.
+        """
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        port = listener.getsockname()[1]
+        uut = readiness.TcpProbe('127.0.0.1', port)
+
+        self.assertTrue(uut())
+        listener.close()
+        self.assertFalse(uut())
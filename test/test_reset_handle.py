@@ -0,0 +1,100 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import threading
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import reset_handle
+
+
+# Suppress since PyCharm doesn't recognize @mock.patch.object
+# noinspection PyUnresolvedReferences
+@mock.patch('ezoutlet.reset_handle.time')
+class TestResetHandle(unittest.TestCase):
+    hostname = '12.34.56.78'
+    response = '0,0'
+
+    def test_wait_sleeps_remaining(self, mock_time):
+        """
+        Given: ResetHandle created at t=100 with delay 5.
+        When: Calling wait() at t=102.
+        Then: time.sleep(3) is called.
+        """
+        mock_time.time.return_value = 100
+        uut = reset_handle.ResetHandle(hostname=self.hostname, response=self.response, delay=5)
+        mock_time.time.return_value = 102
+
+        uut.wait()
+
+        mock_time.sleep.assert_called_once_with(3)
+
+    def test_wait_timeout(self, mock_time):
+        """
+        Given: ResetHandle created at t=100 with delay 5.
+        When: Calling wait(timeout=1) at t=100.
+        Then: time.sleep(1) is called.
+         and: False is returned.
+        """
+        mock_time.time.return_value = 100
+        uut = reset_handle.ResetHandle(hostname=self.hostname, response=self.response, delay=5)
+
+        result = uut.wait(timeout=1)
+
+        mock_time.sleep.assert_called_once_with(1)
+        self.assertFalse(result)
+
+    def test_done(self, mock_time):
+        """
+        Given: ResetHandle created at t=100 with delay 5.
+        When: Calling done() at t=104 and t=105.
+        Then: False, then True is returned.
+         and: No sleep occurs.
+        """
+        mock_time.time.return_value = 100
+        uut = reset_handle.ResetHandle(hostname=self.hostname, response=self.response, delay=5)
+
+        mock_time.time.return_value = 104
+        self.assertFalse(uut.done())
+        mock_time.time.return_value = 105
+        self.assertTrue(uut.done())
+        mock_time.sleep.assert_not_called()
+
+    def test_callback_when_done(self, mock_time):
+        """
+        Given: Completed ResetHandle.
+        When: Calling add_done_callback(fn).
+        Then: fn(handle) is called immediately.
+        """
+        mock_time.time.return_value = 100
+        uut = reset_handle.ResetHandle(hostname=self.hostname, response=self.response, delay=0)
+        callback = mock.MagicMock()
+
+        uut.add_done_callback(callback)
+
+        callback.assert_called_once_with(uut)
+
+
+class TestResetHandleTimer(unittest.TestCase):
+    def test_callback_after_delay(self):
+        """
+        Given: ResetHandle with a short delay.
+        When: Calling add_done_callback(fn) twice, before the reset is complete.
+        Then: Both callbacks are called with the handle once it completes.
+        """
+        uut = reset_handle.ResetHandle(hostname='12.34.56.78', response='0,0', delay=0.05)
+        called = []
+        event = threading.Event()
+
+        uut.add_done_callback(called.append)
+        uut.add_done_callback(lambda h: event.set())
+
+        self.assertTrue(event.wait(timeout=5))
+        self.assertEqual(called, [uut])
@@ -0,0 +1,209 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import threading
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+import pytest
+
+import ezoutlet.exceptions
+from ezoutlet import restart
+
+
+class TestRestartAdapter(unittest.TestCase):
+    def setup_method(self, _):
+        self.ez_outlet = mock.MagicMock(hostname='12.34.56.78')
+        self.handle = self.ez_outlet.begin_reset.return_value
+        self.handle.coalesced = False
+
+    def test_restart_does_not_block(self):
+        """
+        Given: RestartAdapter with post_reset_delay=30.
+        When: Calling it as a restart callback, then calling pre_send.
+        Then: The callback begins a reset with post_reset_delay=30 and does not wait for it.
+         and: pre_send waits for the reset.
+         and: The fuzz data logger is told about the restart.
+        """
+        logger = mock.MagicMock()
+        uut = restart.RestartAdapter(self.ez_outlet, post_reset_delay=30, ez_outlet_reset_interval=2)
+
+        uut(target=None, fuzz_data_logger=logger, session=None, sock=None)
+
+        self.ez_outlet.begin_reset.assert_called_once_with(post_reset_delay=30, ez_outlet_reset_interval=2)
+        self.handle.wait.assert_not_called()
+        assert uut.pending
+
+        uut.pre_send(target=None, fuzz_data_logger=logger, session=None)
+
+        self.handle.wait.assert_called_once_with()
+        assert not uut.pending
+        assert uut.stats.performed == 1
+        logger.log_info.assert_any_call(restart.RESTART_STARTED_MSG.format('12.34.56.78'))
+
+    def test_concurrent_restarts_start_one_reset(self):
+        """
+        Given: RestartAdapter whose EzOutlet.begin_reset blocks until released.
+        When: Calling restart() from two threads at once.
+        Then: Only one reset is begun.
+         and: The other restart joins it.
+        """
+        entered = threading.Event()
+        release = threading.Event()
+
+        def begin_reset(**kwargs):
+            entered.set()
+            release.wait(5)
+            return self.handle
+
+        self.ez_outlet.begin_reset.side_effect = begin_reset
+        uut = restart.RestartAdapter(self.ez_outlet)
+        results = []
+        first = threading.Thread(target=lambda: results.append(uut.restart()))
+        first.start()
+        assert entered.wait(5)
+        second = threading.Thread(target=lambda: results.append(uut.restart()))
+        second.start()
+        second.join(0.2)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        assert self.ez_outlet.begin_reset.call_count == 1
+        assert results == [True, True]
+        assert uut.stats.performed == 1
+        assert uut.stats.joined == 1
+
+    def test_pre_send_without_restart(self):
+        """
+        Given: RestartAdapter.
+        When: Calling pre_send without a restart.
+        Then: Nothing is reset or waited for.
+        """
+        uut = restart.RestartAdapter(self.ez_outlet)
+
+        uut.pre_send()
+
+        self.ez_outlet.begin_reset.assert_not_called()
+        assert uut.stats.as_dict()['requested'] == 0
+
+    def test_healthy_skipped(self):
+        """
+        Given: RestartAdapter with a health_check returning True.
+        When: Calling restart().
+        Then: False is returned, no reset is sent, and the restart is counted as skipped.
+        """
+        uut = restart.RestartAdapter(self.ez_outlet, health_check=lambda: True)
+
+        assert uut.restart() is False
+
+        self.ez_outlet.begin_reset.assert_not_called()
+        assert (uut.stats.requested, uut.stats.skipped, uut.stats.performed) == (1, 1, 0)
+
+    def test_pending_joined(self):
+        """
+        Given: RestartAdapter.
+        When: Calling restart() twice before pre_send.
+        Then: One reset is sent; the second restart is counted as joined.
+        """
+        uut = restart.RestartAdapter(self.ez_outlet)
+
+        assert uut.restart() is True
+        assert uut.restart() is True
+
+        self.ez_outlet.begin_reset.assert_called_once()
+        assert (uut.stats.requested, uut.stats.joined, uut.stats.performed) == (2, 1, 1)
+
+    @mock.patch('ezoutlet.restart.readiness.wait_until_ready', return_value=4)
+    def test_readiness_probe(self, mock_wait_until_ready):
+        """
+        Given: RestartAdapter with a readiness probe and post_reset_delay=60.
+        When: Restarting, then calling pre_send.
+        Then: The reset is begun with post_reset_delay=0.
+         and: pre_send polls the probe for at most 60 seconds after the reset.
+         and: The reset time is recorded with the EzOutlet.
+        """
+        probe = mock.MagicMock()
+        uut = restart.RestartAdapter(self.ez_outlet, post_reset_delay=60, ez_outlet_reset_interval=2,
+                                     readiness_probe=probe)
+
+        uut.restart()
+        uut.pre_send()
+
+        self.ez_outlet.begin_reset.assert_called_once_with(post_reset_delay=0, ez_outlet_reset_interval=2)
+        mock_wait_until_ready.assert_called_once_with(probe, timeout=60)
+        self.ez_outlet.record_reset_time.assert_called_once_with(6)
+
+    def test_deferred(self):
+        """
+        Given: RestartAdapter with defer=True and a health_check which fails.
+        When: Calling restart(), then pre_send.
+        Then: restart() does not reset.
+         and: pre_send checks health, resets and waits.
+        """
+        health_check = mock.MagicMock(side_effect=ezoutlet.exceptions.EzOutletError('down'))
+        uut = restart.RestartAdapter(self.ez_outlet, health_check=health_check, defer=True)
+
+        assert uut.restart() is False
+        self.ez_outlet.begin_reset.assert_not_called()
+        health_check.assert_not_called()
+
+        uut.pre_send()
+
+        health_check.assert_called_once_with()
+        self.ez_outlet.begin_reset.assert_called_once()
+        self.handle.wait.assert_called_once_with()
+
+    def test_failed_reset(self):
+        """
+        Given: RestartAdapter whose EzOutlet fails to begin a reset.
+        When: Calling restart().
+        Then: The EzOutletError is raised and counted as failed, and nothing is pending.
+        """
+        self.ez_outlet.begin_reset.side_effect = ezoutlet.exceptions.EzOutletError('no response')
+        uut = restart.RestartAdapter(self.ez_outlet)
+
+        with pytest.raises(ezoutlet.exceptions.EzOutletError):
+            uut.restart()
+
+        assert uut.stats.failed == 1
+        assert not uut.pending
+
+    @mock.patch('ezoutlet.instrumentation.clock')
+    def test_time_accounting(self, mock_clock):
+        """
+        Given: RestartAdapter.
+        When: A reset is begun at t=10 (acknowledged at 10.5), and pre_send is called at t=15 and returns at t=16.
+        Then: reset_time is 6 seconds, blocked_time is 1.5 and overlapped_time is 4.5.
+         and: campaign_fraction is blocked_time over the time since the adapter was created.
+        """
+        mock_clock.side_effect = [0, 10, 10.5, 15, 16, 20]
+        uut = restart.RestartAdapter(self.ez_outlet)
+
+        uut.restart()
+        uut.pre_send()
+
+        assert uut.stats.reset_time == 6
+        assert uut.stats.blocked_time == 1.5
+        assert uut.stats.overlapped_time == 4.5
+        assert uut.stats.campaign_fraction() == 1.5 / 20
+
+    def test_monitor_interface(self):
+        """
+        Given: RestartAdapter.
+        When: Calling it through the boofuzz monitor methods.
+        Then: restart_target begins a reset and returns True; post_send and alive return True.
+        """
+        uut = restart.RestartAdapter(self.ez_outlet)
+
+        assert uut.restart_target(target=None, fuzz_data_logger=None, session=None) is True
+        self.ez_outlet.begin_reset.assert_called_once()
+        assert uut.post_send() is True
+        assert uut.alive() is True
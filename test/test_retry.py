@@ -0,0 +1,143 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import unittest
+
+import requests
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    # mock is required as an extras_require:
+    # noinspection PyPackageRequirements
+    import mock
+
+from ezoutlet import retry
+
+
+class TestRetryPolicy(unittest.TestCase):
+    timeout = requests.exceptions.ConnectTimeout()
+
+    def test_default_single_attempt(self):
+        """
+        Given: A default RetryPolicy.
+        When: Calling next_delay after a ConnectTimeout on attempt 1.
+        Then: None is returned.
+        """
+        self.assertIsNone(retry.RetryPolicy().next_delay(1, self.timeout))
+
+    def test_max_attempts(self):
+        """
+        Given: A RetryPolicy with max_attempts=3.
+        When: Calling next_delay after a ConnectTimeout on attempts 1, 2 and 3.
+        Then: A delay is returned for attempts 1 and 2, and None for attempt 3.
+        """
+        uut = retry.RetryPolicy(max_attempts=3)
+
+        delays = [uut.next_delay(attempt, self.timeout) for attempt in (1, 2, 3)]
+
+        self.assertIsNotNone(delays[0])
+        self.assertIsNotNone(delays[1])
+        self.assertIsNone(delays[2])
+
+    def test_retry_on(self):
+        """
+        Given: A RetryPolicy with max_attempts=3 and default retry_on.
+        When: Calling next_delay after ReadTimeout, ConnectionError, and a non-network exception.
+        Then: Only the network errors are retried.
+        """
+        uut = retry.RetryPolicy(max_attempts=3)
+
+        self.assertIsNotNone(uut.next_delay(1, requests.exceptions.ReadTimeout()))
+        self.assertIsNotNone(uut.next_delay(1, requests.exceptions.ConnectionError()))
+        self.assertIsNone(uut.next_delay(1, requests.exceptions.InvalidURL()))
+
+    def test_exponential_backoff(self):
+        """
+        Given: A RetryPolicy with backoff=1, multiplier=2, max_backoff=5 and no jitter.
+        When: Calling backoff for attempts 1 to 4.
+        Then: 1, 2, 4 and 5 are returned.
+        """
+        uut = retry.RetryPolicy(backoff=1, multiplier=2, max_backoff=5, jitter=0)
+
+        self.assertEqual([uut.backoff(attempt) for attempt in (1, 2, 3, 4)], [1, 2, 4, 5])
+
+    def test_jitter(self):
+        """
+        Given: A RetryPolicy with backoff=1 and jitter=0.5.
+        When: Calling backoff many times.
+        Then: Every result is between 0.5 and 1, and they are not all equal.
+        """
+        uut = retry.RetryPolicy(backoff=1, jitter=0.5, seed=1)
+
+        delays = [uut.backoff(1) for _ in range(100)]
+
+        self.assertTrue(all(0.5 <= d <= 1 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_on_retry(self):
+        """
+        Given: A RetryPolicy with max_attempts=2 and an on_retry callback.
+        When: Calling next_delay after a ConnectTimeout on attempt 1.
+        Then: on_retry is called with hostname, attempt, the returned delay and the exception.
+        """
+        on_retry = mock.MagicMock()
+        uut = retry.RetryPolicy(max_attempts=2, on_retry=on_retry)
+
+        delay = uut.next_delay(1, self.timeout, hostname='12.34.56.78')
+
+        on_retry.assert_called_once_with('12.34.56.78', 1, delay, self.timeout)
+
+    def test_budget_spent(self):
+        """
+        Given: A RetryPolicy with max_attempts=5 and a RetryBudget of 2 retries.
+        When: Calling next_delay three times.
+        Then: The third call returns None.
+        """
+        uut = retry.RetryPolicy(max_attempts=5, budget=retry.RetryBudget(max_retries=2, retries_per_second=0))
+
+        delays = [uut.next_delay(1, self.timeout) for _ in range(3)]
+
+        self.assertIsNone(delays[2])
+        self.assertNotIn(None, delays[:2])
+
+    def test_max_delay(self):
+        """
+        Given: A RetryPolicy with max_attempts=3, backoff=2, no jitter, a RetryBudget and an on_retry callback.
+        When: Calling next_delay with max_delay=2, then with max_delay=3.
+        Then: The first call returns None, without using the budget or calling on_retry.
+         and: The second call returns 2.
+        """
+        on_retry = mock.MagicMock()
+        budget = mock.MagicMock()
+        budget.try_acquire.return_value = True
+        uut = retry.RetryPolicy(max_attempts=3, backoff=2, jitter=0, budget=budget, on_retry=on_retry)
+
+        self.assertIsNone(uut.next_delay(1, self.timeout, max_delay=2))
+        budget.try_acquire.assert_not_called()
+        on_retry.assert_not_called()
+
+        self.assertEqual(uut.next_delay(1, self.timeout, max_delay=3), 2)
+        budget.try_acquire.assert_called_once_with()
+
+
+@mock.patch('ezoutlet.retry.time')
+class TestRetryBudget(unittest.TestCase):
+    def test_refill(self, mock_time):
+        """
+        Given: A RetryBudget of 1 retry, refilling at 0.5 per second, which has been spent.
+        When: Trying to acquire a retry 1 second and 2 seconds later.
+        Then: The first attempt fails and the second succeeds.
+        """
+        mock_time.time.return_value = 100
+        uut = retry.RetryBudget(max_retries=1, retries_per_second=0.5)
+        self.assertTrue(uut.try_acquire())
+
+        mock_time.time.return_value = 101
+        first = uut.try_acquire()
+        mock_time.time.return_value = 102
+        second = uut.try_acquire()
+
+        self.assertFalse(first)
+        self.assertTrue(second)
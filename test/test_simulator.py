@@ -0,0 +1,137 @@
+# Copyright (C) 2015 Schweitzer Engineering Laboratories, Inc.
+# This software may be modified and distributed under the terms
+# of the MIT license.  See the LICENSE file for details.
+
+import unittest
+
+import requests
+
+import ezoutlet.exceptions
+from ezoutlet import ez_outlet
+from ezoutlet import fleet
+from ezoutlet import outlet_status
+from ezoutlet import simulator
+
+
+class TestSimulatedOutlet(unittest.TestCase):
+    def test_reset(self):
+        """
+        Given: A running SimulatedOutlet.
+        When: Calling EzOutlet.reset() against it.
+        Then: EXPECTED_RESPONSE_CONTENTS is returned.
+         and: One relay cycle is triggered and the relay is off.
+        """
+        with simulator.SimulatedOutlet(relay_cycle_time=60) as outlet:
+            with ez_outlet.EzOutlet(hostname=outlet.hostname) as uut:
+                result = uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+            self.assertEqual(result, ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS)
+            self.assertEqual(outlet.resets_triggered, 1)
+            self.assertFalse(outlet.relay_on)
+
+    def test_reset_during_cycle_ignored(self):
+        """
+        Given: A running SimulatedOutlet whose relay is cycling.
+        When: Sending another reset.
+        Then: The reset is acknowledged but ignored.
+        """
+        with simulator.SimulatedOutlet(relay_cycle_time=60) as outlet:
+            with ez_outlet.EzOutlet(hostname=outlet.hostname) as uut:
+                uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+                uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+            self.assertEqual(outlet.resets_triggered, 1)
+            self.assertEqual(outlet.resets_ignored, 1)
+
+    def test_malformed(self):
+        """
+        Given: A running SimulatedOutlet with malformed_rate=1.
+        When: Calling EzOutlet.reset() against it.
+        Then: EzOutletError is raised with UNEXPECTED_RESPONSE_MSG.
+        """
+        with simulator.SimulatedOutlet(malformed_rate=1) as outlet:
+            with ez_outlet.EzOutlet(hostname=outlet.hostname) as uut:
+                with self.assertRaises(ezoutlet.exceptions.EzOutletError) as e:
+                    uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        self.assertEqual(str(e.exception), ez_outlet.EzOutlet.UNEXPECTED_RESPONSE_MSG.format(simulator.MALFORMED_BODY))
+
+    def test_dropped(self):
+        """
+        Given: A running SimulatedOutlet with drop_rate=1.
+        When: Calling EzOutlet.reset() against it.
+        Then: A connection error is raised.
+        """
+        with simulator.SimulatedOutlet(drop_rate=1) as outlet:
+            with ez_outlet.EzOutlet(hostname=outlet.hostname) as uut:
+                with self.assertRaises((requests.exceptions.ConnectionError, ezoutlet.exceptions.EzOutletError)):
+                    uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+    def test_status(self):
+        """
+        Given: A running SimulatedOutlet.
+        When: Calling EzOutlet.status(), then reset(), then status() again.
+        Then: The outlet is reachable each time, with its relay on, then off.
+         and: Status queries do not reset the outlet.
+        """
+        with simulator.SimulatedOutlet(relay_cycle_time=60) as outlet:
+            with ez_outlet.EzOutlet(hostname=outlet.hostname) as uut:
+                before = uut.status()
+                uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+                after = uut.status()
+
+        self.assertEqual((before.reachable, before.relay), (True, outlet_status.RELAY_ON))
+        self.assertEqual((after.reachable, after.relay), (True, outlet_status.RELAY_OFF))
+        self.assertEqual(outlet.resets_triggered, 1)
+
+
+class TestSimulatorFarm(unittest.TestCase):
+    def test_fleet_reset(self):
+        """
+        Given: A running SimulatorFarm of 100 outlets.
+        When: Resetting all of them with EzOutletFleet.
+        Then: Every outlet is reset exactly once.
+        """
+        with simulator.SimulatorFarm(count=100, relay_cycle_time=60) as farm:
+            with fleet.EzOutletFleet(hostnames=farm.hostnames) as uut:
+                results = uut.reset(post_reset_delay=0, ez_outlet_reset_interval=0)
+
+        self.assertEqual(set(results.values()), {ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS})
+        self.assertEqual([o.resets_triggered for o in farm.outlets], [1] * 100)
+
+    def test_fleet_status(self):
+        """
+        Given: A running SimulatorFarm of 100 outlets, and an address nothing listens on.
+        When: Calling EzOutletFleet.status() for all of them.
+        Then: Every outlet is reachable with its relay on, and none is reset.
+         and: The unused address is unreachable, with an error.
+        """
+        dead = '127.0.0.1:1'
+        with simulator.SimulatorFarm(count=100, relay_cycle_time=60) as farm:
+            with fleet.EzOutletFleet(hostnames=farm.hostnames + [dead]) as uut:
+                statuses = uut.status(timeout=1)
+
+        self.assertEqual(set((s.reachable, s.relay) for h, s in statuses.items() if h != dead),
+                         {(True, outlet_status.RELAY_ON)})
+        self.assertEqual([o.resets_triggered for o in farm.outlets], [0] * 100)
+        self.assertFalse(statuses[dead].reachable)
+        self.assertIsNotNone(statuses[dead].error)
+
+    def test_fleet_cycle_staggered(self):
+        """
+        Given: A running SimulatorFarm of 6 outlets.
+        When: Calling EzOutletFleet.cycle(off_duration=0, max_simultaneous_on=2, stagger=0.1).
+        Then: Every outlet is switched back on once, with its relay on and no reset triggered.
+         and: The outlets come on in 3 batches, at least 0.1 seconds apart.
+        """
+        with simulator.SimulatorFarm(count=6) as farm:
+            with fleet.EzOutletFleet(hostnames=farm.hostnames) as uut:
+                results = uut.cycle(off_duration=0, max_simultaneous_on=2, stagger=0.1)
+
+            self.assertEqual(set(results.values()), {ez_outlet.EzOutlet.EXPECTED_RESPONSE_CONTENTS})
+            self.assertTrue(all(o.relay_on for o in farm.outlets))
+        self.assertEqual([o.resets_triggered for o in farm.outlets], [0] * 6)
+        on_times = sorted(t for o in farm.outlets for t in o.turned_on_at)
+        self.assertEqual(len(on_times), 6)
+        self.assertGreaterEqual(on_times[2] - on_times[1], 0.1)
+        self.assertGreaterEqual(on_times[4] - on_times[3], 0.1)